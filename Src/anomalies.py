@@ -0,0 +1,198 @@
+# src/anomalies.py
+"""
+Detección de anomalías en línea durante la ingesta. Los LIMITES del loader solo
+descartan valores imposibles; aquí se marca lo raro *para ese sensor*: un pico o una
+deriva dentro del rango válido.
+
+Por sensor/zona y métrica se lleva una media y varianza exponenciales (EWMA, α):
+    δ = x - m;  m += α·δ;  s = (1-α)·(s + α·δ²);  z = δ / √s (con m y s previos a x)
+Cada chunk se procesa con groupby().ewm() de pandas (vectorizado por grupo) sembrando
+cada grupo con el estado guardado, así que nunca se vuelve a leer el historial.
+El estado (m, s, n y la última marca de tiempo por clave) se persiste en CACHE_DIR;
+las lecturas con ts <= última marca ya aportaron al estado (un archivo re-ingerido) y
+solo se puntúan, sin actualizarlo.
+
+Columnas que agrega: z_<métrica> (float32) y `anomalia` (bool, alguna |z| > umbral).
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import (CACHE_DIR, ANOMALIA_METRICAS, ANOMALIA_ALPHA, ANOMALIA_Z,
+                     ANOMALIA_CALENTAMIENTO)
+from .perf import perfilado
+
+ESTADO_ANOMALIAS = CACHE_DIR / "anomalias.json"
+CLAVES_SENSOR = ("sensor_id", "sensor", "zona_id", "nombre")  # la primera que exista
+CHUNK_FILAS = 200_000
+
+
+def _ewm_por_grupo(valores: np.ndarray, grupos: np.ndarray, alpha: float) -> np.ndarray:
+    """EWMA (adjust=False, ignora NaN) por grupo; filas ya ordenadas por grupo."""
+    s = pd.Series(valores)
+    return (s.groupby(grupos, sort=False).ewm(alpha=alpha, adjust=False, ignore_na=True).mean()
+             .droplevel(0).sort_index().to_numpy())
+
+
+def _desplazar(valores: np.ndarray, grupos: np.ndarray) -> np.ndarray:
+    """Valor de la fila anterior del mismo grupo (NaN en la primera)."""
+    previo = np.r_[np.nan, valores[:-1]]
+    previo[np.r_[True, grupos[1:] != grupos[:-1]]] = np.nan
+    return previo
+
+
+class DetectorAnomalias:
+    """Estado EWMA por (clave, métrica); `procesar(df)` puntúa y actualiza chunk por chunk."""
+
+    def __init__(self, metricas=ANOMALIA_METRICAS, alpha: float = ANOMALIA_ALPHA,
+                 umbral_z: float = ANOMALIA_Z, calentamiento: int = ANOMALIA_CALENTAMIENTO,
+                 version=None):
+        self.metricas = tuple(metricas)
+        self.alpha = alpha
+        self.umbral_z = umbral_z
+        self.calentamiento = calentamiento
+        self.version = version
+        # clave -> {"ts": ns | None, métrica: [m, s, n]}
+        self.estado = {}
+
+    @staticmethod
+    def columna_clave(df: pd.DataFrame) -> str | None:
+        return next((c for c in CLAVES_SENSOR if c in df.columns), None)
+
+    def _estado_de(self, claves, metrica: str) -> tuple:
+        m = np.full(len(claves), np.nan)
+        s = np.full(len(claves), np.nan)
+        n = np.zeros(len(claves), dtype=np.int64)
+        for i, c in enumerate(claves):
+            previo = self.estado.get(c, {}).get(metrica)
+            if previo is not None:
+                m[i], s[i], n[i] = previo
+        return m, s, n
+
+    @perfilado("anomalies.procesar")
+    def procesar(self, df: pd.DataFrame, chunk_filas: int = CHUNK_FILAS, validas=None) -> pd.DataFrame:
+        """
+        Agrega z_<métrica> y `anomalia`; procesa por chunks de filas en orden temporal.
+        `validas` (máscara bool) excluye filas rechazadas: ni se puntúan ni tocan el estado.
+        """
+        col = self.columna_clave(df)
+        metricas = [m for m in self.metricas if m in df.columns]
+        if col is None or not metricas or df.empty:
+            return df
+        con_ts = "ts" in df.columns
+        orden = np.arange(len(df)) if validas is None else np.flatnonzero(validas)
+        if con_ts:
+            ts = df["ts"].to_numpy(dtype="datetime64[ns]")[orden]
+            orden = orden[np.argsort(ts, kind="stable")]
+        z = {m: np.full(len(df), np.nan, dtype=np.float32) for m in metricas}
+        marca = np.zeros(len(df), dtype=bool)
+        for i0 in range(0, len(df), chunk_filas):
+            filas = orden[i0:i0 + chunk_filas]
+            zc, mc = self._procesar_chunk(df.iloc[filas], col, metricas, con_ts)
+            for m in metricas:
+                z[m][filas] = zc[m]
+            marca[filas] = mc
+        return df.assign(**{f"z_{m}": z[m] for m in metricas}, anomalia=marca)
+
+    def _procesar_chunk(self, chunk: pd.DataFrame, col: str, metricas: list, con_ts: bool):
+        claves_chunk = chunk[col].astype(str).to_numpy()
+        codigos, claves = pd.factorize(claves_chunk)
+        # Orden por clave (estable: dentro de cada clave se conserva el orden temporal)
+        orden = np.argsort(codigos, kind="stable")
+        cod = codigos[orden]
+        k = len(claves)
+        ts = chunk["ts"].to_numpy(dtype="datetime64[ns]").view(np.int64)[orden] if con_ts else None
+
+        # Lecturas ya vistas (ts <= marca de agua de su clave): se puntúan pero no actualizan
+        if con_ts:
+            sin_marca = np.iinfo(np.int64).min
+            agua = np.array([self.estado.get(c, {}).get("ts", sin_marca) for c in claves], dtype=np.int64)
+            vistas = (ts != sin_marca) & (ts <= agua[cod])
+        else:
+            vistas = np.zeros(len(cod), dtype=bool)
+
+        # Cada grupo arranca con una fila semilla (el estado guardado) antes de sus lecturas
+        grupos = np.r_[np.arange(k), cod]
+        pos = np.argsort(grupos, kind="stable")
+        grupos = grupos[pos]
+        es_dato = pos >= k
+        fila_dato = pos[es_dato] - k  # posición (en el orden por clave) de cada fila de datos
+
+        z_out, marca = {}, np.zeros(len(cod), dtype=bool)
+        for metrica in metricas:
+            x = chunk[metrica].to_numpy(dtype=np.float64, na_value=np.nan)[orden]
+            m0, s0, n0 = self._estado_de(claves, metrica)
+            x_upd = np.where(vistas, np.nan, x)
+
+            # Media: EWMA de x sembrada con m0
+            serie = np.empty(len(grupos))
+            serie[~es_dato] = m0[grupos[~es_dato]]
+            serie[es_dato] = x_upd[fila_dato]
+            media = _ewm_por_grupo(serie, grupos, self.alpha)
+            media_prev = _desplazar(media, grupos)
+            delta = serie - media_prev
+            # Varianza: s_t = (1-α)·s_{t-1} + α·[(1-α)·δ²] es otra EWMA, sembrada con s0
+            serie_s = np.where(es_dato, (1 - self.alpha) * delta ** 2, np.nan)
+            serie_s[~es_dato] = s0[grupos[~es_dato]]
+            var = _ewm_por_grupo(serie_s, grupos, self.alpha)
+            var_prev = _desplazar(var, grupos)
+            # Lecturas previas por clave (para el calentamiento)
+            validas = es_dato & ~np.isnan(serie)
+            acumuladas = pd.Series(validas.astype(np.int64)).groupby(grupos, sort=False).cumsum().to_numpy()
+            n_prev = n0[grupos] + acumuladas - validas
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z_nuevas = np.where(var_prev > 0, delta / np.sqrt(var_prev), np.nan)[es_dato]
+                z_vistas = np.where(s0[cod] > 0, (x - m0[cod]) / np.sqrt(s0[cod]), np.nan)
+            z_m = np.where(vistas, z_vistas, z_nuevas)
+            listas = np.where(vistas, n0[cod], n_prev[es_dato]) >= self.calentamiento
+            marca |= listas & (np.abs(np.nan_to_num(z_m)) > self.umbral_z)
+            z_out[metrica] = z_m
+
+            # Estado final: último valor de cada grupo (la semilla si no hubo lecturas nuevas)
+            ultimo = np.r_[grupos[1:] != grupos[:-1], True]
+            n_fin = n0 + np.bincount(grupos[validas], minlength=k)
+            for c, mi, si, ni in zip(claves, media[ultimo], var[ultimo], n_fin):
+                if not np.isnan(mi):
+                    self.estado.setdefault(c, {})[metrica] = [float(mi), float(si), int(ni)]
+        if con_ts:
+            ts_max = np.full(k, sin_marca, dtype=np.int64)
+            np.maximum.at(ts_max, cod, ts)  # NaT es el mínimo de int64: no mueve la marca
+            for c, t in zip(claves, ts_max):
+                if t != sin_marca:
+                    previo = self.estado.setdefault(c, {}).get("ts")
+                    self.estado[c]["ts"] = int(max(t, previo)) if previo is not None else int(t)
+
+        # De vuelta al orden del chunk
+        inversa = np.empty_like(orden)
+        inversa[orden] = np.arange(len(orden))
+        return {m: v[inversa] for m, v in z_out.items()}, marca[inversa]
+
+    # --- persistencia ---
+    def to_dict(self) -> dict:
+        return {"version": self.version, "metricas": list(self.metricas), "alpha": self.alpha,
+                "umbral_z": self.umbral_z, "calentamiento": self.calentamiento, "estado": self.estado}
+
+    def save(self, path=ESTADO_ANOMALIAS) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(path).with_name(f".{Path(path).name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=ESTADO_ANOMALIAS, version=None, **kwargs) -> "DetectorAnomalias":
+        """Estado guardado; si no existe o es de otra versión/configuración, empieza de cero."""
+        detector = cls(version=version, **kwargs)
+        if not Path(path).exists():
+            return detector
+        with open(path, encoding="utf-8") as f:
+            d = json.load(f)
+        misma = (d.get("version") == version and d.get("alpha") == detector.alpha
+                 and d.get("metricas") == list(detector.metricas))
+        if misma:
+            detector.estado = d.get("estado", {})
+        return detector
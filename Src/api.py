@@ -0,0 +1,353 @@
+# src/api.py
+"""
+Servicio HTTP local (tornado) para herramientas que no son Streamlit. Sirve el mismo
+snapshot que publica el worker de ingesta (lo lee de CACHE_DIR/CURRENT.json): el servicio
+no ingiere ni parsea CSV; la app de Streamlit o un worker aparte son quienes publican.
+
+Endpoints (GET):
+- /salud     versión publicada y estado de la caché.
+- /lecturas  lecturas válidas filtradas. Parámetros: zonas=a,b  fecha_min  fecha_max
+             iac_min  iac_max (escala 0–1)  bbox=lon_min,lat_min,lon_max,lat_max
+             columnas=a,b  limite=N (tope API_MAX_FILAS).
+- /zonas     rollup por zona: por=nombre|zona_oficial|zona_cluster.
+- /mapa      agregados listos para mapa: por celda de la rejilla (metrica=iac, celda=0.01)
+             o tipo=superficie (IDW de src/surface, resolucion=N, tope API_MAX_RESOLUCION).
+- /agregados los del tablero: tipo=riesgo (umbral en %, top) | anual (zonas=a,b) |
+             causas (top). Con config.USAR_STORE salen del almacén SQLite.
+Formato: JSON (registros) por defecto; Arrow IPC stream con formato=arrow o
+`Accept: application/vnd.apache.arrow.stream`.
+
+- Respuestas ya serializadas en una LRU acotada por bytes; la versión del snapshot va en
+  la clave, así que una publicación nueva las invalida sola.
+- El cálculo corre en un pool de hilos (pandas/numpy sueltan el GIL) y un semáforo limita
+  las consultas simultáneas; si la cola de espera se llena se responde 503.
+
+Uso: python -m src.api [--host 127.0.0.1] [--puerto 8765]
+"""
+import abc
+import argparse
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import tornado.web
+from tornado.ioloop import IOLoop
+
+from .config import (API_HOST, API_PUERTO, API_CONCURRENCIA, API_COLA, API_CACHE_MB,
+                     API_MAX_FILAS, API_MAX_RESOLUCION, CACHE_DIR, GRID_CELL_DEG, IAC_THRESHOLDS,
+                     SUPERFICIE_RESOLUCION)
+from .data_loader import _filtrar_filas, filas_validas
+from .chart_data import causas_principales, iac_anual, riesgo_por_zona
+from .clustering import resumen_por_zona
+from .ingest_worker import read_current
+from .snapshot import load_snapshot
+from .store import grid_cell
+from .surface import superficie
+from .perf import perfilado
+
+MIME_ARROW = "application/vnd.apache.arrow.stream"
+MIME = {"json": "application/json; charset=utf-8", "arrow": MIME_ARROW}
+COLUMNAS_ZONA = ("nombre", "zona_oficial", "zona_cluster")
+
+
+# === CONSULTAS (funciones puras sobre el df del snapshot) ===
+@perfilado("api.lecturas")
+def lecturas(df: pd.DataFrame, *, zonas=None, fecha_range=None, iac_range=None, bbox=None,
+             columnas=None, limite: int = API_MAX_FILAS) -> pd.DataFrame:
+    """Lecturas filtradas (mismos predicados que load_dataset), a lo más `limite` filas."""
+    d = _filtrar_filas(df, fecha_range=fecha_range, zonas=zonas, iac_range=iac_range, bbox=bbox)
+    if columnas:
+        faltan = [c for c in columnas if c not in d.columns]
+        if faltan:
+            raise ValueError(f"columnas inexistentes: {', '.join(faltan)}")
+        d = d[columnas]
+    return d.head(limite)
+
+
+@perfilado("api.zonas")
+def rollup_zonas(df: pd.DataFrame, por: str = "nombre") -> pd.DataFrame:
+    """Lecturas, centroide e IAC/impacto medios por zona."""
+    if por not in COLUMNAS_ZONA:
+        raise ValueError(f"por debe ser uno de: {', '.join(COLUMNAS_ZONA)}")
+    if por not in df.columns:
+        raise ValueError(f"el snapshot no trae la columna {por}")
+    return resumen_por_zona(df, por)
+
+
+@perfilado("api.mapa")
+def agregado_mapa(df: pd.DataFrame, metrica: str = "iac", celda: float = GRID_CELL_DEG) -> pd.DataFrame:
+    """Media de la métrica por celda de la rejilla lat/lon, con centroide y número de lecturas."""
+    if not {"lat", "lon", metrica}.issubset(df.columns):
+        raise ValueError(f"el snapshot no trae lat/lon/{metrica}")
+    if celda <= 0:
+        raise ValueError("celda debe ser > 0")
+    d = df[["lat", "lon", metrica]].dropna()
+    return (d.groupby(grid_cell(d["lat"], d["lon"], celda), sort=False)
+             .agg(lat=("lat", "mean"), lon=("lon", "mean"), lecturas=(metrica, "size"),
+                  **{metrica: (metrica, "mean")})
+             .rename_axis("celda").reset_index())
+
+
+# === SERIALIZACIÓN ===
+def a_json(df: pd.DataFrame) -> bytes:
+    return df.to_json(orient="records", date_format="iso", force_ascii=False).encode("utf-8")
+
+
+def a_arrow(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabla.schema) as writer:
+        writer.write_table(tabla)
+    return sink.getvalue().to_pybytes()
+
+
+SERIALIZAR = {"json": a_json, "arrow": a_arrow}
+
+
+# === ESTADO DEL SERVICIO ===
+class CacheRespuestas:
+    """LRU de respuestas serializadas acotada por bytes (solo se usa desde el hilo del IOLoop)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._datos = OrderedDict()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def get(self, clave):
+        cuerpo = self._datos.get(clave)
+        if cuerpo is not None:
+            self._datos.move_to_end(clave)
+        return cuerpo
+
+    def put(self, clave, cuerpo: bytes) -> None:
+        if len(cuerpo) > self.max_bytes or clave in self._datos:
+            return
+        self._datos[clave] = cuerpo
+        self.bytes += len(cuerpo)
+        while self.bytes > self.max_bytes:
+            _, viejo = self._datos.popitem(last=False)
+            self.bytes -= len(viejo)
+
+
+class FuenteDatos:
+    """
+    Filas válidas del snapshot vigente; se vuelve a mapear solo cuando cambia la versión.
+    Solo lee el puntero CURRENT.json que publica el worker de ingesta: no arranca otro worker.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._version = None
+        self._df = None
+
+    def current(self):
+        """{version, path, kpis} publicado o None (un JSON pequeño; no toca el snapshot)."""
+        return read_current(self.cache_dir)
+
+    def version(self):
+        actual = self.current()
+        return None if actual is None else actual["version"]
+
+    def actual(self) -> tuple:
+        snapshot = self.current()
+        if snapshot is None:
+            return None, None
+        with self._lock:
+            if snapshot["version"] != self._version:
+                self._df = filas_validas(load_snapshot(snapshot["path"]))
+                self._version = snapshot["version"]
+            return self._version, self._df
+
+
+class Servicio:
+    """Fuente de datos, caché de respuestas y límites de concurrencia compartidos por los handlers."""
+
+    def __init__(self, fuente: FuenteDatos | None = None, concurrencia: int = API_CONCURRENCIA,
+                 cola: int = API_COLA, cache_mb: float = API_CACHE_MB):
+        self.fuente = fuente if fuente is not None else FuenteDatos()
+        self.cache = CacheRespuestas(int(cache_mb * 1024 * 1024))
+        self.cola = cola
+        self.pool = ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="urbesense-api")
+        self._semaforo = asyncio.Semaphore(concurrencia)
+        self._esperando = 0
+
+    async def ejecutar(self, fn, *args):
+        """Corre `fn` en el pool sin pasar de `concurrencia` a la vez; 503 si la cola está llena."""
+        if self._esperando >= self.cola:
+            raise tornado.web.HTTPError(503, "servicio saturado")
+        self._esperando += 1
+        try:
+            await self._semaforo.acquire()
+        finally:
+            self._esperando -= 1
+        try:
+            return await IOLoop.current().run_in_executor(self.pool, fn, *args)
+        finally:
+            self._semaforo.release()
+
+
+# === HANDLERS ===
+class _Base(tornado.web.RequestHandler):
+    def initialize(self, servicio: Servicio):
+        self.servicio = servicio
+
+    def write_error(self, status_code: int, **kwargs):
+        """Errores como JSON {"error": mensaje} (el mensaje del HTTPError, no la página HTML)."""
+        error = kwargs.get("exc_info", (None, None))[1]
+        mensaje = getattr(error, "log_message", None) or self._reason
+        self.set_header("Content-Type", MIME["json"])
+        self.finish(json.dumps({"error": mensaje}, ensure_ascii=False))
+
+
+class _Consulta(_Base, abc.ABC):
+    """GET común: clave de caché, límite de concurrencia y formato de salida."""
+
+    @abc.abstractmethod
+    def calcular(self, df: pd.DataFrame, args: dict) -> pd.DataFrame:
+        """Resultado de la consulta sobre el df del snapshot; ValueError -> 400."""
+
+    def _formato(self, pedido) -> str:
+        if pedido is None:
+            return "arrow" if MIME_ARROW in self.request.headers.get("Accept", "") else "json"
+        if pedido not in SERIALIZAR:
+            raise tornado.web.HTTPError(400, f"formato debe ser uno de: {', '.join(SERIALIZAR)}")
+        return pedido
+
+    def _responder(self, args: dict, formato: str) -> tuple:
+        """En el pool: consulta + serialización. Devuelve (versión usada, bytes)."""
+        version, df = self.servicio.fuente.actual()
+        try:
+            resultado = self.calcular(df, args)
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, str(e).replace("%", "%%"))
+        return version, SERIALIZAR[formato](resultado)
+
+    async def get(self):
+        version = self.servicio.fuente.version()
+        if version is None:
+            raise tornado.web.HTTPError(503, "sin snapshot publicado todavía")
+        args = {k: self.get_query_argument(k) for k in self.request.query_arguments}
+        formato = self._formato(args.pop("formato", None))
+        clave = (version, self.request.path, tuple(sorted(args.items())), formato)
+        cuerpo = self.servicio.cache.get(clave)
+        if cuerpo is None:
+            version_usada, cuerpo = await self.servicio.ejecutar(self._responder, args, formato)
+            if version_usada == version:  # si se publicó otra versión a medio camino, no se cachea
+                self.servicio.cache.put(clave, cuerpo)
+        self.set_header("Content-Type", MIME[formato])
+        self.set_header("X-Urbesense-Version", str(version))
+        self.finish(cuerpo)
+
+
+def _numero(args: dict, nombre: str, tipo=float):
+    valor = args.get(nombre)
+    if valor in (None, ""):
+        return None
+    try:
+        return tipo(valor)
+    except ValueError:
+        raise ValueError(f"{nombre} no es un número válido: {valor!r}")
+
+
+def _lista(args: dict, nombre: str):
+    valor = args.get(nombre)
+    return [v.strip() for v in valor.split(",") if v.strip()] if valor else None
+
+
+class LecturasHandler(_Consulta):
+    def calcular(self, df, args):
+        fecha_range = (args.get("fecha_min"), args.get("fecha_max"))
+        iac_range = (_numero(args, "iac_min"), _numero(args, "iac_max"))
+        bbox = _lista(args, "bbox")
+        if bbox is not None:
+            if len(bbox) != 4:
+                raise ValueError("bbox debe ser lon_min,lat_min,lon_max,lat_max")
+            bbox = [_numero({"bbox": v}, "bbox") for v in bbox]
+        limite = _numero(args, "limite", int)
+        return lecturas(
+            df, zonas=_lista(args, "zonas"), bbox=bbox, columnas=_lista(args, "columnas"),
+            fecha_range=fecha_range if any(fecha_range) else None,
+            iac_range=iac_range if any(v is not None for v in iac_range) else None,
+            limite=API_MAX_FILAS if limite is None else max(0, min(limite, API_MAX_FILAS)),
+        )
+
+
+class ZonasHandler(_Consulta):
+    def calcular(self, df, args):
+        return rollup_zonas(df, args.get("por", "nombre"))
+
+
+class MapaHandler(_Consulta):
+    def calcular(self, df, args):
+        metrica = args.get("metrica", "iac")
+        if args.get("tipo", "celdas") == "superficie":
+            resolucion = _numero(args, "resolucion", int) or SUPERFICIE_RESOLUCION
+            if not 2 <= resolucion <= API_MAX_RESOLUCION:
+                raise ValueError(f"resolucion debe estar entre 2 y {API_MAX_RESOLUCION}")
+            sup = superficie(df, metrica, resolucion=resolucion)
+            return sup.to_frame() if sup is not None else pd.DataFrame(columns=["lat", "lon", metrica])
+        return agregado_mapa(df, metrica, _numero(args, "celda") or GRID_CELL_DEG)
+
+
+class AgregadosHandler(_Consulta):
+    def calcular(self, df, args):
+        tipo, top = args.get("tipo", "riesgo"), _numero(args, "top", int) or 5
+        if tipo == "riesgo":
+            umbral = _numero(args, "umbral")
+            return riesgo_por_zona(df, IAC_THRESHOLDS["mid"] if umbral is None else umbral, n=top)
+        if tipo == "anual":
+            return iac_anual(df, _lista(args, "zonas"))
+        if tipo == "causas":
+            if not {"causa", "impacto"}.issubset(df.columns):
+                raise ValueError("el snapshot no trae causa/impacto")
+            return causas_principales(df, n=top)
+        raise ValueError("tipo debe ser uno de: riesgo, anual, causas")
+
+
+class SaludHandler(_Base):
+    def get(self):
+        actual = self.servicio.fuente.current() or {}
+        self.set_header("Content-Type", MIME["json"])
+        self.finish(json.dumps({
+            "version": actual.get("version"),
+            "cache": {"respuestas": len(self.servicio.cache), "bytes": self.servicio.cache.bytes},
+        }))
+
+
+def crear_app(servicio: Servicio | None = None) -> tornado.web.Application:
+    servicio = servicio if servicio is not None else Servicio()
+    ctx = {"servicio": servicio}
+    return tornado.web.Application([
+        (r"/salud", SaludHandler, ctx),
+        (r"/lecturas", LecturasHandler, ctx),
+        (r"/zonas", ZonasHandler, ctx),
+        (r"/mapa", MapaHandler, ctx),
+        (r"/agregados", AgregadosHandler, ctx),
+    ])
+
+
+async def _servir(host: str, puerto: int) -> None:
+    crear_app().listen(puerto, address=host)
+    print(f"UrbeSense API en http://{host}:{puerto}")
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP local con los datos limpios de UrbeSense.")
+    parser.add_argument("--host", default=API_HOST, help="dirección de escucha (por defecto solo local)")
+    parser.add_argument("--puerto", type=int, default=API_PUERTO)
+    args = parser.parse_args(argv)
+    asyncio.run(_servir(args.host, args.puerto))
+
+
+if __name__ == "__main__":
+    main()
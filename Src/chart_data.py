@@ -0,0 +1,135 @@
+# src/chart_data.py
+"""
+Datos de gráficas reducidos en el servidor. Altair incrusta la tabla fuente en el spec
+Vega-Lite que viaja al navegador (y corta en `max_rows`=5000), así que aquí se agrupa,
+se binea y se agrega con pandas/NumPy y la gráfica recibe solo la tabla chica.
+
+- `top_por_grupo`, `conteo_bajo_umbral`, `histograma`: agregados típicos del tablero.
+- `riesgo_por_zona`, `iac_anual`, `causas_principales`: agregados que comparten tablero y
+  API; con USAR_STORE salen del almacén SQLite (src/store) en vez del df.
+- `reducir_serie`: baja una serie larga a <= MAX_FILAS_GRAFICA puntos (cubetas en x).
+- `CacheSpecs`: spec ya serializado por (versión de datos, clave de la gráfica) en una LRU;
+  sesiones en versiones distintas (durante una publicación) no se vacían la caché entre sí.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import store
+from .config import IAC_THRESHOLDS, STORE_DB, USAR_STORE
+from .units import as_percent
+
+MAX_FILAS_GRAFICA = 5000  # límite por defecto de Altair (alt.data_transformers max_rows)
+
+
+def top_por_grupo(df: pd.DataFrame, grupo: str, valor: str, func: str = "mean", n: int = 5) -> pd.DataFrame:
+    """Las `n` categorías con mayor `func(valor)`; columnas [grupo, valor]."""
+    agregado = df.groupby(grupo, sort=False, observed=True)[valor].agg(func)
+    return agregado.nlargest(n).reset_index()
+
+
+def conteo_bajo_umbral(grupos: pd.Series, valores, umbral: float, n: int = 5, validos=None) -> pd.DataFrame:
+    """
+    Lecturas con valor < umbral por grupo (top `n`) y su porcentaje sobre ese top.
+    Columnas Zona, Casos, Porcentaje. `validos` (máscara) descarta filas antes de contar.
+    """
+    codigos, etiquetas = pd.factorize(grupos, sort=False)
+    valores = np.asarray(valores, dtype=np.float64)
+    usar = codigos >= 0
+    if validos is not None:
+        usar &= np.asarray(validos, dtype=bool)
+    presentes = np.bincount(codigos[usar], minlength=len(etiquetas)) > 0
+    casos = np.bincount(codigos[usar & (valores < umbral)], minlength=len(etiquetas))
+    out = pd.DataFrame({"Zona": np.asarray(etiquetas)[presentes], "Casos": casos[presentes]})
+    out = out.sort_values("Casos", ascending=False, kind="stable").head(n).reset_index(drop=True)
+    total = out["Casos"].sum()
+    out["Porcentaje"] = (out["Casos"] / total * 100.0).round(1) if total else 0.0
+    return out
+
+
+def riesgo_por_zona(df: pd.DataFrame, umbral: float = IAC_THRESHOLDS["mid"], n: int = 5,
+                    usar_store: bool = USAR_STORE, db_path=STORE_DB) -> pd.DataFrame:
+    """Zonas (nombre) con más lecturas de IAC bajo `umbral` (%): Zona, Casos, Porcentaje."""
+    if usar_store:
+        return store.riesgo_por_zona(top=n, umbral=umbral, db_path=db_path)
+    return conteo_bajo_umbral(df["nombre"], as_percent(df, "iac"), umbral, n=n)
+
+
+def iac_anual(df: pd.DataFrame, zonas=None, usar_store: bool = USAR_STORE, db_path=STORE_DB) -> pd.DataFrame:
+    """IAC promedio por año (fecha como texto 'AAAA'); opcionalmente solo algunas zonas."""
+    if usar_store:
+        return store.iac_anual(zonas, db_path=db_path)
+    d = df[df["nombre"].isin(zonas)] if zonas else df
+    anio = pd.to_datetime(d["fecha"], errors="coerce").dt.strftime("%Y").rename("fecha")
+    return d["iac"].groupby(anio, sort=True).mean().reset_index()
+
+
+def causas_principales(df: pd.DataFrame, n: int = 5, usar_store: bool = USAR_STORE, db_path=STORE_DB) -> pd.DataFrame:
+    """Las `n` causas con mayor impacto promedio: causa, impacto."""
+    if usar_store:
+        return store.ranking_causas(top=n, db_path=db_path)
+    return top_por_grupo(df, "causa", "impacto", "mean", n=n)
+
+
+def histograma(valores, bins: int = 30, rango=None) -> pd.DataFrame:
+    """Conteo por intervalo (desde, hasta, n) ignorando NaN; para mark_bar con x=desde, x2=hasta."""
+    v = np.asarray(valores, dtype=np.float64)
+    v = v[~np.isnan(v)]
+    if not len(v):
+        return pd.DataFrame({"desde": [], "hasta": [], "n": []})
+    n, bordes = np.histogram(v, bins=bins, range=rango)
+    return pd.DataFrame({"desde": bordes[:-1], "hasta": bordes[1:], "n": n})
+
+
+def reducir_serie(df: pd.DataFrame, x: str, y, max_puntos: int = MAX_FILAS_GRAFICA,
+                  grupo: str | None = None) -> pd.DataFrame:
+    """
+    Serie con a lo más `max_puntos` filas: si sobra, parte el eje x en cubetas de igual
+    ancho (por grupo, si hay) y deja el primer x y la media de cada `y` por cubeta.
+    """
+    if len(df) <= max_puntos:
+        return df
+    ys = [y] if isinstance(y, str) else list(y)
+    n_grupos = df[grupo].nunique() if grupo else 1
+    cubetas = max(1, max_puntos // max(n_grupos, 1))
+    es_fecha = pd.api.types.is_datetime64_any_dtype(df[x])
+    v = df[x].to_numpy(dtype="datetime64[ns]").view(np.int64).astype(np.float64) if es_fecha \
+        else df[x].to_numpy(dtype=np.float64, na_value=np.nan)
+    lo, hi = np.nanmin(v), np.nanmax(v)
+    idx = np.floor((v - lo) / max(hi - lo, 1e-12) * cubetas)
+    idx = np.clip(np.nan_to_num(idx, nan=0), 0, cubetas - 1).astype(np.int64)
+    claves = [grupo, "_cubeta"] if grupo else ["_cubeta"]
+    agregados = {x: "min", **{c: "mean" for c in ys}}
+    return (df[[c for c in (grupo, x, *ys) if c]].assign(_cubeta=idx)
+              .groupby(claves, sort=True, observed=True).agg(agregados)
+              .reset_index().drop(columns="_cubeta"))
+
+
+class CacheSpecs:
+    """Specs Vega-Lite (dict) por (versión de datos, clave); LRU thread-safe de `max_entradas`."""
+
+    def __init__(self, max_entradas: int = 128):
+        self.max_entradas = max_entradas
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._specs)
+
+    def obtener(self, version, clave, construir) -> dict:
+        """Spec de `clave` para `version`; `construir()` (-> alt.Chart o dict) solo si falta."""
+        llave = (version, clave)
+        with self._lock:
+            spec = self._specs.get(llave)
+            if spec is not None:
+                self._specs.move_to_end(llave)
+        if spec is None:
+            grafica = construir()
+            spec = grafica if isinstance(grafica, dict) else grafica.to_dict()
+            with self._lock:
+                self._specs[llave] = spec
+                while len(self._specs) > self.max_entradas:
+                    self._specs.popitem(last=False)
+        return spec
@@ -0,0 +1,106 @@
+# src/clustering.py
+"""
+Zonas detectadas a partir de lat/lon, para feeds sin etiqueta de colonia.
+
+DBSCAN sobre rejilla: celdas de `eps_km` de lado; una celda con al menos `min_puntos`
+posiciones distintas es densa (un sensor fijo que reporta cada 5 min cuenta una vez).
+Las celdas densas vecinas (8-vecindad) forman una zona y las lecturas de celdas no
+densas pegadas a una zona se le asignan como borde. El resto queda en -1 (ruido). Todo es vectorizado (ordenar claves + searchsorted), O(N log N).
+El worker lo aplica al publicar y la columna `zona_cluster` viaja en el snapshot.
+"""
+import numpy as np
+import pandas as pd
+
+from .config import CLUSTER_EPS_KM, CLUSTER_MIN_PUNTOS
+from .geometry import RADIO_TIERRA_KM
+from .perf import perfilado
+
+_VECINOS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)]
+
+
+def _celdas(lat: np.ndarray, lon: np.ndarray, eps_km: float):
+    """Fila/columna de rejilla; la columna se escala con cos(lat media) para celdas ~cuadradas."""
+    alto = np.degrees(eps_km / RADIO_TIERRA_KM)
+    ancho = alto / max(np.cos(np.radians(np.nanmean(lat))), 1e-6)
+    return np.floor(lat / alto).astype(np.int64), np.floor(lon / ancho).astype(np.int64)
+
+
+def _buscar(claves: np.ndarray, buscadas: np.ndarray) -> np.ndarray:
+    """Posición de cada clave buscada en `claves` (ordenadas) o -1 si no está."""
+    pos = np.searchsorted(claves, buscadas)
+    pos = np.minimum(pos, len(claves) - 1)
+    return np.where(claves[pos] == buscadas, pos, -1)
+
+
+def zonas_por_densidad(lat, lon, eps_km: float = CLUSTER_EPS_KM,
+                       min_puntos: int = CLUSTER_MIN_PUNTOS) -> np.ndarray:
+    """ID de zona por lectura (0..k-1, ordenado por posición en la rejilla) o -1 si es ruido."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    etiquetas = np.full(len(lat), -1, dtype=np.int64)
+    validas = ~(np.isnan(lat) | np.isnan(lon))
+    if not validas.any():
+        return etiquetas
+
+    fila, col = _celdas(lat[validas], lon[validas], eps_km)
+    col0 = col.min() - 1
+    ancho = col.max() - col0 + 2  # margen para que col±1 no cambie de fila en la clave
+    clave = fila * ancho + (col - col0)
+    celdas, inversa = np.unique(clave, return_inverse=True)
+    distintas = ~pd.DataFrame({"lat": lat[validas], "lon": lon[validas]}).duplicated().to_numpy()
+    cuenta = np.bincount(inversa[distintas], minlength=len(celdas))
+
+    densas = celdas[cuenta >= min_puntos]
+    if not len(densas):
+        return etiquetas
+    desplaz = np.array([di * ancho + dj for di, dj in _VECINOS], dtype=np.int64)
+    # Vecinos densos de cada celda densa (-1 si no existe)
+    vecinos = _buscar(densas, densas[:, None] + desplaz[None, :])
+
+    # Componentes conexas: propagación del mínimo + salto de punteros hasta converger
+    comp = np.arange(len(densas))
+    while True:
+        candidato = np.where(vecinos >= 0, comp[np.maximum(vecinos, 0)], comp[:, None]).min(axis=1)
+        nuevo = np.minimum(comp, candidato)
+        np.minimum.at(nuevo, comp, nuevo)  # la raíz hereda el mínimo de sus miembros
+        nuevo = nuevo[nuevo]
+        if np.array_equal(nuevo, comp):
+            break
+        comp = nuevo
+    _, comp = np.unique(comp, return_inverse=True)
+
+    # Etiqueta por celda: densas -> su componente; no densas -> la menor zona densa vecina
+    por_celda = np.full(len(celdas), -1, dtype=np.int64)
+    por_celda[_buscar(celdas, densas)] = comp
+    sueltas = np.flatnonzero(por_celda < 0)
+    if len(sueltas):
+        vec = _buscar(densas, celdas[sueltas][:, None] + desplaz[None, :])
+        zona_vec = np.where(vec >= 0, comp[np.maximum(vec, 0)], np.iinfo(np.int64).max).min(axis=1)
+        por_celda[sueltas] = np.where(zona_vec == np.iinfo(np.int64).max, -1, zona_vec)
+
+    etiquetas[validas] = por_celda[inversa]
+    return etiquetas
+
+
+@perfilado("clustering.asignar_zonas")
+def asignar_zonas(df: pd.DataFrame, eps_km: float = CLUSTER_EPS_KM,
+                  min_puntos: int = CLUSTER_MIN_PUNTOS) -> pd.DataFrame:
+    """Agrega la columna `zona_cluster` (int, -1 = ruido) a partir de lat/lon."""
+    if not {"lat", "lon"}.issubset(df.columns):
+        return df
+    zonas = zonas_por_densidad(df["lat"].to_numpy(dtype=np.float64, na_value=np.nan),
+                               df["lon"].to_numpy(dtype=np.float64, na_value=np.nan),
+                               eps_km, min_puntos)
+    return df.assign(zona_cluster=zonas)
+
+
+def resumen_por_zona(df: pd.DataFrame, col: str = "zona_cluster") -> pd.DataFrame:
+    """Rollup por zona detectada: lecturas, centroide e IAC/impacto medios (sin el ruido)."""
+    if col not in df.columns:
+        return pd.DataFrame()
+    d = df[df[col] >= 0] if pd.api.types.is_numeric_dtype(df[col]) else df
+    agregados = {"lecturas": ("lat", "size"), "lat": ("lat", "mean"), "lon": ("lon", "mean")}
+    for m in ("iac", "impacto"):
+        if m in d.columns:
+            agregados[m] = (m, "mean")
+    return d.groupby(col, sort=True, observed=True).agg(**agregados).reset_index()
@@ -1,6 +1,13 @@
 """Configuración general y parámetros de visualización (Semana 1)."""
+import os
 from pathlib import Path
 
+import pandas as pd
+
+# Copy-on-write: selecciones y assign() comparten memoria hasta que alguien escribe.
+# Los helpers de utils/plot_layer asumen este modo para no copiar el frame completo.
+pd.set_option("mode.copy_on_write", True)
+
 # Rutas base
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = PROJECT_ROOT / "data"
@@ -18,4 +25,54 @@ IAC_THRESHOLDS = {"high": 70, "mid": 40}  # <40 bajo, 40-69 medio, >=70 alto
 PLOTLY_TEMPLATE = "plotly_white"
 
 #  MAPBOX TOKEN 
-MAPBOX_TOKEN = None  #reemplazar mañana si hace falta
\ No newline at end of file
+MAPBOX_TOKEN = None  #reemplazar mañana si hace falta
+
+# Almacén histórico (SQLite embebido, opcional)
+STORE_DB = DATA_DIR / "urbesense.db"
+# True: el worker ingresa las lecturas válidas al almacén y los agregados del tablero y de la
+# API (riesgo por zona, IAC anual, causas) salen de SQL en vez de pandas sobre el snapshot
+USAR_STORE = False
+GRID_CELL_DEG = 0.01  # tamaño de celda espacial (~1.1 km en lat)
+
+# Zonas detectadas por densidad (ver src/clustering.py)
+CLUSTER_EPS_KM = 0.3        # lado de la celda de la rejilla
+CLUSTER_MIN_PUNTOS = 5      # posiciones distintas para que una celda sea densa
+
+# Zonas oficiales (polígonos municipales, ver src/zones.py); si el archivo no existe no se asignan
+ZONAS_GEOJSON = DATA_DIR / "zonas.geojson"
+ZONAS_PROPIEDAD = "nombre"  # propiedad del Feature que se usa como id de zona
+
+# Superficie interpolada (IDW con k vecinos, ver src/surface.py)
+SUPERFICIE_RESOLUCION = 120   # celdas por lado de la rejilla
+SUPERFICIE_K = 8              # vecinos por celda
+SUPERFICIE_RADIO_KM = 1.5     # celdas más lejos que esto del sensor más cercano quedan vacías
+
+# Detección de anomalías en la ingesta (EWMA por sensor/zona, ver src/anomalies.py)
+ANOMALIA_METRICAS = ("iac", "co2", "ruido", "temperatura")
+ANOMALIA_ALPHA = 0.05          # peso de la lectura nueva en la media/varianza exponencial
+ANOMALIA_Z = 4.0               # |z| a partir del cual la lectura se marca
+ANOMALIA_CALENTAMIENTO = 20    # lecturas previas mínimas por sensor antes de marcar
+
+# Lector de CSV por defecto de load_dataset: "pandas", "pyarrow" o "pipeline" (ver src/data_loader.py)
+CSV_ENGINE = "pandas"
+
+# Ingesta en segundo plano (ver src/ingest_worker.py)
+CACHE_DIR = PROJECT_ROOT / ".cache"
+INGEST_PATTERNS = ("dataset*.csv", "lecturas*.csv", "lecturas*.parquet")
+INGEST_EXCLUIR = ("limpio", "exports")  # carpetas generadas bajo DATA_DIR (salida por defecto del CLI de limpieza)
+INGEST_POLL_SECONDS = 5.0  # respaldo si watchdog no está disponible
+INGEST_ENGINE = "pipeline"  # archivos grandes: lectura por bloques en varios núcleos
+INGEST_ESPERA_INICIAL = 300.0  # s que la app espera el primer snapshot antes de mostrar error
+
+# Servicio HTTP local (ver src/api.py)
+API_HOST = "127.0.0.1"        # solo local: no se expone a la red
+API_PUERTO = 8765
+API_CONCURRENCIA = 4          # consultas calculándose a la vez
+API_COLA = 32                 # consultas esperando turno; más allá se responde 503
+API_CACHE_MB = 64             # respuestas serializadas en memoria (LRU)
+API_MAX_FILAS = 100_000       # tope de filas por respuesta de /lecturas
+API_MAX_RESOLUCION = 300      # tope de celdas por lado en /mapa?tipo=superficie
+
+# Instrumentación (ver src/perf.py)
+PERF_MEMORY = os.environ.get("URBESENSE_PERF_MEM") == "1"  # tracemalloc tiene costo: opt-in
+PERF_HISTORY = 500  # registros recientes que se guardan para el panel
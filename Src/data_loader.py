@@ -1,6 +1,24 @@
 # src/data_loader.py
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+from .sources import resolve_sources, prune_sources, partition_values
+from .units import set_units, CANONICAL_UNITS
+from .sketches import EstadisticasDescribe
+from .timeseries import combinar_fecha_hora
+from .scenarios import impacto_de
+from .config import CSV_ENGINE
+from .perf import perfilado
+
+logger = logging.getLogger(__name__)
+
 # === MAPEO Y LÍMITES ===
 RENAME_MAP = {
     "zona": "nombre",
@@ -22,6 +40,25 @@ LIMITES = {
     "impacto": (0, 100),
 }
 
+NUM_COLS = ("co2", "ruido", "iac", "temperatura", "seguridad", "impacto", "lat", "lon")
+
+# Lectores de CSV: "pandas" (un hilo), "pyarrow" (pyarrow.csv multihilo) y "pipeline"
+# (bloques de pyarrow en streaming; la conversión de tipos de cada bloque corre en un pool
+# mientras pyarrow decodifica los siguientes).
+CSV_ENGINES = ("pandas", "pyarrow", "pipeline")
+_CSV_BLOQUE = 16 << 20  # bytes por bloque del lector de pyarrow
+_HILOS_PIPELINE = max(1, min(4, os.cpu_count() or 1))
+
+# Un bit por regla de validación: clean_dataset puede conservar todas las filas con su
+# máscara (columna `violaciones`) y cambiar de reglas es un AND de bits, sin re-parsear.
+REGLAS_VALIDACION = {
+    "duplicado": 1 << 0,
+    "sin_nombre": 1 << 1,
+    "coordenadas": 1 << 2,
+    **{f"rango_{col}": 1 << (3 + i) for i, col in enumerate(LIMITES)},
+}
+TODAS_LAS_REGLAS = sum(REGLAS_VALIDACION.values())
+
 # === FUNCIONES DE APOYO ===
 def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Limpia encabezados y renombra columnas."""
@@ -34,81 +71,460 @@ def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df.rename(columns=RENAME_MAP)
     return df
 
-def _clasificar_impacto(valor: float) -> str:
-    if pd.isna(valor): return "Desconocido"
-    if valor < 20:   return "Muy bajo"
-    if valor < 40:   return "Bajo"
-    if valor < 60:   return "Moderado"
-    if valor < 80:   return "Alto"
-    return "Muy alto"
+def _clasificar_impacto(impacto: pd.Series) -> np.ndarray:
+    """Nivel por cortes de 20 (<20 Muy bajo ... >=80 Muy alto; NaN Desconocido), vectorizado."""
+    v = impacto.to_numpy(dtype=np.float64, na_value=np.nan)
+    etiquetas = np.array(["Muy bajo", "Bajo", "Moderado", "Alto", "Muy alto", "Desconocido"], dtype=object)
+    idx = np.searchsorted(np.array([20.0, 40.0, 60.0, 80.0]), v, side="right")
+    return etiquetas[np.where(np.isnan(v), 5, idx)]
 
-# === FUNCIÓN PRINCIPAL ===
-def load_dataset(path: str) -> pd.DataFrame:
-    """Carga, limpia y valida el dataset principal de UrbeSense."""
-    # 1) Leer y normalizar encabezados
-    df = pd.read_csv(path, encoding="utf-8")
+def _limites_locales(df: pd.DataFrame, co2_max=None) -> dict:
+    """
+    Construye los límites a aplicar según las unidades detectadas en el df.
+    `co2_max` (máximo del archivo completo, ver read_raw) tiene prioridad sobre el del df,
+    que puede ser solo el subconjunto que dejaron los filtros.
+    """
+    local_limits = LIMITES.copy()
+
+    # Ajuste ADAPTATIVO para CO2:
+    #  - Si el máximo de CO2 > 100, asumimos ppm ambientales: relajamos SOLO el tope superior,
+    #    pero NO subimos el inferior (así no se descartan filas 20–60).
+    if co2_max is None and "co2" in df.columns:
+        co2_max = df["co2"].max(skipna=True)
+    co2_max = pd.to_numeric(co2_max, errors="coerce")
+    if pd.notna(co2_max) and co2_max > 100:
+        local_limits["co2"] = (20, 5000)
+    return local_limits
+
+def _mapa_columnas(nombres) -> dict:
+    """Relaciona nombre normalizado -> nombre original de la fuente."""
+    nombres = list(nombres)
+    normalizados = _normalize_columns(pd.DataFrame(columns=nombres)).columns
+    return dict(zip(normalizados, nombres))
+
+def _columnas_necesarias(columns, fecha_range=None) -> set:
+    """Columnas a leer: proyección pedida + las que necesitan la validación y los filtros."""
+    necesarias = set(columns) | set(LIMITES) | {"nombre", "lat", "lon"}
+    if fecha_range is not None:
+        necesarias.add("fecha")
+    return necesarias
+
+def _max_parquet(path, col):
+    """Máximo de una columna según las estadísticas del Parquet (sin decodificar datos)."""
+    import pyarrow.parquet as pq
+
+    meta = pq.ParquetFile(path).metadata
+    idx = meta.schema.names.index(col)
+    maximos = []
+    for i in range(meta.num_row_groups):
+        stats = meta.row_group(i).column(idx).statistics
+        if stats is None or not stats.has_min_max:
+            return None
+        maximos.append(stats.max)
+    return max(maximos) if maximos else None
+
+def _expresion_parquet(schema, mapa, *, iac_range=None, fecha_range=None, bbox=None, zonas=None, iac_pct=False):
+    """Traduce los predicados a una expresión de pyarrow.dataset sobre los nombres originales."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    expr = None
+    def _and(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+
+    if iac_range is not None and "iac" in mapa:
+        escala = 100.0 if iac_pct else 1.0
+        lo, hi = iac_range
+        if lo is not None: _and(ds.field(mapa["iac"]) >= lo * escala)
+        if hi is not None: _and(ds.field(mapa["iac"]) <= hi * escala)
+    if bbox is not None and {"lat", "lon"}.issubset(mapa):
+        lon_min, lat_min, lon_max, lat_max = bbox
+        _and((ds.field(mapa["lon"]) >= lon_min) & (ds.field(mapa["lon"]) <= lon_max))
+        _and((ds.field(mapa["lat"]) >= lat_min) & (ds.field(mapa["lat"]) <= lat_max))
+    if fecha_range is not None and "fecha" in mapa:
+        tipo = schema.field(mapa["fecha"]).type
+        for limite, op in zip(fecha_range, ("ge", "le")):
+            if limite is None:
+                continue
+            valor = pd.to_datetime(limite)
+            if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+                valor = pa.scalar(valor.strftime("%Y-%m-%d"))
+            elif pa.types.is_date(tipo):
+                valor = pa.scalar(valor.date(), type=tipo)
+            elif pa.types.is_timestamp(tipo):
+                valor = pa.scalar(valor, type=tipo)
+            else:
+                continue  # tipo inesperado: se filtra por fila después
+            campo = ds.field(mapa["fecha"])
+            _and(campo >= valor if op == "ge" else campo <= valor)
+    if zonas and "nombre" in mapa:
+        _and(ds.field(mapa["nombre"]).isin(list(zonas)))
+    return expr
+
+# === LECTURA DE CSV ===
+def _opciones_arrow(mapa: dict, usecols, como_texto):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    # fecha/hora como texto (igual que pandas), más las columnas cuya inferencia falló
+    tipos = {orig: pa.string() for norm, orig in mapa.items() if norm in ("fecha", "hora")}
+    tipos.update({orig: pa.string() for orig in como_texto})
+    return (pacsv.ReadOptions(block_size=_CSV_BLOQUE, use_threads=True),
+            # Textos vacíos/"NA" como nulos, igual que pandas (nombre vacío = sin nombre)
+            pacsv.ConvertOptions(include_columns=usecols, column_types=tipos, strings_can_be_null=True))
+
+def _preparar_bloque(lote, path) -> pd.DataFrame:
+    """Etapa por bloque del pipeline: a pandas, encabezados y tipos (la escala de IAC se decide al final)."""
+    df, _ = _normalizar_tipos(lote.to_pandas(), path, iac_pct=False)
+    return df
+
+def _leer_csv_arrow(path, mapa: dict, usecols, engine: str, como_texto) -> pd.DataFrame:
+    import pyarrow.csv as pacsv
+
+    lectura, conversion = _opciones_arrow(mapa, usecols, como_texto)
+    if engine == "pyarrow":
+        return pacsv.read_csv(str(path), read_options=lectura, convert_options=conversion).to_pandas()
+    lector = pacsv.open_csv(str(path), read_options=lectura, convert_options=conversion)
+    partes, en_vuelo = [], deque()
+    with ThreadPoolExecutor(max_workers=_HILOS_PIPELINE) as pool:
+        for lote in lector:
+            en_vuelo.append(pool.submit(_preparar_bloque, lote, path))
+            # Pocos bloques en vuelo: la memoria queda acotada aunque el archivo pese GB
+            if len(en_vuelo) > 2 * _HILOS_PIPELINE:
+                partes.append(en_vuelo.popleft().result())
+        partes.extend(f.result() for f in en_vuelo)
+    if not partes:
+        return lector.schema.empty_table().to_pandas()
+    return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+
+def _leer_csv(path, usecols, engine: str) -> pd.DataFrame:
+    """CSV crudo con el lector elegido (ver CSV_ENGINES)."""
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"engine debe ser uno de {CSV_ENGINES}, no {engine!r}")
+    if engine == "pandas":
+        return pd.read_csv(path, encoding="utf-8", usecols=usecols)
+    import pyarrow as pa
+
+    encabezado = list(pd.read_csv(path, encoding="utf-8", nrows=0).columns)
+    mapa = _mapa_columnas(encabezado)
+    como_texto = set()
+    while True:
+        try:
+            return _leer_csv_arrow(path, mapa, usecols, engine, como_texto)
+        except pa.ArrowInvalid as e:
+            # El lector en streaming infiere los tipos con el primer bloque: si uno posterior
+            # trae texto en una columna numérica, esa columna se relee como texto y
+            # to_numeric la coerciona (como hace pandas)
+            m = re.search(r"CSV column #(\d+)", str(e))
+            col = encabezado[int(m.group(1))] if m and int(m.group(1)) < len(encabezado) else None
+            if col is None or col in como_texto:
+                raise
+            logger.debug("Inferencia de tipos de pyarrow falló en %s (%s); releyendo como texto", path, col)
+            como_texto.add(col)
+
+# === ETAPAS DEL PIPELINE ===
+@perfilado("loader.read_raw")
+def read_raw(path: str, *, columns=None, iac_range=None, fecha_range=None, bbox=None, zonas=None,
+             engine: str = CSV_ENGINE) -> pd.DataFrame:
+    """
+    Lee un CSV/Parquet, normaliza encabezados, tipos numéricos y escala de IAC (sin descartar filas).
+    Con `columns` solo se decodifican esas columnas (más las que usan límites y filtros; no
+    alcanza para detectar duplicados: load_dataset lee siempre filas completas); en Parquet
+    los predicados se empujan al lector de pyarrow y en CSV se aplican justo tras el parseo.
+    `engine` elige el lector de CSV (ver CSV_ENGINES); Parquet siempre usa pyarrow.
+    El máximo de CO2 del archivo sin filtrar queda en df.attrs["co2_max"]: clean_dataset decide
+    con él el límite adaptativo, igual que sin filtros. En Parquet sale de las estadísticas;
+    si el archivo no las trae y hay filtros, se usa el de las filas leídas.
+    """
+    es_parquet = Path(path).suffix.lower() == ".parquet"
+
+    # 1) Leer (con proyección/predicados) y normalizar encabezados
+    if es_parquet:
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(str(path), format="parquet")
+        mapa = _mapa_columnas(dataset.schema.names)
+        leer = None
+        if columns is not None:
+            necesarias = _columnas_necesarias(columns, fecha_range)
+            leer = [orig for norm, orig in mapa.items() if norm in necesarias]
+        # La escala de IAC y el límite de CO2 se deciden con las estadísticas del archivo,
+        # no con las filas filtradas
+        co2_max = _max_parquet(path, mapa["co2"]) if "co2" in mapa else None
+        iac_pct, iac_push = None, iac_range
+        if "iac" in mapa:
+            iac_max = _max_parquet(path, mapa["iac"])
+            if iac_max is not None:
+                iac_pct = iac_max > 1.0
+            else:
+                iac_push = None  # sin estadísticas: el rango de IAC se aplica por fila
+        filtro = _expresion_parquet(
+            dataset.schema, mapa, iac_range=iac_push, fecha_range=fecha_range,
+            bbox=bbox, zonas=zonas, iac_pct=bool(iac_pct),
+        )
+        df = dataset.to_table(columns=leer, filter=filtro).to_pandas()
+    else:
+        iac_pct, usecols = None, None
+        if columns is not None:
+            encabezado = pd.read_csv(path, encoding="utf-8", nrows=0).columns
+            mapa = _mapa_columnas(encabezado)
+            necesarias = _columnas_necesarias(columns, fecha_range)
+            usecols = [orig for norm, orig in mapa.items() if norm in necesarias]
+        df = _leer_csv(path, usecols, engine)
+        co2_max = None
+    df, _ = _normalizar_tipos(df, path, iac_pct)
+    if co2_max is None and "co2" in df.columns:
+        co2_max = df["co2"].max(skipna=True)  # antes de filtrar: todo el archivo
+
+    # 4) Predicados por fila (lo que no se pudo empujar al lector)
+    df = _filtrar_filas(df, fecha_range=fecha_range, zonas=zonas, iac_range=iac_range, bbox=bbox)
+    df.attrs["co2_max"] = co2_max
+    return df
+
+def _normalizar_tipos(df: pd.DataFrame, path, iac_pct=None):
+    """Encabezados, particiones Hive, tipos numéricos y escala de IAC. Devuelve (df, iac_pct)."""
     df = _normalize_columns(df)
 
+    # 1.1) Columnas de partición Hive (fecha=..., zona=...) que no vengan en el archivo
+    for col, valor in partition_values(path).items():
+        if col not in df.columns:
+            df[col] = valor
 
     # 2) Conversión de tipos numéricos
-    num_cols = ["co2", "ruido", "iac", "temperatura", "seguridad", "impacto", "lat", "lon"]
-    for c in num_cols:
+    for c in NUM_COLS:
         if c in df.columns:
             df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    # 3) *** Compatibilidad + límites adaptativos ***
-    # 3.1) Normaliza IAC si venía en porcentaje (0–100) a 0–1
+    # 3) Compatibilidad: normaliza IAC si venía en porcentaje (0–100) a 0–1.
+    #    Es el ÚNICO lugar donde se decide la escala; el resto lee df.attrs["unidades"].
     if "iac" in df.columns:
-        try:
-            if pd.to_numeric(df["iac"], errors="coerce").max(skipna=True) > 1.0:
-                df["iac"] = df["iac"] / 100.0
-        except Exception:
-            pass
+        if iac_pct is None and df["iac"].notna().any():
+            iac_pct = bool(df["iac"].max(skipna=True) > 1.0)
+        if iac_pct:
+            df["iac"] = df["iac"] / 100.0
+    return df, iac_pct
 
-    # 3.2) Construye límites locales a partir de LIMITES
-    local_limits = LIMITES.copy()
+# === MÁSCARA DE VIOLACIONES ===
+def _bits_rango(df: pd.DataFrame, limites: dict) -> np.ndarray:
+    bits = np.zeros(len(df), dtype=np.uint16)
+    for col, (mn, mx) in limites.items():
+        if col in df.columns:
+            # NaN también viola el rango (como el filtro >= / <= de siempre)
+            bits[~df[col].between(mn, mx).to_numpy(dtype=bool)] |= REGLAS_VALIDACION[f"rango_{col}"]
+    return bits
 
-    # 3.3) Ajuste ADAPTATIVO para CO2:
-    #      - Si el máximo de CO2 > 100, asumimos ppm ambientales: relajamos SOLO el tope superior,
-    #        pero NO subimos el inferior (así no se descartan filas 20–60).
-    if "co2" in df.columns:
-        co2_num = pd.to_numeric(df["co2"], errors="coerce")
-        co2_max = co2_num.max(skipna=True)
-        if pd.notna(co2_max) and co2_max > 100:
-            local_limits["co2"] = (20, 5000)
-    
-    # 4) Limpieza básica
-    df = df.drop_duplicates()
-    df = df.dropna(subset=["nombre"])
-    #DIAGNOSTICO 4
-    print(f"[DL] After drops: {df.shape}")
-
-    # 5) Cálculo de impacto si no está
-    if "impacto" not in df.columns and {"iac", "seguridad"}.issubset(df.columns):
-        df["impacto"] = (1 - ((df["iac"] + df["seguridad"]) / 2)) * 100
+def calcular_violaciones(df: pd.DataFrame, limites: dict | None = None) -> np.ndarray:
+    """Máscara uint16 por fila con un bit por regla violada (0 = fila válida)."""
+    bits = _bits_rango(df, _limites_locales(df) if limites is None else limites)
+    bits[df.duplicated().to_numpy()] |= REGLAS_VALIDACION["duplicado"]
+    if "nombre" in df.columns:
+        bits[df["nombre"].isna().to_numpy()] |= REGLAS_VALIDACION["sin_nombre"]
+    else:
+        bits |= REGLAS_VALIDACION["sin_nombre"]
+    if {"lat", "lon"}.issubset(df.columns):
+        ok = df["lat"].between(-90, 90) & df["lon"].between(-180, 180)
+        bits[~ok.to_numpy(dtype=bool)] |= REGLAS_VALIDACION["coordenadas"]
+    return bits
 
-    # 6) Clasificación de nivel_impacto si no está
-    if "nivel_impacto" not in df.columns and "impacto" in df.columns:
-        df["nivel_impacto"] = df["impacto"].apply(_clasificar_impacto)
-    
+def mascara_reglas(reglas=None) -> int:
+    """Bits de las reglas activas (None = todas)."""
+    if reglas is None:
+        return TODAS_LAS_REGLAS
+    return sum(REGLAS_VALIDACION[r] for r in set(reglas))
 
-    # 7) Validación de límites numéricos (usa local_limits)
-    for col, (mn, mx) in local_limits.items():
-        if col in df.columns:
-            df = df[(df[col] >= mn) & (df[col] <= mx)]
-    
+def filas_validas(df: pd.DataFrame, reglas=None) -> pd.DataFrame:
+    """Filas que cumplen las reglas activas. Si las válidas van primero (snapshot) es un slice sin copia."""
+    if "violaciones" not in df.columns:
+        return df
+    ok = (df["violaciones"].to_numpy() & mascara_reglas(reglas)) == 0
+    n = int(ok.sum())
+    if ok[:n].all():
+        return df.iloc[:n]
+    return df[ok]
 
+def motivos(bits) -> list:
+    """Nombres de las reglas violadas por una máscara."""
+    return [r for r, b in REGLAS_VALIDACION.items() if int(bits) & b]
 
-    # 8) Validación de coordenadas
-    if {"lat", "lon"}.issubset(df.columns):
-        df = df.dropna(subset=["lat", "lon"])
-        df = df[(df["lat"].between(-90, 90)) & (df["lon"].between(-180, 180))]
-     
+def rechazos(df: pd.DataFrame, reglas=None) -> pd.DataFrame:
+    """Filas rechazadas por las reglas activas, con la columna `motivos` legible."""
+    if "violaciones" not in df.columns:
+        return df.iloc[:0]
+    bits = df["violaciones"].to_numpy() & mascara_reglas(reglas)
+    fuera = df[bits != 0]
+    # Pocas combinaciones distintas: se traduce cada máscara única una sola vez
+    codigos, unicos = pd.factorize(bits[bits != 0])
+    textos = np.array([", ".join(motivos(u)) for u in unicos], dtype=object)
+    return fuera.assign(motivos=textos[codigos] if len(unicos) else [])
+
+def revalidar(df: pd.DataFrame, limites: dict) -> pd.DataFrame:
+    """Recalcula solo los bits de rango con otros límites sobre filas ya parseadas."""
+    bits_rango = sum(b for r, b in REGLAS_VALIDACION.items() if r.startswith("rango_"))
+    previos = df["violaciones"].to_numpy() & np.uint16(TODAS_LAS_REGLAS - bits_rango)
+    return df.assign(violaciones=previos | _bits_rango(df, limites))
+
+@perfilado("loader.clean_dataset")
+def clean_dataset(df: pd.DataFrame, conservar_rechazos: bool = False, limites: dict | None = None) -> pd.DataFrame:
+    """
+    Limpia y valida un df ya normalizado por read_raw. Con `conservar_rechazos=True` no
+    descarta filas: agrega `violaciones` (ver REGLAS_VALIDACION) y deja las válidas primero.
+    `limites` sustituye a los calculados del propio df (ej. decididos antes de filtrar).
+    """
+    local_limits = _limites_locales(df, df.attrs.get("co2_max")) if limites is None else limites
+
+    # 4) Duplicados, nombre, límites numéricos (local_limits) y coordenadas: un bit por regla
+    bits = calcular_violaciones(df, local_limits)
+
+    # 5) Cálculo de impacto si no está (su rango también es una regla)
+    if "impacto" not in df.columns and {"iac", "seguridad"}.issubset(df.columns):
+        df = df.assign(impacto=impacto_de(df["iac"], df["seguridad"]))
+        bits |= _bits_rango(df, {"impacto": local_limits["impacto"]})
+
+    if conservar_rechazos:
+        orden = np.argsort(bits != 0, kind="stable")
+        df = df.iloc[orden].assign(violaciones=bits[orden])
+    else:
+        df = df[bits == 0]
+    #DIAGNOSTICO 4 (filas por etapa: ver src/perf.py)
+    logger.debug("After validation: %s", df.shape)
+
+    # 6) Clasificación de nivel_impacto si no está
+    if "nivel_impacto" not in df.columns and "impacto" in df.columns:
+        df["nivel_impacto"] = _clasificar_impacto(df["impacto"])
 
     # 9) Orden recomendado
     order = ["nombre", "iac", "seguridad", "impacto", "nivel_impacto",
              "co2", "ruido", "temperatura", "lat", "lon"]
     df = df[[c for c in order if c in df.columns] + [c for c in df.columns if c not in order]]
 
-    return df.reset_index(drop=True)
+    # 9.1) Timestamp de la lectura (fecha + hora) para las series de tiempo: se parsea aquí una vez
+    if "fecha" in df.columns:
+        df["ts"] = combinar_fecha_hora(df["fecha"], df["hora"] if "hora" in df.columns else None)
+
+    # 10) Metadata de unidades canónicas (IAC 0–1, impacto 0–100, ...)
+    df = set_units(df.reset_index(drop=True), CANONICAL_UNITS)
+    df.attrs.pop("co2_max", None)  # ya se aplicó; no debe viajar a partes ni snapshots
+    return df
+
+@perfilado("loader.resumen_validacion")
+def resumen_validacion(df: pd.DataFrame) -> dict:
+    """
+    Cuenta problemas por regla (no descarta nada). Sobre un df de read_raw calcula la
+    máscara; si ya trae `violaciones` (clean_dataset con conservar_rechazos) solo cuenta bits.
+    """
+    bits = df["violaciones"].to_numpy() if "violaciones" in df.columns else calcular_violaciones(df)
+    def _cuenta(regla):
+        return int(np.count_nonzero(bits & REGLAS_VALIDACION[regla]))
+    resumen = {
+        "filas": int(len(df)),
+        "duplicados": _cuenta("duplicado"),
+        "sin_nombre": _cuenta("sin_nombre"),
+        "fuera_de_rango": {col: _cuenta(f"rango_{col}") for col in LIMITES if col in df.columns},
+    }
+    if {"lat", "lon"}.issubset(df.columns):
+        resumen["coordenadas_invalidas"] = _cuenta("coordenadas")
+    return resumen
+
+def _filtrar_filas(df: pd.DataFrame, *, fecha_range=None, zonas=None, iac_range=None, bbox=None) -> pd.DataFrame:
+    """Filtro por fila para lo que la poda por partición y el lector no pudieron descartar."""
+    mask = pd.Series(True, index=df.index)
+    if fecha_range is not None and "fecha" in df.columns:
+        fechas = pd.to_datetime(df["fecha"], errors="coerce")
+        fmin, fmax = fecha_range
+        if fmin is not None:
+            mask &= fechas >= pd.to_datetime(fmin)
+        if fmax is not None:
+            mask &= fechas <= pd.to_datetime(fmax)
+    if zonas and "nombre" in df.columns:
+        mask &= df["nombre"].isin(list(zonas))
+    if iac_range is not None and "iac" in df.columns:
+        lo, hi = iac_range
+        if lo is not None: mask &= df["iac"] >= lo
+        if hi is not None: mask &= df["iac"] <= hi
+    if bbox is not None and {"lat", "lon"}.issubset(df.columns):
+        lon_min, lat_min, lon_max, lat_max = bbox
+        mask &= df["lon"].between(lon_min, lon_max) & df["lat"].between(lat_min, lat_max)
+    return df if mask.all() else df[mask]
+
+# === LECTURA POR CHUNKS ===
+def _chunks_crudos(path, chunksize: int):
+    """Chunks del archivo sin normalizar (todas las columnas); en Parquet se itera por lotes de pyarrow."""
+    if Path(path).suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
 
+        for lote in pq.ParquetFile(str(path)).iter_batches(batch_size=chunksize):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(path, encoding="utf-8", chunksize=chunksize)
+
+def iter_dataset(path: str, *, chunksize: int = 200_000, columns=None, fecha_range=None, zonas=None):
+    """
+    Versión en streaming de load_dataset: produce DataFrames limpios de hasta `chunksize`
+    filas sin materializar el dataset completo (para resúmenes y exportaciones grandes).
+    Cada archivo se limpia con su propio esquema (como el worker de ingesta). La escala de
+    IAC se decide una vez por archivo (estadísticas del Parquet o primer chunk con datos);
+    los duplicados y el límite adaptativo de CO2 se evalúan dentro de cada chunk (este último
+    antes de aplicar los filtros). `columns` se aplica después de limpiar, como en load_dataset.
+    """
+    archivos = prune_sources(resolve_sources(path), fecha_range=fecha_range, zonas=zonas)
+    for f in archivos:
+        iac_pct = None
+        if Path(f).suffix.lower() == ".parquet":
+            import pyarrow.parquet as pq
+
+            mapa = _mapa_columnas(pq.ParquetFile(str(f)).schema_arrow.names)
+            if "iac" in mapa:
+                iac_max = _max_parquet(f, mapa["iac"])
+                iac_pct = None if iac_max is None else iac_max > 1.0
+        for crudo in _chunks_crudos(f, chunksize):
+            df, iac_pct = _normalizar_tipos(crudo, f, iac_pct)
+            limites = _limites_locales(df)
+            df = clean_dataset(_filtrar_filas(df, fecha_range=fecha_range, zonas=zonas), limites=limites)
+            if columns is not None:
+                df = df[[c for c in columns if c in df.columns]]
+            if len(df):
+                yield df
+
+def estadisticas_dataset(path: str, *, chunksize: int = 200_000, **filtros) -> EstadisticasDescribe:
+    """Acumulador tipo describe() del dataset limpio, alimentado chunk a chunk."""
+    return EstadisticasDescribe.from_chunks(iter_dataset(path, chunksize=chunksize, **filtros))
+
+# === FUNCIÓN PRINCIPAL ===
+@perfilado("loader.load_dataset")
+def load_dataset(path: str, *, columns=None, fecha_range=None, zonas=None, iac_range=None, bbox=None,
+                 conservar_rechazos: bool = False, engine: str = CSV_ENGINE) -> pd.DataFrame:
+    """
+    Carga, limpia y valida el dataset principal de UrbeSense.
+    `path` puede ser un archivo, una carpeta, un glob o un dataset Parquet particionado
+    (ej. data/lecturas/fecha=2025-10-15/). Con `fecha_range=(min, max)` y/o `zonas`
+    solo se leen las particiones que pueden contener esas filas.
+
+    Pushdown:
+    - `columns`: proyección final, aplicada después de validar. Un duplicado es una fila
+      completa repetida, así que se leen todas las columnas: proyectar no cambia qué filas vuelven.
+    - `iac_range=(min, max)` en escala 0–1, `bbox=(lon_min, lat_min, lon_max, lat_max)`
+      (orden GeoJSON), `fecha_range` y `zonas`: en Parquet van como filtros de pyarrow.dataset.
+    Con `conservar_rechazos=True` vuelven todas las filas parseadas con su máscara
+    `violaciones` (ver filas_validas / rechazos / revalidar).
+    `engine` ("pandas", "pyarrow", "pipeline") elige el lector de CSV; los dos de pyarrow
+    usan varios núcleos. La validación corre una vez sobre todo el archivo: duplicados,
+    límite adaptativo de CO2 y escala de IAC necesitan verlo completo.
+    """
+    archivos = prune_sources(resolve_sources(path), fecha_range=fecha_range, zonas=zonas)
+    partes = [
+        read_raw(f, iac_range=iac_range, fecha_range=fecha_range, bbox=bbox, zonas=zonas, engine=engine)
+        for f in archivos
+    ]
+    if not partes:
+        df = clean_dataset(pd.DataFrame(columns=["nombre"]), conservar_rechazos)
+    else:
+        # Límite de CO2 con el máximo de los archivos completos, no de las filas filtradas
+        co2_max = pd.to_numeric(pd.Series([p.attrs.get("co2_max") for p in partes], dtype=object),
+                                errors="coerce").max()
+        crudo = partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+        df = clean_dataset(crudo, conservar_rechazos, limites=_limites_locales(crudo, co2_max))
+    if columns is not None:
+        extra = ["violaciones"] if conservar_rechazos else []
+        df = df[[c for c in [*columns, *extra] if c in df.columns]]
+    return df
@@ -1,7 +1,17 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 import random
 from datetime import datetime
 
+# Raíz del proyecto en sys.path para usar el paquete src (este script vive dentro de src/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.scenarios import impacto_de
+
 zonas= ["Zona 1", "Zona 2", "Zona 3", "Zona 4" , "Zona 5"]
 
 data = []
@@ -11,7 +21,7 @@ for zona in zonas:
     IAC = round(random.uniform(0.2, 1.0), 2)
     temperatura = random.randint(15, 35)  # °C
     seguridad=round(random.uniform(0.2, 1.0), 2)
-    impacto=round((1-((IAC+seguridad)/2))*100, 2)
+    impacto=round(impacto_de(IAC, seguridad), 2)
 
     data.append([zona, CO2, ruido, IAC, temperatura, seguridad, impacto])
 #Dataframe
@@ -0,0 +1,143 @@
+# src/export.py
+"""
+Exportación del dataset procesado bajo demanda, en streaming y con caché en disco.
+
+- `exportar(fuente, formato, version)`: escribe el archivo por chunks (un DataFrame se
+  recorre por rebanadas; también acepta un iterable de chunks, p. ej. data_loader.iter_dataset)
+  y lo deja en CACHE_DIR/exports con la versión en el nombre. Si ya existe, no se vuelve a
+  serializar: los reruns solo abren el archivo.
+- Formatos: Parquet (un row group por chunk) y CSV plano, gzip o zstd.
+- `leer_por_bloques(path)`: bytes en bloques para servir el archivo sin cargarlo entero.
+"""
+import gzip
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from .config import CACHE_DIR
+from .perf import perfilado
+
+EXPORT_DIR = CACHE_DIR / "exports"
+CHUNK_FILAS = 100_000
+_EXPORTS_A_CONSERVAR = 8
+_NIVEL_GZIP = 1  # prioriza velocidad (~4x más rápido que 6, ~13% más grande); zstd comprime mejor
+
+# formato -> (extensión, MIME, compresión de pyarrow para CSV)
+FORMATOS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet", None),
+    "csv": (".csv", "text/csv", None),
+    "csv.gz": (".csv.gz", "application/gzip", "gzip"),
+    "csv.zst": (".csv.zst", "application/zstd", "zstd"),
+}
+
+
+def clave_version(*partes) -> str:
+    """Versión corta y estable a partir de lo que determina el contenido (firma, umbrales...)."""
+    return hashlib.sha1(repr(partes).encode("utf-8")).hexdigest()[:12]
+
+
+def ruta_export(version, formato: str, nombre: str = "dataset_procesado", destino=EXPORT_DIR) -> Path:
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato!r} (usa {list(FORMATOS)})")
+    return Path(destino) / f"{nombre}-{version}{FORMATOS[formato][0]}"
+
+
+def _chunks(fuente, chunk_filas: int):
+    if isinstance(fuente, pd.DataFrame):
+        for i in range(0, max(len(fuente), 1), chunk_filas):
+            yield fuente.iloc[i:i + chunk_filas]
+    else:
+        yield from fuente
+
+
+def _escribir_parquet(chunks, tmp: Path) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = esquema = None
+    try:
+        for chunk in chunks:
+            # Los chunks siguientes se ajustan al esquema del primero
+            tabla = pa.Table.from_pandas(chunk, schema=esquema, preserve_index=False)
+            if writer is None:
+                esquema = tabla.schema
+                writer = pq.ParquetWriter(str(tmp), esquema, compression="zstd")
+            writer.write_table(tabla)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _abrir_salida(tmp: Path, compresion: str | None):
+    import pyarrow as pa
+
+    if compresion == "gzip":  # pyarrow no deja elegir el nivel de gzip
+        return gzip.open(tmp, "wb", compresslevel=_NIVEL_GZIP)
+    archivo = pa.OSFile(str(tmp), "wb")
+    return pa.CompressedOutputStream(archivo, compresion) if compresion else archivo
+
+
+def _escribir_csv(chunks, tmp: Path, compresion: str | None) -> None:
+    """
+    CSV con df.to_csv por chunk (mismo formato que siempre: comillas, True/False, fechas),
+    comprimido en streaming. El escritor de pyarrow es más rápido pero cambia el formato.
+    """
+    with _abrir_salida(tmp, compresion) as salida:
+        texto = io.TextIOWrapper(salida, encoding="utf-8", newline="")
+        encabezado = True
+        for chunk in chunks:
+            chunk.to_csv(texto, index=False, header=encabezado)
+            encabezado = False
+        texto.flush()
+        texto.detach()  # el cierre lo hace el with (cierra el stream comprimido)
+
+
+def _limpiar_viejos(destino: Path) -> None:
+    """Conserva los exports más recientes; los de versiones viejas se borran."""
+    archivos = sorted((f for f in destino.glob("*-*.*") if f.is_file() and not f.name.startswith(".")),
+                      key=lambda f: f.stat().st_mtime)
+    for f in archivos[:-_EXPORTS_A_CONSERVAR]:
+        try:
+            f.unlink()
+        except OSError:
+            pass  # Windows: aún abierto por una descarga
+
+
+@perfilado("export.exportar")
+def exportar(fuente, formato: str, version, nombre: str = "dataset_procesado",
+             destino=EXPORT_DIR, chunk_filas: int = CHUNK_FILAS) -> Path:
+    """Ruta del archivo exportado para esa versión; lo escribe por chunks solo si no existe."""
+    ruta = ruta_export(version, formato, nombre, destino)
+    if ruta.exists():
+        return ruta
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(f".{ruta.name}.{os.getpid()}.tmp")
+    chunks = _chunks(fuente, chunk_filas)
+    try:
+        if formato == "parquet":
+            _escribir_parquet(chunks, tmp)
+        else:
+            _escribir_csv(chunks, tmp, FORMATOS[formato][2])
+        os.replace(tmp, ruta)  # nunca se sirve un archivo a medio escribir
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    _limpiar_viejos(ruta.parent)
+    return ruta
+
+
+def mime_de(formato: str) -> str:
+    return FORMATOS[formato][1]
+
+
+def leer_por_bloques(path, tamano: int = 1 << 20):
+    """Genera el contenido del archivo en bloques de `tamano` bytes."""
+    with open(path, "rb") as f:
+        while True:
+            bloque = f.read(tamano)
+            if not bloque:
+                break
+            yield bloque
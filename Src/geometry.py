@@ -0,0 +1,155 @@
+# src/geometry.py
+"""
+Geometría vectorizada sobre lat/lon (grados) para análisis entre sensores/zonas.
+
+- `haversine_km`: distancia con broadcasting de numpy (escalares o arrays).
+- `bloques_distancia` / `matriz_distancias`: todas contra todas por bloques (tiles).
+- `vecino_mas_cercano`, `dentro_de_radio`, `pares_en_radio`: consultas por bloques;
+  la memoria queda acotada a bloque×bloque aunque haya 100k sensores por lado.
+Las consultas por radio agrupan los puntos en una rejilla de celdas del tamaño del
+radio y solo comparan celdas vecinas, así que el costo real es ~ N × vecinos, no N².
+"""
+import numpy as np
+import pandas as pd
+
+RADIO_TIERRA_KM = 6371.0088
+BLOQUE = 2048  # 2048×2048 float64 = 32 MB por tile
+
+
+def _radianes(lat, lon):
+    return np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia de gran círculo en km; acepta escalares o arrays compatibles por broadcasting."""
+    lat1, lon1 = _radianes(lat1, lon1)
+    lat2, lon2 = _radianes(lat2, lon2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _distancia_rad(la1, lo1, cos1, la2, lo2, cos2) -> np.ndarray:
+    """Haversine sobre radianes con cos(lat) precalculado (elemento a elemento o por broadcasting)."""
+    a = np.sin((la2 - la1) / 2) ** 2 + cos1 * cos2 * np.sin((lo2 - lo1) / 2) ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(a, out=a), out=a)
+
+
+def _tile(la1, lo1, cos1, la2, lo2, cos2) -> np.ndarray:
+    """Distancias (len1 × len2) entre dos bloques ya en radianes."""
+    return _distancia_rad(la1[:, None], lo1[:, None], cos1[:, None], la2[None, :], lo2[None, :], cos2[None, :])
+
+
+def _puntos(lat, lon):
+    la, lo = _radianes(lat, lon)
+    return la.ravel(), lo.ravel(), np.cos(la.ravel())
+
+
+def bloques_distancia(lat, lon, lat2=None, lon2=None, bloque: int = BLOQUE):
+    """Genera (i0, j0, tile) recorriendo la matriz de distancias por bloques, sin materializarla."""
+    a = _puntos(lat, lon)
+    b = a if lat2 is None else _puntos(lat2, lon2)
+    for i0 in range(0, len(a[0]), bloque):
+        qa = tuple(x[i0:i0 + bloque] for x in a)
+        for j0 in range(0, len(b[0]), bloque):
+            yield i0, j0, _tile(*qa, *(x[j0:j0 + bloque] for x in b))
+
+
+def matriz_distancias(lat, lon, lat2=None, lon2=None, bloque: int = BLOQUE, dtype=np.float32) -> np.ndarray:
+    """Matriz completa N×M en km (float32 por defecto). Solo para N·M que quepa en memoria."""
+    n = len(np.ravel(lat))
+    m = n if lat2 is None else len(np.ravel(lat2))
+    out = np.empty((n, m), dtype=dtype)
+    for i0, j0, t in bloques_distancia(lat, lon, lat2, lon2, bloque):
+        out[i0:i0 + t.shape[0], j0:j0 + t.shape[1]] = t
+    return out
+
+
+def vecino_mas_cercano(lat, lon, lat_ref, lon_ref, bloque: int = BLOQUE, excluir_mismo: bool = False):
+    """
+    Para cada punto, índice del punto de referencia más cercano y su distancia en km.
+    Con `excluir_mismo=True` (mismas listas en ambos lados) no se cuenta a sí mismo.
+    Tiempo O(N·M) pero memoria O(bloque²).
+    """
+    a, b = _puntos(lat, lon), _puntos(lat_ref, lon_ref)
+    n = len(a[0])
+    idx = np.full(n, -1, dtype=np.int64)
+    dist = np.full(n, np.inf)
+    for i0 in range(0, n, bloque):
+        qa = tuple(x[i0:i0 + bloque] for x in a)
+        filas = np.arange(i0, i0 + len(qa[0]))
+        for j0 in range(0, len(b[0]), bloque):
+            t = _tile(*qa, *(x[j0:j0 + bloque] for x in b))
+            if excluir_mismo:
+                cols = np.arange(j0, j0 + t.shape[1])
+                t[filas[:, None] == cols[None, :]] = np.inf
+            j = t.argmin(axis=1)
+            d = t[np.arange(len(j)), j]
+            mejor = d < dist[i0:i0 + len(j)]
+            idx[i0:i0 + len(j)][mejor] = j[mejor] + j0
+            dist[i0:i0 + len(j)][mejor] = d[mejor]
+    return idx, dist
+
+
+def _en_radio(lat, lon, lat_ref, lon_ref, radio_km: float, bloque: int):
+    """
+    Genera (i, j, km) con distancia <= radio. Rejilla de celdas del tamaño del radio:
+    cada punto solo se compara con las referencias de su celda y las 8 vecinas, y los
+    candidatos se expanden en lotes de a lo más bloque² pares. No cruza el antimeridiano.
+    """
+    a, b = _puntos(lat, lon), _puntos(lat_ref, lon_ref)
+    if not len(a[0]) or not len(b[0]):
+        return
+    alto = max(radio_km / RADIO_TIERRA_KM, 1e-12)  # radianes de latitud equivalentes al radio
+    lat_max = min(max(np.abs(a[0]).max(), np.abs(b[0]).max()) + alto, np.pi / 2)
+    ancho = alto / max(np.cos(lat_max), 1e-9)     # en longitud la celda crece con la latitud
+    fila_a, fila_b = np.floor(a[0] / alto).astype(np.int64), np.floor(b[0] / alto).astype(np.int64)
+    col_a, col_b = np.floor(a[1] / ancho).astype(np.int64), np.floor(b[1] / ancho).astype(np.int64)
+    col0 = min(col_a.min(), col_b.min()) - 1
+    ancho_clave = max(col_a.max(), col_b.max()) - col0 + 2
+    clave_b = (fila_b * ancho_clave) + (col_b - col0)
+    orden_b = np.argsort(clave_b, kind="stable")
+    clave_b = clave_b[orden_b]
+    clave_a = (fila_a * ancho_clave) + (col_a - col0)
+    tope = bloque * bloque
+
+    for d_fila in (-1, 0, 1):
+        # Las celdas (fila+d_fila, col-1..col+1) son contiguas en la clave ordenada
+        centro = clave_a + d_fila * ancho_clave
+        ini = np.searchsorted(clave_b, centro - 1, side="left")
+        fin = np.searchsorted(clave_b, centro + 1, side="right")
+        cuenta = fin - ini
+        acumulado = np.cumsum(cuenta)
+        if not acumulado[-1]:
+            continue  # ninguna referencia en esta franja de celdas
+        cortes = np.searchsorted(acumulado, np.arange(tope, acumulado[-1], tope, dtype=np.int64), side="right")
+        for q0, q1 in zip(np.r_[0, cortes], np.r_[cortes, len(cuenta)]):
+            c = cuenta[q0:q1]
+            total = int(c.sum())
+            if not total:
+                continue
+            qi = np.repeat(np.arange(q0, q1), c)
+            desde = np.repeat(ini[q0:q1] - (np.cumsum(c) - c), c)
+            rj = orden_b[desde + np.arange(total)]
+            km = _distancia_rad(*(x[qi] for x in a), *(x[rj] for x in b))
+            ok = km <= radio_km
+            if ok.any():
+                yield qi[ok], rj[ok], km[ok]
+
+
+def dentro_de_radio(lat, lon, lat_ref, lon_ref, radio_km: float, bloque: int = BLOQUE) -> np.ndarray:
+    """Máscara: True si el punto está a <= radio_km de algún punto de referencia."""
+    mask = np.zeros(len(np.ravel(lat)), dtype=bool)
+    for i, _, _ in _en_radio(lat, lon, lat_ref, lon_ref, radio_km, bloque):
+        mask[i] = True
+    return mask
+
+
+def pares_en_radio(lat, lon, lat_ref, lon_ref, radio_km: float, bloque: int = BLOQUE) -> pd.DataFrame:
+    """Pares (i, j, km) a <= radio_km, con i/j posiciones en las listas de entrada."""
+    partes = list(_en_radio(lat, lon, lat_ref, lon_ref, radio_km, bloque))
+    if not partes:
+        return pd.DataFrame({"i": np.array([], dtype=np.int64), "j": np.array([], dtype=np.int64),
+                             "km": np.array([], dtype=np.float64)})
+    i, j, km = (np.concatenate(x) for x in zip(*partes))
+    return pd.DataFrame({"i": i, "j": j, "km": km}).sort_values(["i", "km"], ignore_index=True)
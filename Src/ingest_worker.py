@@ -0,0 +1,345 @@
+# src/ingest_worker.py
+"""
+Ingesta en segundo plano: vigila config.DATA_DIR, limpia solo los archivos nuevos o
+modificados y publica atómicamente una nueva versión del dataset (snapshot).
+Los reruns de Streamlit solo leen el snapshot ya listo; nunca parsean CSV en línea.
+"""
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import (DATA_DIR, CACHE_DIR, INGEST_PATTERNS, INGEST_EXCLUIR, INGEST_POLL_SECONDS, INGEST_ENGINE,
+                     ZONAS_GEOJSON, STORE_DB, USAR_STORE)
+from . import store
+from .data_loader import load_dataset, filas_validas
+from .snapshot import write_snapshot
+from .sketches import ResumenKPI
+from .clustering import asignar_zonas
+from .zones import asignar_zonas_oficiales
+from .anomalies import DetectorAnomalias
+from .limpiardataset import ruta_resumen
+from .units import set_units, units_of
+from .perf import perfilado
+from .utils import file_signature
+
+_DEBOUNCE_SECONDS = 0.5
+_SNAPSHOTS_A_CONSERVAR = 2
+# Sube cuando cambian las columnas que produce la limpieza: invalida las partes en caché
+_VERSION_LIMPIEZA = 4
+
+
+def _escritura_atomica(destino: Path, escribir) -> None:
+    """Escribe en un temporal del mismo directorio y lo renombra (os.replace es atómico)."""
+    tmp = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    escribir(tmp)
+    os.replace(tmp, destino)
+
+
+def read_current(cache_dir=CACHE_DIR):
+    """Versión publicada más reciente como dict {version, path}; None si aún no hay."""
+    puntero = Path(cache_dir) / "CURRENT.json"
+    if not puntero.exists():
+        return None
+    with open(puntero, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class IngestWorker:
+    """Hilo que mantiene una caché limpia por archivo y publica snapshots versionados."""
+
+    def __init__(self, data_dir=DATA_DIR, cache_dir=CACHE_DIR, patterns=INGEST_PATTERNS, excluir=INGEST_EXCLUIR,
+                 usar_store=USAR_STORE, store_db=STORE_DB):
+        self.data_dir = Path(data_dir)
+        self.cache_dir = Path(cache_dir)
+        self.patterns = tuple(patterns)
+        self.excluir = frozenset(excluir)
+        # Con el almacén activo cada archivo también se ingresa ahí (fuente = su ruta), antes
+        # de publicar: los agregados por SQL corresponden siempre a la versión publicada
+        self.usar_store = usar_store
+        self.store_db = store_db
+        self._partes_dir = self.cache_dir / "limpio"
+        self._snap_dir = self.cache_dir / "snapshots"
+        self._manifest_path = self.cache_dir / "manifest.json"
+        self._manifest = self._leer_manifest()
+        self._current = read_current(self.cache_dir)
+        # Estado EWMA por sensor: persiste entre cargas, los archivos nuevos no releen el historial
+        self._anomalias_path = self.cache_dir / "anomalias.json"
+        self._anomalias = DetectorAnomalias.load(self._anomalias_path, version=_VERSION_LIMPIEZA)
+        self._lock = threading.Lock()
+        self._pendiente = threading.Event()
+        self._listo = threading.Event()
+        self._detener = threading.Event()
+        self._thread = None
+        self._observer = None
+        self.ultimo_error = None
+        # Archivos que fallaron al limpiarse: {ruta: {"firma", "error"}}; no se reintentan
+        # hasta que cambie su firma y no impiden publicar el resto
+        self.errores = {}
+        if self._current is not None:
+            self._listo.set()
+
+    # --- estado publicado ---
+    def current(self):
+        """{version, path} del snapshot publicado (lectura barata, sin parseo)."""
+        with self._lock:
+            return dict(self._current) if self._current else None
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Bloquea hasta que exista al menos un snapshot (solo en el arranque en frío)."""
+        return self._listo.wait(timeout)
+
+    def request_rescan(self) -> None:
+        """Pide una revisión de DATA_DIR sin bloquear al llamador."""
+        self._pendiente.set()
+
+    # --- ciclo de vida ---
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._loop, name="urbesense-ingest", daemon=True)
+        self._thread.start()
+        self._observer = self._iniciar_observer()
+        self.request_rescan()
+        return self
+
+    def stop(self, timeout=5.0) -> None:
+        self._detener.set()
+        self._pendiente.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _iniciar_observer(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except Exception:
+            return None  # sin watchdog: el loop hace polling cada INGEST_POLL_SECONDS
+
+        worker = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                rutas = [getattr(event, "src_path", ""), getattr(event, "dest_path", "")]
+                if any(worker._coincide(Path(r)) for r in rutas if r):
+                    worker.request_rescan()
+
+        observer = Observer()
+        observer.schedule(_Handler(), str(self.data_dir), recursive=True)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def _loop(self):
+        while not self._detener.is_set():
+            disparado = self._pendiente.wait(None if self._observer else INGEST_POLL_SECONDS)
+            if self._detener.is_set():
+                break
+            if disparado:
+                # Agrupa ráfagas de eventos (copias de archivos grandes, varios archivos a la vez)
+                time.sleep(_DEBOUNCE_SECONDS)
+            self._pendiente.clear()
+            try:
+                self.scan()
+            except Exception as e:  # el hilo no debe morir por un error al publicar
+                self.ultimo_error = repr(e)
+
+    # --- ingesta incremental ---
+    def _coincide(self, path: Path) -> bool:
+        """
+        True si la ruta (absoluta) está bajo data_dir, no es oculta, no está en una carpeta
+        generada y coincide con un patrón. Generadas: las de INGEST_EXCLUIR y cualquier salida
+        del CLI de limpieza (la delata su <carpeta>_resumen_validacion.json): son copias ya
+        limpias de archivos crudos que el worker también lee.
+        """
+        base = self.data_dir.resolve()
+        try:
+            rel = Path(path).resolve().relative_to(base)
+        except ValueError:
+            return False
+        if any(part.startswith(".") for part in rel.parts):
+            return False
+        carpetas = rel.parts[:-1]
+        if any(c in self.excluir for c in carpetas):
+            return False
+        if any(ruta_resumen(base.joinpath(*carpetas[:i + 1])).exists() for i in range(len(carpetas))):
+            return False
+        return any(fnmatch.fnmatch(rel.name, p) for p in self.patterns)
+
+    def _archivos(self) -> list:
+        if not self.data_dir.exists():
+            return []
+        return sorted(f for f in self.data_dir.resolve().rglob("*") if f.is_file() and self._coincide(f))
+
+    def _leer_manifest(self) -> dict:
+        if self._manifest_path.exists():
+            with open(self._manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def _guardar_manifest(self) -> None:
+        def _w(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+        _escritura_atomica(self._manifest_path, _w)
+
+    def _parte(self, archivo: Path) -> Path:
+        clave = hashlib.sha1(str(archivo).encode("utf-8")).hexdigest()[:16]
+        return self._partes_dir / f"{clave}.parquet"
+
+    @staticmethod
+    def _kpi_de(parte: Path) -> Path:
+        return parte.with_suffix(".kpi.json")
+
+    @perfilado("ingest.limpiar_archivo")
+    def _limpiar_archivo(self, archivo: Path) -> pd.DataFrame:
+        """Etapa de limpieza por archivo (punto de extensión para etapas de ingesta)."""
+        # La parte conserva también las filas rechazadas (columna `violaciones`, válidas primero):
+        # cambiar de reglas o inspeccionar rechazos no vuelve a parsear el archivo.
+        # zona_oficial por lectura queda guardada en la parte: el join espacial no se repite
+        df = asignar_zonas_oficiales(load_dataset(str(archivo), conservar_rechazos=True, engine=INGEST_ENGINE))
+        # z_<métrica> y `anomalia` también quedan en la parte, junto a las lecturas
+        return self._anomalias.procesar(df, validas=df["violaciones"].to_numpy() == 0)
+
+    def scan(self) -> bool:
+        """Procesa archivos nuevos/cambiados/borrados; publica si hubo cambios. Devuelve si publicó."""
+        self._partes_dir.mkdir(parents=True, exist_ok=True)
+        vistos, cambios = set(), False
+        # Si cambian los polígonos hay que reasignar zona_oficial en todas las partes
+        firma_zonas = list(file_signature(ZONAS_GEOJSON) or ())
+
+        for archivo in self._archivos():
+            clave = str(archivo)
+            vistos.add(clave)
+            firma = list(file_signature(archivo) or ())
+            parte = self._parte(archivo)
+            previo = self._manifest.get(clave, {})
+            if (previo.get("firma") == firma and previo.get("version") == _VERSION_LIMPIEZA
+                    and previo.get("zonas", []) == firma_zonas
+                    and parte.exists() and self._kpi_de(parte).exists()
+                    and (previo.get("store") or not self.usar_store)):
+                continue
+            if self.errores.get(clave, {}).get("firma") == firma:
+                continue  # ya falló con este mismo contenido
+            try:
+                df = self._limpiar_archivo(archivo)
+                _escritura_atomica(parte, lambda tmp: df.to_parquet(tmp, index=False))
+                # Resumen de KPIs por archivo: al publicar solo se combinan, no se recalculan
+                resumen = ResumenKPI().update(filas_validas(df))
+                _escritura_atomica(self._kpi_de(parte), resumen.save)
+                if self.usar_store:
+                    store.ingest(filas_validas(df), db_path=self.store_db, fuente=clave)
+            except Exception as e:
+                # Un archivo corrupto no bloquea la publicación: si tenía una parte previa
+                # válida se sigue usando; si no, el archivo queda fuera del snapshot
+                self.errores[clave] = {"firma": firma, "error": repr(e)}
+                continue
+            self.errores.pop(clave, None)
+            self._manifest[clave] = {"firma": firma, "version": _VERSION_LIMPIEZA, "zonas": firma_zonas,
+                                     "parte": self._parte(archivo).name, "filas": int(len(df)),
+                                     "store": self.usar_store}
+            self._anomalias.save(self._anomalias_path)
+            cambios = True
+
+        for clave in [k for k in self.errores if k not in vistos]:
+            del self.errores[clave]
+        self.ultimo_error = "; ".join(f"{Path(k).name}: {v['error']}" for k, v in self.errores.items()) or None
+
+        for clave in [k for k in self._manifest if k not in vistos]:
+            parte = self._partes_dir / self._manifest.pop(clave)["parte"]
+            if self.usar_store:
+                store.borrar_fuente(clave, db_path=self.store_db)
+            parte.unlink(missing_ok=True)
+            self._kpi_de(parte).unlink(missing_ok=True)
+            cambios = True
+
+        if cambios or self._current is None:
+            self._guardar_manifest()
+            self.publish()
+            return True
+        return False
+
+    def _snapshot_frame(self) -> pd.DataFrame:
+        partes = [pd.read_parquet(self._partes_dir / m["parte"]) for m in self._manifest.values()]
+        if not partes:
+            return pd.DataFrame(columns=["nombre"])
+        df = partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+        # concat solo conserva attrs si todas las partes traen los mismos (archivos con columnas
+        # distintas declaran unidades distintas): se juntan explícitamente
+        set_units(df, {c: u for parte in partes for c, u in units_of(parte).items()})
+        # Válidas primero en todo el snapshot: filas_validas() es un slice sin copia
+        if "violaciones" in df.columns:
+            df = df.iloc[np.argsort(df["violaciones"].to_numpy() != 0, kind="stable")].reset_index(drop=True)
+        # Zonas por densidad sobre TODAS las lecturas válidas (un archivo solo no ve las zonas
+        # vecinas); la columna queda guardada en el snapshot y los reruns no la recalculan
+        validas = filas_validas(df)
+        if len(validas) == len(df):
+            return asignar_zonas(df)
+        validas = asignar_zonas(validas)
+        if "zona_cluster" not in validas.columns:
+            return df
+        zonas = np.full(len(df), -1, dtype=validas["zona_cluster"].dtype)  # rechazadas = ruido
+        zonas[:len(validas)] = validas["zona_cluster"].to_numpy()
+        return df.assign(zona_cluster=zonas)
+
+    def _escribir_snapshot(self, df: pd.DataFrame, version: int) -> Path:
+        # Arrow IPC sin compresión: los lectores lo mapean en memoria y comparten páginas
+        destino = self._snap_dir / f"v{version:06d}.arrow"
+        _escritura_atomica(destino, lambda tmp: write_snapshot(df, tmp))
+        return destino
+
+    @perfilado("ingest.publish")
+    def publish(self) -> dict:
+        """Concatena las partes limpias y publica una nueva versión de forma atómica."""
+        self._snap_dir.mkdir(parents=True, exist_ok=True)
+        version = (self._current or {}).get("version", 0) + 1
+        destino = self._escribir_snapshot(self._snapshot_frame(), version)
+
+        resumen = ResumenKPI()
+        for m in self._manifest.values():
+            kpi = self._kpi_de(self._partes_dir / m["parte"])
+            if kpi.exists():
+                resumen.merge(ResumenKPI.load(kpi))
+        ruta_kpis = destino.with_suffix(".kpi.json")
+        _escritura_atomica(ruta_kpis, resumen.save)
+
+        nuevo = {"version": version, "path": str(destino), "kpis": str(ruta_kpis)}
+        def _w(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(nuevo, f)
+        _escritura_atomica(self.cache_dir / "CURRENT.json", _w)
+        with self._lock:
+            self._current = nuevo
+        self._listo.set()
+
+        # Conserva las últimas versiones: una sesión puede estar leyendo la anterior
+        viejos = sorted(self._snap_dir.glob("v*.arrow"))[:-_SNAPSHOTS_A_CONSERVAR]
+        for v in viejos:
+            try:
+                v.with_suffix(".kpi.json").unlink(missing_ok=True)
+                v.unlink(missing_ok=True)
+            except PermissionError:
+                pass  # Windows: aún mapeado por algún lector; se borra en la siguiente publicación
+        return nuevo
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_worker(**kwargs) -> IngestWorker:
+    """Devuelve el worker del proceso (lo crea y arranca la primera vez)."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = IngestWorker(**kwargs).start()
+        return _worker
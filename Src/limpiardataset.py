@@ -1,5 +1,17 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import pandas as pd
 
+from .data_loader import read_raw, clean_dataset, resumen_validacion, filas_validas
+from .sketches import EstadisticasDescribe
+
 def leer_datos(ruta):
     """
     Lee un archivo csv y devuelve un dataframe a pandas
@@ -46,8 +58,110 @@ def procesar_dataset(ruta):
 
 
 
+# === MODO BATCH (CLI) ===
+# Uso: python -m src.limpiardataset "data/*.csv" --salida data/limpio --workers 4
+
+def _escribir_parquet(df: pd.DataFrame, salida: Path, base: str) -> list:
+    """Escribe el df limpio como Parquet; particiona por fecha si la columna existe."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    salida.mkdir(parents=True, exist_ok=True)
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    if "fecha" in df.columns:
+        escritos = []
+        pq.write_to_dataset(
+            tabla, salida, partition_cols=["fecha"],
+            basename_template=f"{base}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_visitor=lambda f: escritos.append(f.path),
+        )
+        return escritos
+    destino = salida / f"{base}.parquet"
+    pq.write_table(tabla, destino)
+    return [str(destino)]
+
+def _nombre_base(ruta: str) -> str:
+    """
+    Prefijo de los Parquet de un archivo: stem + hash corto de la ruta absoluta, así dos
+    entradas con el mismo nombre en carpetas distintas no se pisan las particiones.
+    """
+    clave = hashlib.sha1(str(Path(ruta).resolve()).encode("utf-8")).hexdigest()[:8]
+    return f"{Path(ruta).stem}-{clave}"
+
+def ruta_resumen(salida) -> Path:
+    """El resumen va junto a la carpeta del dataset, no dentro (pd.read_parquet(salida) la lee entera)."""
+    salida = Path(salida)
+    return salida.parent / f"{salida.name}_resumen_validacion.json"
+
+def _procesar_archivo(ruta: str, salida: str) -> dict:
+    """Limpia un archivo con el pipeline compartido de data_loader (se ejecuta en un worker)."""
+    t0 = time.perf_counter()
+    crudo = read_raw(ruta)
+    # Una sola pasada de validación: la máscara de violaciones da el resumen y el filtro
+    marcado = clean_dataset(crudo, conservar_rechazos=True)
+    validacion = resumen_validacion(marcado)
+    limpio = filas_validas(marcado).drop(columns="violaciones")
+    archivos = _escribir_parquet(limpio, Path(salida), _nombre_base(ruta))
+    return {
+        "archivo": ruta,
+        "filas_entrada": int(len(crudo)),
+        "filas_salida": int(len(limpio)),
+        "segundos": round(time.perf_counter() - t0, 4),
+        "parquet": archivos,
+        "validacion": validacion,
+        # Acumulador serializable: el proceso padre lo combina sin volver a leer los datos
+        "estadisticas": EstadisticasDescribe().update(limpio).to_dict(),
+    }
+
+def procesar_lote(patron: str, salida: str, workers: int | None = None) -> dict:
+    """Limpia todos los archivos que coinciden con el glob en paralelo y devuelve el resumen."""
+    rutas = sorted(glob.glob(patron, recursive=True))
+    if not rutas:
+        raise FileNotFoundError(f"Ningún archivo coincide con: {patron}")
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        resultados = list(pool.map(_procesar_archivo, rutas, [salida] * len(rutas)))
+    segundos = time.perf_counter() - t0
+
+    filas_entrada = sum(r["filas_entrada"] for r in resultados)
+    filas_salida = sum(r["filas_salida"] for r in resultados)
+    estadisticas = EstadisticasDescribe()
+    for r in resultados:
+        estadisticas.merge(EstadisticasDescribe.from_dict(r.pop("estadisticas")))
+    describe = estadisticas.describe()
+    resumen = {
+        "patron": patron,
+        "archivos": len(rutas),
+        "filas_entrada": filas_entrada,
+        "filas_salida": filas_salida,
+        "segundos": round(segundos, 4),
+        "filas_por_segundo": round(filas_entrada / segundos, 1) if segundos > 0 else None,
+        "describe": json.loads(describe.to_json()),
+        "detalle": resultados,
+    }
+    Path(salida).mkdir(parents=True, exist_ok=True)
+    with open(ruta_resumen(salida), "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+    resumen["describe"] = describe
+    return resumen
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Limpieza batch de datasets de UrbeSense.")
+    parser.add_argument("patron", nargs="?", default="data/dataset.csv",
+                        help="glob de archivos de entrada (ej. 'exports/**/*.csv')")
+    parser.add_argument("--salida", default="data/limpio", help="carpeta destino de los Parquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="procesos en paralelo")
+    args = parser.parse_args(argv)
+
+    resumen = procesar_lote(args.patron, args.salida, args.workers)
+    print(f"Archivos: {resumen['archivos']} | filas: {resumen['filas_entrada']} -> {resumen['filas_salida']}")
+    print(f"Tiempo: {resumen['segundos']} s | {resumen['filas_por_segundo']} filas/s")
+    print("Resumen del dataset limpio")
+    print(resumen["describe"])
+    print("Resumen de validación en", ruta_resumen(args.salida))
+
+
 if __name__ == "__main__":
-    ruta= "data/dataset.csv"
-    datos_finales = procesar_dataset(ruta)
-    print ("\n Resumen del dataset limpio:")
-    print (datos_finales.describe())
\ No newline at end of file
+    main()
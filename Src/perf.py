@@ -0,0 +1,150 @@
+# src/perf.py
+"""
+Instrumentación del pipeline: tiempo, memoria pico y filas entrada/salida por etapa.
+
+- `medir("etapa")`: context manager; el bloque puede fijar reg["filas_salida"].
+- `@perfilado("etapa")`: decorador; toma filas de entrada del primer argumento y de
+  salida del resultado cuando son DataFrames.
+Cada registro se emite como log JSON en el logger "urbesense.perf" y queda en un
+historial en memoria que muestra `render_panel` (Streamlit).
+La memoria se mide con tracemalloc solo si config.PERF_MEMORY (URBESENSE_PERF_MEM=1).
+tracemalloc es global del proceso: mide un solo hilo a la vez (el que abrió la etapa más
+externa en curso; los demás registran pico_mb=None) y su pico incluye lo que otros hilos
+asignen mientras tanto, así que con concurrencia es una cota superior.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+from .config import PERF_MEMORY, PERF_HISTORY
+
+logger = logging.getLogger("urbesense.perf")
+
+_registros = deque(maxlen=PERF_HISTORY)
+_local = threading.local()
+_memoria_lock = threading.Lock()
+_dueno_memoria = None  # ident del hilo que mide memoria ahora (reinicia el pico global)
+
+
+def _pila():
+    if not hasattr(_local, "pila"):
+        _local.pila = []
+    return _local.pila
+
+
+def _tomar_memoria(pila) -> bool:
+    """True si este hilo mide memoria: ya es el dueño o abre una etapa externa y nadie mide."""
+    global _dueno_memoria
+    yo = threading.get_ident()
+    with _memoria_lock:
+        if _dueno_memoria is None and not pila:
+            _dueno_memoria = yo
+        return _dueno_memoria == yo
+
+
+def _soltar_memoria() -> None:
+    global _dueno_memoria
+    with _memoria_lock:
+        _dueno_memoria = None
+
+
+def _filas(obj):
+    return int(len(obj)) if isinstance(obj, pd.DataFrame) else None
+
+
+@contextmanager
+def medir(etapa: str, filas_entrada=None, **extra):
+    """Mide el bloque y registra {etapa, segundos, pico_mb, filas_entrada, filas_salida}."""
+    reg = {"etapa": etapa, "filas_entrada": filas_entrada, "filas_salida": None, **extra}
+    pila = _pila()
+    memoria = PERF_MEMORY and _tomar_memoria(pila)
+    if memoria:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        actual, pico = tracemalloc.get_traced_memory()
+        # El pico es global: se le pasa al padre antes de reiniciarlo para esta etapa
+        for padre in pila:
+            padre["_pico_abs"] = max(padre.get("_pico_abs", 0), pico)
+        tracemalloc.reset_peak()
+        reg["_inicio_mem"] = reg["_pico_abs"] = actual
+    pila.append(reg)
+    t0 = time.perf_counter()
+    try:
+        yield reg
+    finally:
+        reg["segundos"] = round(time.perf_counter() - t0, 6)
+        pila.pop()
+        if memoria and tracemalloc.is_tracing():
+            _, pico = tracemalloc.get_traced_memory()
+            pico_abs = max(reg.pop("_pico_abs"), pico)
+            reg["pico_mb"] = round((pico_abs - reg.pop("_inicio_mem")) / 2**20, 3)
+            for padre in pila:
+                padre["_pico_abs"] = max(padre.get("_pico_abs", 0), pico_abs)
+        else:
+            reg["pico_mb"] = None
+        if memoria and not pila:
+            _soltar_memoria()
+        reg["ts"] = time.time()
+        _registros.append(reg)
+        logger.info(json.dumps(reg, default=str, ensure_ascii=False))
+
+
+def perfilado(etapa: str | None = None):
+    """Decorador que envuelve la función en `medir` (nombre por defecto: modulo.funcion)."""
+    def deco(fn):
+        nombre = etapa or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with medir(nombre, filas_entrada=_filas(args[0]) if args else None) as reg:
+                out = fn(*args, **kwargs)
+                reg["filas_salida"] = _filas(out)
+                return out
+        return wrapper
+    return deco
+
+
+def registros(etapa: str | None = None) -> list:
+    """Copia del historial reciente (opcionalmente de una sola etapa)."""
+    return [dict(r) for r in list(_registros) if etapa is None or r["etapa"] == etapa]
+
+
+def resumen() -> pd.DataFrame:
+    """Agregado por etapa: llamadas, tiempo medio/máximo, pico de memoria y filas."""
+    df = pd.DataFrame(registros())
+    if df.empty:
+        return df
+    return (df.groupby("etapa")
+              .agg(llamadas=("segundos", "size"),
+                   seg_medio=("segundos", "mean"),
+                   seg_max=("segundos", "max"),
+                   pico_mb_max=("pico_mb", "max"),
+                   filas_entrada=("filas_entrada", "last"),
+                   filas_salida=("filas_salida", "last"))
+              .sort_values("seg_medio", ascending=False)
+              .reset_index())
+
+
+def limpiar() -> None:
+    _registros.clear()
+
+
+def render_panel(st) -> None:
+    """Panel de rendimiento para Streamlit (se le pasa el módulo `st`)."""
+    with st.expander("⏱ Rendimiento del pipeline", expanded=False):
+        tabla = resumen()
+        if tabla.empty:
+            st.caption("Sin mediciones todavía.")
+            return
+        if not PERF_MEMORY:
+            st.caption("Memoria desactivada: exporta URBESENSE_PERF_MEM=1 para medir picos.")
+        st.dataframe(tabla, use_container_width=True)
+        st.caption("Últimas mediciones")
+        st.dataframe(pd.DataFrame(registros()[-20:][::-1]), use_container_width=True)
@@ -1,5 +1,7 @@
 # src/plot_layer.py
-from .utils import color_from_iac
+from .utils import colors_from_iac, coerce_numeric
+from .units import as_percent
+from .perf import perfilado
 from .config import PLOTLY_TEMPLATE
 
 def _go():
@@ -13,26 +15,26 @@ def _go():
 # ============================================================
 # 🌎 MAPA BASE: build_map_plotly (tu versión original)
 # ============================================================
+@perfilado("plot.build_map_plotly")
 def build_map_plotly(df):
     go = _go()
     if go is None:
         return {"placeholder": True, "message": "Plotly no instalado", "n_points": int(len(df))}
 
-    # asegurar tipos numéricos
-    df = df.copy()
-    df["lat"] = df["lat"].astype(float)
-    df["lon"] = df["lon"].astype(float)
+    # asegurar tipos numéricos (arrays locales: el df del llamador no se copia ni se toca)
+    lat = df["lat"].to_numpy(dtype=float)
+    lon = df["lon"].to_numpy(dtype=float)
 
-    colors = [color_from_iac(iac) for iac in df["iac"]]
+    colors = colors_from_iac(as_percent(df, "iac").to_numpy(dtype=float))
 
     # centro y zoom automáticos
-    center_lat = df["lat"].mean() if len(df) else 0
-    center_lon = df["lon"].mean() if len(df) else 0
+    center_lat = lat.mean() if len(df) else 0
+    center_lon = lon.mean() if len(df) else 0
 
     fig = go.Figure(
         go.Scattermapbox(
-            lat=df["lat"],
-            lon=df["lon"],
+            lat=lat,
+            lon=lon,
             mode="markers",
             marker=dict(size=12, color=colors, opacity=0.9),
             text=(
@@ -65,6 +67,7 @@ def build_map_plotly(df):
 # ============================================================
 # 🟢 NUEVO: MAPA DE BURBUJAS (para simulador / IAC como tamaño+color)
 # ============================================================
+@perfilado("plot.bubble_map_iac_mapbox")
 def bubble_map_iac_mapbox(
     df,
     zoom=12.0,
@@ -74,7 +77,7 @@ def bubble_map_iac_mapbox(
 ):
     """
     Mapa de burbujas con Plotly Mapbox:
-    - Color por IAC usando utils.color_from_iac (tus colores predeterminados).
+    - Color por IAC usando utils.colors_from_iac (tus colores predeterminados).
     - Tamaño proporcional a IAC (0–100) escalado a range_size.
     - Center/zoom configurables; si no se da center, usa promedio del df.
     - Sin animación temporal (reactivo a cambios del df).
@@ -87,12 +90,9 @@ def bubble_map_iac_mapbox(
     import numpy as np
     import pandas as pd
 
-    d = df.copy()
-
-    # Asegurar numéricos
-    for c in ("lat", "lon", "iac"):
-        if c in d.columns:
-            d[c] = pd.to_numeric(d[c], errors="coerce")
+    # Solo las columnas que usa el mapa (con CoW es una vista, no una copia)
+    usadas = ["nombre", "lat", "lon", "iac", "ruido", "co2", "temperatura", "fecha", "hora"]
+    d = coerce_numeric(df[[c for c in usadas if c in df.columns]], ["lat", "lon", "iac"])
 
     d = d.dropna(subset=["lat", "lon", "iac"])
     if d.empty:
@@ -100,19 +100,14 @@ def bubble_map_iac_mapbox(
         fig.update_layout(template=PLOTLY_TEMPLATE or "plotly_white")
         return fig
 
-    # — Escalado defensivo: si IAC viene en 0–1, escalar a 0–100 —
-    try:
-        iac_max = float(pd.to_numeric(d["iac"], errors="coerce").max())
-    except Exception:
-        iac_max = 100.0
-    if iac_max <= 1.5:
-        d["iac"] = pd.to_numeric(d["iac"], errors="coerce") * 100.0
+    # IAC en 0–100 según la unidad declarada en df.attrs (sin re-escanear la columna)
+    iac = as_percent(d, "iac").to_numpy(dtype=float)
 
     # Colores desde tu helper (asume IAC 0–100)
-    colors = [color_from_iac(float(v)) for v in d["iac"].values]
+    colors = colors_from_iac(iac)
 
     # Tamaño de burbuja (área) mapeado 0–100 -> range_size
-    iac_clip = np.clip(d["iac"].astype(float).values, 0.0, 100.0)
+    iac_clip = np.clip(iac, 0.0, 100.0)
     s_min, s_max = range_size
     sizes = s_min + (s_max - s_min) * (iac_clip / 100.0)
 
@@ -173,3 +168,62 @@ def bubble_map_iac_mapbox(
     return fig
 
 
+
+
+# ============================================================
+# 🌡️ SUPERFICIE INTERPOLADA (heatmap IDW, ver src/surface.py)
+# ============================================================
+_ESCALAS_SUPERFICIE = {"iac": "RdYlGn", "seguridad": "RdYlGn"}  # el resto: más alto = peor
+
+
+@perfilado("plot.superficie_mapbox")
+def superficie_mapbox(sup, zoom=12.0, center=None, radius=None, opacity=0.6):
+    """
+    Heatmap de una Superficie (rejilla ya interpolada): cada celda es un punto con z
+    y un radio del tamaño de la celda. No recorre lecturas: el costo es la rejilla.
+    """
+    go = _go()
+    if go is None:
+        return {"placeholder": True, "message": "Plotly no instalado", "n_points": 0}
+
+    import numpy as np
+
+    d = sup.to_frame() if sup is not None else None
+    if d is None or d.empty:
+        fig = go.Figure()
+        fig.update_layout(template=PLOTLY_TEMPLATE or "plotly_white")
+        return fig
+
+    if center is None:
+        center = {"lat": float(np.mean(sup.lat)), "lon": float(np.mean(sup.lon))}
+    if radius is None:
+        radius = max(4, int(600 / len(sup.lat)) + 2)  # ~ una celda en pixeles con la altura del mapa
+
+    fig = go.Figure(
+        go.Densitymapbox(
+            lat=d["lat"],
+            lon=d["lon"],
+            z=d[sup.metrica],
+            radius=radius,
+            opacity=opacity,
+            colorscale=_ESCALAS_SUPERFICIE.get(sup.metrica, "RdYlGn_r"),
+            zmin=float(d[sup.metrica].min()),
+            zmax=float(d[sup.metrica].max()),
+            colorbar=dict(title=sup.metrica.upper()),
+            hovertemplate=f"{sup.metrica}: %{{z:.1f}}<extra></extra>",
+            name=f"{sup.metrica} (superficie)",
+        )
+    )
+    fig.update_layout(
+        template=PLOTLY_TEMPLATE or "plotly_white",
+        mapbox=dict(
+            style="open-street-map",
+            center=dict(lat=center["lat"], lon=center["lon"]),
+            zoom=zoom,
+        ),
+        margin=dict(l=10, r=10, t=40, b=10),
+        height=600,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+    )
+    return fig
@@ -0,0 +1,254 @@
+# src/scenarios.py
+"""
+Simulación de intervenciones ("¿qué pasa si subimos el IAC en estas colonias?").
+
+- `impacto_de(iac, seguridad)`: el modelo de impacto (0–100) que usan el loader y el
+  generador de datos; acepta escalares, arrays o Series.
+- `BaseZonas`: estado observado por zona (IAC/seguridad medios y lecturas), en arrays.
+- `Escenario`: deltas de IAC/seguridad sobre un conjunto de zonas; su `clave` (hash) sirve
+  de llave de caché.
+- `evaluar(base, escenarios)`: todos los escenarios de un bloque a la vez con operaciones
+  de arrays sobre pares (escenario, zona intervenida) y sumas con bincount.
+- `barrido(...)`: evalúa miles de escenarios, reparte los bloques en un pool de procesos
+  cuando son muchos y reutiliza los ya calculados (CacheEscenarios). Devuelve el ranking.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .config import IAC_THRESHOLDS
+from .perf import perfilado
+
+BLOQUE_ESCENARIOS = 2000        # escenarios por bloque (y por tarea del pool)
+PARES_POR_BLOQUE = 2_000_000    # pares (escenario, zona) por bloque: ~100 MB de temporales
+MIN_ESCENARIOS_POOL = 20_000    # abajo de esto el pool cuesta más de lo que ahorra
+DELTAS_BARRIDO = (0.05, 0.10, 0.20)
+
+
+def impacto_de(iac, seguridad):
+    """Impacto 0–100 a partir de IAC y seguridad en fracción 0–1."""
+    return (1 - ((iac + seguridad) / 2)) * 100
+
+
+class BaseZonas:
+    """Medias por zona del dataset observado (IAC y seguridad en fracción 0–1)."""
+
+    def __init__(self, zonas, iac, seguridad, lecturas):
+        self.zonas = np.asarray(zonas, dtype=object)
+        self.iac = np.asarray(iac, dtype=np.float64)
+        self.seguridad = np.asarray(seguridad, dtype=np.float64)
+        self.lecturas = np.asarray(lecturas, dtype=np.float64)
+        self._indice = pd.Index(self.zonas)
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame, zona: str = "nombre") -> "BaseZonas":
+        if not {zona, "iac", "seguridad"}.issubset(df.columns) or df.empty:
+            return cls([], [], [], [])
+        g = df.groupby(zona, sort=True, observed=True).agg(
+            iac=("iac", "mean"), seguridad=("seguridad", "mean"), lecturas=("iac", "size"))
+        g = g.dropna(subset=["iac", "seguridad"])  # sin IAC o seguridad la zona no se puede simular
+        return cls(g.index.astype(str), g["iac"], g["seguridad"], g["lecturas"])
+
+    def firma(self) -> str:
+        """Hash del estado base: un escenario vale lo mismo solo sobre la misma base."""
+        h = hashlib.sha1()
+        for a in (self.zonas.astype(str), self.iac, self.seguridad, self.lecturas):
+            h.update(np.ascontiguousarray(a).tobytes() if a.dtype != object else "\x1f".join(a).encode())
+        return h.hexdigest()[:16]
+
+    def indices(self, zonas) -> np.ndarray:
+        """Posición de cada zona en la base (-1 si no está)."""
+        return self._indice.get_indexer(zonas)
+
+    def arrays(self) -> tuple:
+        return self.iac, self.seguridad, self.lecturas
+
+    def __len__(self):
+        return len(self.zonas)
+
+
+class Escenario:
+    """Intervención: +delta_iac / +delta_seguridad (fracción) en `zonas` (None = todas)."""
+
+    def __init__(self, zonas=None, delta_iac: float = 0.0, delta_seguridad: float = 0.0, nombre: str | None = None):
+        self.zonas = None if zonas is None else tuple(sorted(set(map(str, zonas))))
+        self.delta_iac = float(delta_iac)
+        self.delta_seguridad = float(delta_seguridad)
+        self.nombre = nombre or self._nombre()
+        datos = (self.zonas, round(self.delta_iac, 9), round(self.delta_seguridad, 9))
+        self.clave = hashlib.sha1(repr(datos).encode("utf-8")).hexdigest()[:16]
+
+    def _nombre(self) -> str:
+        donde = "todas" if self.zonas is None else ", ".join(self.zonas[:3]) + ("…" if len(self.zonas) > 3 else "")
+        partes = [f"IAC {self.delta_iac:+.2f}" if self.delta_iac else "",
+                  f"seg {self.delta_seguridad:+.2f}" if self.delta_seguridad else ""]
+        return f"{' '.join(p for p in partes if p) or 'sin cambio'} en {donde}"
+
+
+def _pares(base: BaseZonas, escenarios) -> tuple:
+    """
+    Representación dispersa del bloque: un par (escenario, zona) por zona intervenida, con
+    sus deltas. Un escenario toca pocas zonas, así que no se arma la matriz escenarios × zonas.
+    """
+    n, n_zonas = len(escenarios), len(base)
+    todas = np.fromiter((e.zonas is None for e in escenarios), dtype=bool, count=n)
+    largos = np.fromiter((n_zonas if e.zonas is None else len(e.zonas) for e in escenarios), dtype=np.int64, count=n)
+    fila = np.repeat(np.arange(n), largos)
+    zona = np.empty(len(fila), dtype=np.int64)
+    en_todas = todas[fila]
+    zona[~en_todas] = base.indices([z for e in escenarios if e.zonas is not None for z in e.zonas])
+    zona[en_todas] = np.tile(np.arange(n_zonas), int(todas.sum()))
+    d_iac = np.fromiter((e.delta_iac for e in escenarios), dtype=np.float64, count=n)[fila]
+    d_seg = np.fromiter((e.delta_seguridad for e in escenarios), dtype=np.float64, count=n)[fila]
+    conocidas = zona >= 0  # zonas que no están en la base se ignoran
+    return n, fila[conocidas], zona[conocidas], d_iac[conocidas], d_seg[conocidas]
+
+
+def _evaluar_bloque(base: BaseZonas, escenarios, umbral: float) -> dict:
+    """Métricas por escenario de un bloque (es la tarea que corre cada proceso del pool)."""
+    n, fila, zona, d_iac, d_seg = _pares(base, escenarios)
+    iac, seg, lecturas = base.arrays()
+    peso = lecturas / max(lecturas.sum(), 1.0)
+    impacto_zona = impacto_de(iac, seg)
+    impacto_base = impacto_zona @ peso
+    nuevo_iac = np.clip(iac[zona] + d_iac, 0.0, 1.0)
+    nuevo_seg = np.clip(seg[zona] + d_seg, 0.0, 1.0)
+    # El impacto medio es lineal en las zonas: basta sumar el cambio de las intervenidas
+    mejora = np.bincount(fila, (impacto_zona[zona] - impacto_de(nuevo_iac, nuevo_seg)) * peso[zona], minlength=n)
+    # Esfuerzo: puntos de IAC/seguridad efectivamente agregados (después del recorte a [0, 1])
+    esfuerzo = np.bincount(fila, (nuevo_iac - iac[zona]) + (nuevo_seg - seg[zona]), minlength=n)
+    antes, despues = iac[zona] * 100.0 < umbral, nuevo_iac * 100.0 < umbral
+    bajo_umbral = (int(np.count_nonzero(iac * 100.0 < umbral))
+                   - np.bincount(fila, antes & ~despues, minlength=n)
+                   + np.bincount(fila, despues & ~antes, minlength=n))
+    return {
+        "impacto_medio": impacto_base - mejora,
+        "mejora": mejora,
+        "zonas_bajo_umbral": bajo_umbral.astype(np.int64),
+        "esfuerzo": esfuerzo,
+        "mejora_por_esfuerzo": np.divide(mejora, esfuerzo, out=np.zeros_like(mejora), where=esfuerzo > 0),
+    }
+
+
+def evaluar(base: BaseZonas, escenarios, umbral: float = IAC_THRESHOLDS["mid"],
+            bloque: int = BLOQUE_ESCENARIOS) -> pd.DataFrame:
+    """Una fila por escenario (mismo orden) con sus métricas; vectorizado por bloques."""
+    escenarios = list(escenarios)
+    partes = [_evaluar_bloque(base, b, umbral) for b in _bloques(base, escenarios, bloque)]
+    return _tabla(escenarios, partes)
+
+
+def _bloques(base: BaseZonas, escenarios: list, bloque: int) -> list:
+    """Corta en bloques de a lo más `bloque` escenarios y PARES_POR_BLOQUE pares."""
+    largos = np.fromiter((len(base) if e.zonas is None else len(e.zonas) for e in escenarios),
+                         dtype=np.int64, count=len(escenarios))
+    cortes, inicio, acumulado = [], 0, 0
+    for i, largo in enumerate(largos.tolist()):
+        if i > inicio and (i - inicio >= bloque or acumulado + largo > PARES_POR_BLOQUE):
+            cortes.append((inicio, i))
+            inicio, acumulado = i, 0
+        acumulado += largo
+    if inicio < len(escenarios):
+        cortes.append((inicio, len(escenarios)))
+    return [escenarios[i:j] for i, j in cortes]
+
+
+_METRICAS = ["impacto_medio", "mejora", "zonas_bajo_umbral", "esfuerzo", "mejora_por_esfuerzo"]
+
+
+def _tabla(escenarios, partes) -> pd.DataFrame:
+    datos = {c: np.concatenate([p[c] for p in partes]) if partes else np.array([]) for c in _METRICAS}
+    return pd.DataFrame({"clave": [e.clave for e in escenarios],
+                         "escenario": [e.nombre for e in escenarios], **datos})
+
+
+class CacheEscenarios:
+    """Resultados por (firma de la base, umbral, clave del escenario); LRU acotado y thread-safe."""
+
+    def __init__(self, max_entradas: int = 200_000):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def buscar(self, claves) -> dict:
+        with self._lock:
+            encontrados = {}
+            for c in claves:
+                if c in self._datos:
+                    self._datos.move_to_end(c)
+                    encontrados[c] = self._datos[c]
+            return encontrados
+
+    def guardar(self, filas: dict) -> None:
+        with self._lock:
+            self._datos.update(filas)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def __len__(self):
+        return len(self._datos)
+
+
+def escenarios_por_zona(base: BaseZonas, deltas=DELTAS_BARRIDO, deltas_seguridad=(0.0,)) -> list:
+    """Barrido estándar: cada zona sola y todas juntas, con cada combinación de deltas."""
+    grupos = [(z,) for z in base.zonas] + [None]
+    return [Escenario(g, d, ds) for g in grupos for d in deltas for ds in deltas_seguridad if d or ds]
+
+
+@perfilado("scenarios.barrido")
+def barrido(base: BaseZonas, escenarios, umbral: float = IAC_THRESHOLDS["mid"],
+            cache: CacheEscenarios | None = None, workers: int | None = None,
+            bloque: int = BLOQUE_ESCENARIOS) -> pd.DataFrame:
+    """
+    Evalúa los escenarios (reutilizando los que ya están en `cache`) y los ordena por mejora
+    de impacto por unidad de esfuerzo (y luego por mejora total). Con MIN_ESCENARIOS_POOL
+    o más pendientes, los bloques se reparten en procesos.
+    """
+    escenarios = list(escenarios)
+    prefijo = f"{base.firma()}:{umbral}:"
+    llaves = [prefijo + e.clave for e in escenarios]
+    previos = cache.buscar(llaves) if cache is not None else {}
+    pendientes = [e for e, k in zip(escenarios, llaves) if k not in previos]
+
+    if pendientes:
+        bloques = _bloques(base, pendientes, bloque)
+        if len(pendientes) >= MIN_ESCENARIOS_POOL and len(bloques) > 1 and (workers or os.cpu_count() or 1) > 1:
+            # Al pool viajan la base (arrays chicos) y los escenarios; los pares se arman allá
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                partes = list(pool.map(_evaluar_bloque, [base] * len(bloques), bloques, [umbral] * len(bloques)))
+        else:
+            partes = [_evaluar_bloque(base, b, umbral) for b in bloques]
+        nuevos = _tabla(pendientes, partes)
+        # En caché van tuplas (clave, escenario, métricas...): más livianas que dicts por fila
+        filas = dict(zip((prefijo + c for c in nuevos["clave"]),
+                         zip(*(nuevos[c].tolist() for c in nuevos.columns))))
+        previos.update(filas)
+        if cache is not None:
+            cache.guardar(filas)
+
+    ranking = pd.DataFrame.from_records([previos[k] for k in llaves], columns=["clave", "escenario", *_METRICAS])
+    return (ranking.drop_duplicates("clave")
+                   .sort_values(["mejora_por_esfuerzo", "mejora"], ascending=False, kind="stable")
+                   .reset_index(drop=True))
+
+
+def mejor_intervencion(base: BaseZonas, deltas=DELTAS_BARRIDO, umbral: float = IAC_THRESHOLDS["mid"],
+                       cache: CacheEscenarios | None = None) -> dict | None:
+    """
+    Mejor intervención sobre una sola zona por mejora de impacto por unidad de esfuerzo (y
+    luego por mejora total), con el nombre de su zona; None si no hay zonas que simular.
+    """
+    escenarios = [e for e in escenarios_por_zona(base, deltas) if e.zonas is not None]
+    ranking = barrido(base, escenarios, umbral=umbral, cache=cache, workers=1)
+    ranking = ranking[ranking["esfuerzo"] > 0]  # zonas ya en el tope: intervenir no cambia nada
+    if ranking.empty:
+        return None
+    fila = ranking.iloc[0]
+    zona = {e.clave: e.zonas[0] for e in escenarios}[fila["clave"]]
+    return {"zona": zona, "escenario": fila["escenario"], "mejora": float(fila["mejora"]),
+            "mejora_por_esfuerzo": float(fila["mejora_por_esfuerzo"])}
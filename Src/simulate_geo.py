@@ -3,7 +3,9 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 
-__all__ = ["CAMPECHE_CENTER", "simulate_campeche_capital", "save_simulation_csv"]
+from .units import set_units
+
+__all__ = ["CAMPECHE_CENTER", "simulate_campeche_capital", "simulate_lecturas", "save_simulation_csv"]
 
 # Centro por defecto: Campeche capital
 CAMPECHE_CENTER = {"lat": 19.845, "lon": -90.535}
@@ -18,6 +20,23 @@ def polar_offset(lat0, lon0, r_km, theta_rad):
     dlon = km_to_deg_lon(r_km, lat0) * np.cos(theta_rad)
     return lat0 + dlat, lon0 + dlon
 
+def _sembrar_colonias(rng, n_colonias, radio_min_km, radio_max_km, center_lat, center_lon):
+    """Centros de colonia repartidos en anillos de hasta 6 alrededor del centro."""
+    colonias = []
+    n_anillos = max(1, int(np.ceil(n_colonias / 6)))
+    radios = np.linspace(radio_min_km, radio_max_km, n_anillos)
+    idx = 0
+    for r in radios:
+        n_en_anillo = min(6, n_colonias - idx)
+        if n_en_anillo <= 0:
+            break
+        thetas = np.linspace(0, 2*np.pi, n_en_anillo, endpoint=False) + rng.normal(0, 0.18, n_en_anillo)
+        for th in thetas:
+            latc, lonc = polar_offset(center_lat, center_lon, r, th)
+            idx += 1
+            colonias.append({"col_id": idx, "colonia": f"Colonia {idx}", "lat_c": latc, "lon_c": lonc})
+    return colonias
+
 def simulate_campeche_capital(
     n_colonias: int = 12,
     puntos_por_colonia: int = 4,
@@ -34,19 +53,7 @@ def simulate_campeche_capital(
     now = datetime.now().replace(minute=0, second=0, microsecond=0)
 
     # 1) Sembrar centros de colonia en anillos
-    colonias = []
-    n_anillos = max(1, int(np.ceil(n_colonias / 6)))
-    radios = np.linspace(radio_min_km, radio_max_km, n_anillos)
-    idx = 0
-    for r in radios:
-        n_en_anillo = min(6, n_colonias - idx)
-        if n_en_anillo <= 0:
-            break
-        thetas = np.linspace(0, 2*np.pi, n_en_anillo, endpoint=False) + rng.normal(0, 0.18, n_en_anillo)
-        for th in thetas:
-            latc, lonc = polar_offset(center_lat, center_lon, r, th)
-            idx += 1
-            colonias.append({"col_id": idx, "colonia": f"Colonia {idx}", "lat_c": latc, "lon_c": lonc})
+    colonias = _sembrar_colonias(rng, n_colonias, radio_min_km, radio_max_km, center_lat, center_lon)
 
     # 2) Generar puntos alrededor del centro de cada colonia
     rows, zona_id = [], 1
@@ -73,7 +80,54 @@ def simulate_campeche_capital(
             })
             zona_id += 1
 
-    return pd.DataFrame(rows)
+    # IAC simulado en escala 0–100 (no pasa por load_dataset)
+    return set_units(pd.DataFrame(rows), {"iac": "porcentaje"})
+
+def simulate_lecturas(
+    n_filas: int,
+    n_colonias: int = 12,
+    dias: int = 1,
+    radio_min_km: float = 0.6,
+    radio_max_km: float = 8.0,
+    center_lat: float = CAMPECHE_CENTER["lat"],
+    center_lon: float = CAMPECHE_CENTER["lon"],
+    seed: int | None = None,
+) -> pd.DataFrame:
+    """
+    Versión vectorizada de simulate_campeche_capital para volúmenes grandes (millones de filas):
+    mismas distribuciones por colonia, lecturas cada 5 min repartidas en `dias` días.
+    """
+    rng = np.random.default_rng(seed)
+    colonias = _sembrar_colonias(rng, n_colonias, radio_min_km, radio_max_km, center_lat, center_lon)
+    lat_c = np.array([c["lat_c"] for c in colonias])
+    lon_c = np.array([c["lon_c"] for c in colonias])
+    nombres = np.array([c["colonia"] for c in colonias], dtype=object)
+    iac_base = rng.uniform(25, 85, len(colonias))
+
+    col = rng.integers(0, len(colonias), n_filas)
+    lat, lon = polar_offset(lat_c[col], lon_c[col], rng.uniform(0.05, 0.7, n_filas),
+                            rng.uniform(0, 2*np.pi, n_filas))
+
+    iac   = np.clip(iac_base[col] + rng.normal(0, 8, n_filas), 0, 100)
+    co2   = np.clip(rng.normal(650 + (80 - iac)*4, 100), 300, 2000)
+    ruido = np.clip(rng.normal(48 + iac*0.28, 7), 30, 100)
+    temp  = np.clip(rng.normal(27, 1.6, n_filas), 15, 35)
+
+    # Fechas/horas como take() sobre pocas cadenas únicas (strftime por fila sería lento)
+    hoy = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    fechas = np.array([(hoy - pd.Timedelta(days=d)).strftime("%Y-%m-%d") for d in range(dias)], dtype=object)
+    horas = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(0, 24 * 60, 5)], dtype=object)
+
+    df = pd.DataFrame({
+        "zona_id": np.arange(1, n_filas + 1),
+        "nombre": nombres[col],
+        "lat": lat, "lon": lon,
+        "iac": iac, "ruido": ruido, "co2": co2, "temperatura": temp,
+        "fecha": fechas[rng.integers(0, dias, n_filas)],
+        "hora": horas[rng.integers(0, len(horas), n_filas)],
+        "col_id": col + 1, "colonia": nombres[col],
+    })
+    return set_units(df, {"iac": "porcentaje"})
 
 def save_simulation_csv(df: pd.DataFrame, path: str = "data/urbansense.csv") -> None:
     df.to_csv(path, index=False)
@@ -0,0 +1,382 @@
+# src/sketches.py
+"""
+Resúmenes aproximados y mergeables para KPIs sobre volúmenes muy grandes.
+
+- HyperLogLog: zonas distintas (error típico ~1.04/sqrt(2^p); p=14 -> ~0.8%).
+- HistogramaFijo: media exacta + cuantiles y conteos bajo umbral a resolución de bin.
+- Conteos de categorías (nivel_impacto) exactos: la cardinalidad es pequeña.
+- EstadisticasDescribe: equivalente a df.describe() (count/mean/std/min/max exactos con
+  momentos de Welford/Chan; percentiles desde histogramas fijos por métrica).
+
+Todos se actualizan por chunks (`update`) y se combinan entre particiones/procesos
+(`merge`), así que el render solo lee un resumen ya calculado: O(1) por rerun.
+"""
+import json
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .config import IAC_THRESHOLDS
+from .units import as_percent
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """bit_length exacto para uint64 (frexp sobre mitades de 32 bits: sin pérdida de precisión)."""
+    x = x.astype(np.uint64)
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    bl_hi = np.frexp(hi)[1]
+    bl_lo = np.frexp(lo)[1]
+    return np.where(hi > 0, 32 + bl_hi, bl_lo).astype(np.int64)
+
+
+class HyperLogLog:
+    """Conteo aproximado de distintos con 2^p registros de 1 byte."""
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.m = 1 << p
+        self.registros = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, valores) -> "HyperLogLog":
+        valores = pd.Series(valores).dropna()
+        if valores.empty:
+            return self
+        h = pd.util.hash_array(valores.astype(str).to_numpy(dtype=object))
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        resto = h & np.uint64((1 << (64 - self.p)) - 1)
+        rango = (64 - self.p) - _bit_length(resto) + 1
+        np.maximum.at(self.registros, idx, rango.astype(np.uint8))
+        return self
+
+    def merge(self, otro: "HyperLogLog") -> "HyperLogLog":
+        if otro.p != self.p:
+            raise ValueError("HyperLogLog con distinta precisión p")
+        np.maximum(self.registros, otro.registros, out=self.registros)
+        return self
+
+    def estimate(self) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        e = alpha * m * m / np.sum(np.exp2(-self.registros.astype(np.float64)))
+        ceros = int(np.count_nonzero(self.registros == 0))
+        if e <= 2.5 * m and ceros:
+            e = m * np.log(m / ceros)  # corrección de rango pequeño (linear counting)
+        return float(e)
+
+    def to_dict(self) -> dict:
+        return {"p": self.p, "registros": self.registros.tolist()}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "HyperLogLog":
+        h = cls(d["p"])
+        h.registros = np.asarray(d["registros"], dtype=np.uint8)
+        return h
+
+
+class HistogramaFijo:
+    """Histograma de bins fijos en [lo, hi] con suma exacta (media) y desbordes."""
+
+    def __init__(self, lo: float, hi: float, bins: int = 1000):
+        self.lo, self.hi, self.bins = float(lo), float(hi), int(bins)
+        self.conteos = np.zeros(self.bins, dtype=np.int64)
+        self.debajo = 0
+        self.encima = 0
+        self.n = 0
+        self.suma = 0.0
+
+    def update(self, valores) -> "HistogramaFijo":
+        v = np.asarray(valores, dtype=np.float64)
+        v = v[~np.isnan(v)]
+        if not v.size:
+            return self
+        self.n += int(v.size)
+        self.suma += float(v.sum())
+        self.debajo += int(np.count_nonzero(v < self.lo))
+        self.encima += int(np.count_nonzero(v > self.hi))
+        dentro = v[(v >= self.lo) & (v <= self.hi)]
+        idx = ((dentro - self.lo) / (self.hi - self.lo) * self.bins).astype(np.int64)
+        np.minimum(idx, self.bins - 1, out=idx)
+        self.conteos += np.bincount(idx, minlength=self.bins)
+        return self
+
+    def merge(self, otro: "HistogramaFijo") -> "HistogramaFijo":
+        if (otro.lo, otro.hi, otro.bins) != (self.lo, self.hi, self.bins):
+            raise ValueError("Histogramas con distinta rejilla")
+        self.conteos += otro.conteos
+        self.debajo += otro.debajo
+        self.encima += otro.encima
+        self.n += otro.n
+        self.suma += otro.suma
+        return self
+
+    @property
+    def bordes(self) -> np.ndarray:
+        return np.linspace(self.lo, self.hi, self.bins + 1)
+
+    def mean(self) -> float:
+        return self.suma / self.n if self.n else float("nan")
+
+    def quantile(self, q: float) -> float:
+        """Cuantil aproximado (interpolación lineal dentro del bin)."""
+        if not self.n:
+            return float("nan")
+        objetivo = q * self.n - self.debajo
+        if objetivo <= 0:
+            return self.lo
+        acumulado = np.cumsum(self.conteos)
+        i = int(np.searchsorted(acumulado, objetivo))
+        if i >= self.bins:
+            return self.hi
+        previo = acumulado[i - 1] if i else 0
+        frac = (objetivo - previo) / self.conteos[i] if self.conteos[i] else 0.0
+        ancho = (self.hi - self.lo) / self.bins
+        return float(self.lo + (i + frac) * ancho)
+
+    def count_below(self, umbral: float) -> int:
+        """Valores < umbral (exacto si el umbral cae en un borde de bin)."""
+        if umbral <= self.lo:
+            return 0
+        if umbral > self.hi:
+            return self.n - self.encima
+        pos = (umbral - self.lo) / (self.hi - self.lo) * self.bins
+        return int(self.debajo + self.conteos[: int(np.floor(pos + 1e-9))].sum())
+
+    def to_dict(self) -> dict:
+        return {"lo": self.lo, "hi": self.hi, "bins": self.bins, "conteos": self.conteos.tolist(),
+                "debajo": self.debajo, "encima": self.encima, "n": self.n, "suma": self.suma}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "HistogramaFijo":
+        h = cls(d["lo"], d["hi"], d["bins"])
+        h.conteos = np.asarray(d["conteos"], dtype=np.int64)
+        h.debajo, h.encima, h.n, h.suma = d["debajo"], d["encima"], d["n"], d["suma"]
+        return h
+
+
+# Rejilla fija por métrica (unidades canónicas) para que los histogramas sean combinables.
+# lat/lon y los IDs no llevan histograma: sus percentiles no aportan y salen NaN.
+RANGOS_HISTOGRAMA = {
+    "iac": (0.0, 1.0),
+    "seguridad": (0.0, 1.0),
+    "impacto": (0.0, 100.0),
+    "co2": (0.0, 5000.0),
+    "ruido": (0.0, 150.0),
+    "temperatura": (-20.0, 60.0),
+}
+
+
+class Momentos:
+    """count, media, M2 (varianza), min y max exactos; se combinan con la fórmula de Chan."""
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = float("inf")
+        self.maximo = float("-inf")
+
+    def update(self, valores) -> "Momentos":
+        v = np.asarray(valores, dtype=np.float64)
+        v = v[~np.isnan(v)]
+        if not v.size:
+            return self
+        otro = Momentos()
+        otro.n = int(v.size)
+        otro.media = float(v.mean())
+        otro.m2 = float(np.square(v - otro.media).sum())
+        otro.minimo, otro.maximo = float(v.min()), float(v.max())
+        return self.merge(otro)
+
+    def merge(self, otro: "Momentos") -> "Momentos":
+        if not otro.n:
+            return self
+        n = self.n + otro.n
+        delta = otro.media - self.media
+        self.media += delta * otro.n / n
+        self.m2 += otro.m2 + delta * delta * self.n * otro.n / n
+        self.n = n
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+        return self
+
+    def std(self) -> float:
+        """Desviación estándar muestral (ddof=1, como pandas)."""
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else float("nan")
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "media": self.media, "m2": self.m2,
+                "minimo": self.minimo if self.n else None, "maximo": self.maximo if self.n else None}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Momentos":
+        m = cls()
+        m.n, m.media, m.m2 = d["n"], d["media"], d["m2"]
+        if m.n:
+            m.minimo, m.maximo = d["minimo"], d["maximo"]
+        return m
+
+
+class EstadisticasDescribe:
+    """
+    Acumulador tipo df.describe() por chunks, combinable entre particiones y procesos.
+    count/mean/std/min/max son exactos; los percentiles salen del histograma de la métrica
+    (resolución de bin) y solo existen para las columnas con rango en `rangos`.
+    """
+
+    def __init__(self, rangos: dict | None = None, bins: int = 1000):
+        self.rangos = dict(RANGOS_HISTOGRAMA if rangos is None else rangos)
+        self.bins = bins
+        self.momentos = {}
+        self.histogramas = {}
+
+    def _rango(self, col: str):
+        return self.rangos.get(col, self.rangos.get(str(col).lower()))
+
+    def update(self, df: pd.DataFrame) -> "EstadisticasDescribe":
+        for col in df.select_dtypes("number").columns:
+            valores = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            self.momentos.setdefault(col, Momentos()).update(valores)
+            rango = self._rango(col)
+            if rango is not None:
+                self.histogramas.setdefault(col, HistogramaFijo(*rango, self.bins)).update(valores)
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs) -> "EstadisticasDescribe":
+        e = cls(**kwargs)
+        for chunk in chunks:
+            e.update(chunk)
+        return e
+
+    def merge(self, otro: "EstadisticasDescribe") -> "EstadisticasDescribe":
+        for col, m in otro.momentos.items():
+            self.momentos.setdefault(col, Momentos()).merge(m)
+        for col, h in otro.histogramas.items():
+            if col in self.histogramas:
+                self.histogramas[col].merge(h)
+            else:
+                self.histogramas[col] = HistogramaFijo.from_dict(h.to_dict())
+        return self
+
+    def describe(self, percentiles=(0.25, 0.5, 0.75)) -> pd.DataFrame:
+        """Mismo formato que df.describe(): filas count, mean, std, min, p%, max."""
+        etiquetas = [f"{q * 100:g}%" for q in percentiles]
+        columnas = {}
+        for col, m in self.momentos.items():
+            vacio = not m.n
+            hist = self.histogramas.get(col)
+            cuantiles = []
+            for q in percentiles:
+                if vacio or hist is None:
+                    cuantiles.append(float("nan"))
+                else:
+                    # Los desbordes del histograma se acotan con los extremos exactos
+                    cuantiles.append(min(max(hist.quantile(q), m.minimo), m.maximo))
+            columnas[col] = [
+                float(m.n),
+                m.media if not vacio else float("nan"),
+                m.std(),
+                m.minimo if not vacio else float("nan"),
+                *cuantiles,
+                m.maximo if not vacio else float("nan"),
+            ]
+        return pd.DataFrame(columnas, index=["count", "mean", "std", "min", *etiquetas, "max"])
+
+    def to_dict(self) -> dict:
+        return {
+            "bins": self.bins,
+            "rangos": {c: list(r) for c, r in self.rangos.items()},
+            "momentos": {c: m.to_dict() for c, m in self.momentos.items()},
+            "histogramas": {c: h.to_dict() for c, h in self.histogramas.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "EstadisticasDescribe":
+        e = cls({c: tuple(r) for c, r in d["rangos"].items()}, d["bins"])
+        e.momentos = {c: Momentos.from_dict(m) for c, m in d["momentos"].items()}
+        e.histogramas = {c: HistogramaFijo.from_dict(h) for c, h in d["histogramas"].items()}
+        return e
+
+
+class ResumenKPI:
+    """Resumen mergeable con lo que piden las tarjetas de KPIs de los dashboards."""
+
+    def __init__(self):
+        self.filas = 0
+        self.zonas = HyperLogLog()
+        self.iac = HistogramaFijo(0.0, 100.0, 1000)       # IAC en 0–100
+        self.impacto = HistogramaFijo(0.0, 100.0, 1000)
+        self.niveles = Counter()
+
+    def update(self, df: pd.DataFrame) -> "ResumenKPI":
+        self.filas += int(len(df))
+        if "nombre" in df.columns:
+            self.zonas.update(df["nombre"])
+        if "iac" in df.columns:
+            self.iac.update(as_percent(df, "iac").to_numpy(dtype=float))
+        if "impacto" in df.columns:
+            self.impacto.update(df["impacto"].to_numpy(dtype=float))
+        if "nivel_impacto" in df.columns:
+            self.niveles.update(df["nivel_impacto"].value_counts().to_dict())
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks) -> "ResumenKPI":
+        r = cls()
+        for chunk in chunks:
+            r.update(chunk)
+        return r
+
+    def merge(self, otro: "ResumenKPI") -> "ResumenKPI":
+        self.filas += otro.filas
+        self.zonas.merge(otro.zonas)
+        self.iac.merge(otro.iac)
+        self.impacto.merge(otro.impacto)
+        self.niveles.update(otro.niveles)
+        return self
+
+    def kpis(self, umbral_iac: float = IAC_THRESHOLDS["mid"]) -> dict:
+        """KPIs listos para mostrar; `umbral_iac` en 0–100."""
+        nivel, n_nivel = self.niveles.most_common(1)[0] if self.niveles else (None, 0)
+        return {
+            "filas": self.filas,
+            "zonas": int(round(self.zonas.estimate())),
+            "iac_medio": self.iac.mean(),
+            "iac_p50": self.iac.quantile(0.5),
+            "iac_p90": self.iac.quantile(0.9),
+            "bajo_umbral": self.iac.count_below(umbral_iac),
+            "impacto_medio": self.impacto.mean(),
+            "nivel_mas_comun": nivel,
+            "nivel_mas_comun_n": int(n_nivel),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "filas": self.filas,
+            "zonas": self.zonas.to_dict(),
+            "iac": self.iac.to_dict(),
+            "impacto": self.impacto.to_dict(),
+            "niveles": dict(self.niveles),
+        })
+
+    @classmethod
+    def from_json(cls, texto: str) -> "ResumenKPI":
+        d = json.loads(texto)
+        r = cls()
+        r.filas = d["filas"]
+        r.zonas = HyperLogLog.from_dict(d["zonas"])
+        r.iac = HistogramaFijo.from_dict(d["iac"])
+        r.impacto = HistogramaFijo.from_dict(d["impacto"])
+        r.niveles = Counter(d["niveles"])
+        return r
+
+    def save(self, path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+    @classmethod
+    def load(cls, path) -> "ResumenKPI":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_json(f.read())
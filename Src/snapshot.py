@@ -0,0 +1,62 @@
+# src/snapshot.py
+"""
+Snapshot de solo lectura del dataset limpio en formato Arrow IPC (sin compresión).
+Se abre con memory-map: todas las sesiones y procesos comparten las mismas páginas
+del archivo (page cache del SO) en lugar de tener cada uno su copia del DataFrame.
+"""
+import json
+
+import pandas as pd
+
+from .units import units_of, set_units
+from .perf import perfilado
+
+_META_UNIDADES = b"urbesense.unidades"
+
+
+def write_snapshot(df: pd.DataFrame, path) -> None:
+    """Escribe el df como archivo Arrow IPC listo para mapear en memoria."""
+    import pyarrow as pa
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    # Arrow no conserva df.attrs: las unidades viajan en la metadata del esquema
+    meta = dict(tabla.schema.metadata or {})
+    meta[_META_UNIDADES] = json.dumps(units_of(df)).encode("utf-8")
+    tabla = tabla.replace_schema_metadata(meta)
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+
+
+def open_snapshot(path):
+    """Tabla de pyarrow respaldada por el mmap del archivo (no copia los buffers)."""
+    import pyarrow as pa
+
+    fuente = pa.memory_map(str(path), "r")
+    return pa.ipc.open_file(fuente).read_all()
+
+
+def _tipos_sin_copia(tipo):
+    """Textos como StringDtype de Arrow: referencian el buffer en vez de crear objetos Python."""
+    import pyarrow as pa
+
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def snapshot_frame(tabla) -> pd.DataFrame:
+    """
+    DataFrame sobre la tabla mapeada. Las columnas numéricas sin nulos se exponen sin copia
+    (arrays de solo lectura); no mutar el resultado: es compartido entre sesiones.
+    """
+    df = tabla.to_pandas(split_blocks=True, self_destruct=False, types_mapper=_tipos_sin_copia)
+    meta = tabla.schema.metadata or {}
+    unidades = json.loads(meta[_META_UNIDADES]) if _META_UNIDADES in meta else None
+    return set_units(df, unidades)
+
+
+@perfilado("snapshot.load")
+def load_snapshot(path) -> pd.DataFrame:
+    """Atajo: abre el archivo con mmap y devuelve el DataFrame compartido."""
+    return snapshot_frame(open_snapshot(path))
@@ -0,0 +1,79 @@
+# src/sources.py
+"""Resolución de fuentes: archivo, carpeta, glob o dataset particionado estilo Hive."""
+import glob
+import re
+from pathlib import Path
+
+import pandas as pd
+
+EXTENSIONES = (".csv", ".parquet")
+
+# Segmentos tipo "fecha=2025-10-15" en la ruta (particiones Hive)
+_PARTICION_RE = re.compile(r"^([^=]+)=(.+)$")
+# Fecha suelta en el nombre del archivo (ej. lecturas_2025-10-15.csv)
+_FECHA_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+# Claves de partición equivalentes a columnas internas
+_ALIAS_PARTICION = {"zona": "nombre"}
+
+
+def resolve_sources(path) -> list:
+    """Devuelve la lista ordenada de archivos de datos a partir de archivo, carpeta o glob."""
+    p = Path(path)
+    if p.is_file():
+        return [p]
+    if p.is_dir():
+        archivos = [f for f in p.rglob("*") if f.is_file() and f.suffix.lower() in EXTENSIONES]
+    else:
+        archivos = [Path(f) for f in glob.glob(str(path), recursive=True)]
+        archivos = [f for f in archivos if f.is_file() and f.suffix.lower() in EXTENSIONES]
+    # Ignora archivos ocultos/temporales (._x, .~lock, etc.)
+    archivos = [f for f in archivos if not any(part.startswith(".") for part in f.parts[-2:])]
+    if not archivos:
+        raise FileNotFoundError(f"No se encontraron archivos de datos en: {path}")
+    return sorted(archivos)
+
+
+def partition_values(path) -> dict:
+    """Extrae los pares clave=valor de los directorios de la ruta (formato Hive)."""
+    valores = {}
+    for part in Path(path).parent.parts:
+        m = _PARTICION_RE.match(part)
+        if m:
+            clave = m.group(1).strip().lower()
+            valores[_ALIAS_PARTICION.get(clave, clave)] = m.group(2)
+    return valores
+
+
+def _fecha_de_ruta(path):
+    """Fecha asociada al archivo: partición fecha=... o fecha en el nombre; None si no hay."""
+    fecha = partition_values(path).get("fecha")
+    if fecha is None:
+        m = _FECHA_RE.search(Path(path).name)
+        fecha = m.group(1) if m else None
+    return pd.to_datetime(fecha, errors="coerce") if fecha else None
+
+
+def prune_sources(archivos, fecha_range=None, zonas=None) -> list:
+    """
+    Descarta archivos que por su ruta no pueden contener filas del rango/zonas pedidos.
+    Archivos sin información de partición se conservan (se filtran por fila después).
+    """
+    fmin, fmax = (pd.to_datetime(v) if v is not None else None for v in (fecha_range or (None, None)))
+    zonas = set(zonas) if zonas else None
+
+    elegidos = []
+    for f in archivos:
+        if fmin is not None or fmax is not None:
+            fecha = _fecha_de_ruta(f)
+            if fecha is not None and not pd.isna(fecha):
+                if fmin is not None and fecha < fmin.normalize():
+                    continue
+                if fmax is not None and fecha > fmax:
+                    continue
+        if zonas is not None:
+            zona = partition_values(f).get("nombre")
+            if zona is not None and zona not in zonas:
+                continue
+        elegidos.append(f)
+    return elegidos
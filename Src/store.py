@@ -0,0 +1,180 @@
+# src/store.py
+"""
+Almacén histórico opcional sobre SQLite (archivo local, sin servicios externos).
+Ingresa lecturas ya limpias por load_dataset y expone las consultas de los dashboards
+como SQL, para no reparsear CSV ni cargar todo el historial en memoria.
+
+Uso: python -m src.store "data/*.csv" [--db data/urbesense.db]
+"""
+import argparse
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import STORE_DB, GRID_CELL_DEG, IAC_THRESHOLDS
+from .data_loader import load_dataset
+from .sources import resolve_sources
+
+# Columnas persistidas (las que no traiga el df se guardan como NULL)
+COLUMNAS = {
+    "nombre": "TEXT NOT NULL",
+    "fecha": "TEXT",
+    "hora": "TEXT",
+    "lat": "REAL",
+    "lon": "REAL",
+    "iac": "REAL",
+    "seguridad": "REAL",
+    "impacto": "REAL",
+    "nivel_impacto": "TEXT",
+    "co2": "REAL",
+    "ruido": "REAL",
+    "temperatura": "REAL",
+    "causa": "TEXT",
+}
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS lecturas (
+    {", ".join(f"{c} {t}" for c, t in COLUMNAS.items())},
+    celda INTEGER,
+    fuente TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lecturas_nombre_fecha ON lecturas (nombre, fecha);
+CREATE INDEX IF NOT EXISTS idx_lecturas_celda ON lecturas (celda);
+CREATE INDEX IF NOT EXISTS idx_lecturas_fuente ON lecturas (fuente);
+"""
+
+# Filas de celdas que lecturas_bbox expande en rangos BETWEEN (2 variables SQL cada uno);
+# SQLite viejo acepta 999 variables por consulta
+_MAX_RANGOS_CELDA = 200
+
+
+def connect(db_path=STORE_DB) -> sqlite3.Connection:
+    """Abre (y crea si hace falta) la base con su esquema e índices."""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(db_path))
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(_ESQUEMA)
+    return con
+
+
+def grid_cell(lat, lon, size: float = GRID_CELL_DEG):
+    """Id entero de la celda de la rejilla lat/lon (vectorizado)."""
+    fila = np.floor((np.asarray(lat, dtype=float) + 90.0) / size).astype("int64")
+    col = np.floor((np.asarray(lon, dtype=float) + 180.0) / size).astype("int64")
+    return fila * 1_000_000 + col
+
+
+def ingest(df: pd.DataFrame, db_path=STORE_DB, fuente: str | None = None, chunksize: int = 50_000) -> int:
+    """
+    Inserta un df limpio en la tabla `lecturas`. Si se indica `fuente`, primero se borran
+    las filas previas de esa fuente (reingestar un archivo no duplica). Devuelve filas insertadas.
+    """
+    d = pd.DataFrame({c: df[c] if c in df.columns else None for c in COLUMNAS}, index=df.index)
+    if "fecha" in df.columns:
+        d["fecha"] = pd.to_datetime(df["fecha"], errors="coerce").dt.strftime("%Y-%m-%d")
+    if {"lat", "lon"}.issubset(df.columns):
+        d["celda"] = grid_cell(df["lat"], df["lon"])
+    else:
+        d["celda"] = None
+    d["fuente"] = fuente
+
+    with closing(connect(db_path)) as con, con:
+        if fuente is not None:
+            con.execute("DELETE FROM lecturas WHERE fuente = ?", (fuente,))
+        d.to_sql("lecturas", con, if_exists="append", index=False, chunksize=chunksize)
+    return int(len(d))
+
+
+def ingest_path(path, db_path=STORE_DB) -> int:
+    """Carga cada archivo de `path` (archivo/carpeta/glob) con load_dataset y lo ingresa."""
+    total = 0
+    for archivo in resolve_sources(path):
+        total += ingest(load_dataset(str(archivo)), db_path=db_path, fuente=str(archivo))
+    return total
+
+
+def borrar_fuente(fuente: str, db_path=STORE_DB) -> None:
+    """Quita las filas de una fuente (archivo que ya no existe)."""
+    with closing(connect(db_path)) as con, con:
+        con.execute("DELETE FROM lecturas WHERE fuente = ?", (fuente,))
+
+
+def _query(sql: str, params=(), db_path=STORE_DB) -> pd.DataFrame:
+    with closing(connect(db_path)) as con:
+        return pd.read_sql_query(sql, con, params=params)
+
+
+# === CONSULTAS DE LOS DASHBOARDS ===
+# Mismo resultado que los agregados en pandas de src/chart_data (empates en orden de
+# aparición: MIN(rowid) es la primera lectura ingresada de cada grupo)
+def riesgo_por_zona(top: int = 5, umbral: float = IAC_THRESHOLDS["mid"], db_path=STORE_DB) -> pd.DataFrame:
+    """Zonas con más lecturas de IAC bajo `umbral` (en %; pie 'Zonas con Mayor Riesgo')."""
+    df = _query(
+        """SELECT nombre AS Zona, COUNT(CASE WHEN iac * 100.0 < ? THEN 1 END) AS Casos
+           FROM lecturas GROUP BY nombre
+           ORDER BY Casos DESC, MIN(rowid) LIMIT ?""",
+        (umbral, top), db_path,
+    )
+    total = df["Casos"].sum()
+    df["Porcentaje"] = (df["Casos"] / total * 100.0).round(1) if total else 0.0
+    return df
+
+
+def iac_anual(zonas=None, db_path=STORE_DB) -> pd.DataFrame:
+    """IAC promedio por año (línea 'Nivel de Intervención'); opcionalmente solo algunas zonas."""
+    sql = "SELECT substr(fecha, 1, 4) AS fecha, AVG(iac) AS iac FROM lecturas WHERE fecha IS NOT NULL"
+    params = []
+    if zonas:
+        sql += f" AND nombre IN ({','.join('?' * len(zonas))})"
+        params += list(zonas)
+    sql += " GROUP BY 1 ORDER BY 1"
+    return _query(sql, params, db_path)
+
+
+def ranking_causas(top: int = 5, db_path=STORE_DB) -> pd.DataFrame:
+    """Causas con mayor impacto promedio (barras 'Causas Principales')."""
+    return _query(
+        """SELECT causa, AVG(impacto) AS impacto
+           FROM lecturas WHERE causa IS NOT NULL
+           GROUP BY causa HAVING AVG(impacto) IS NOT NULL
+           ORDER BY impacto DESC, MIN(rowid) LIMIT ?""",
+        (top,), db_path,
+    )
+
+
+def lecturas_bbox(bbox, columns=None, db_path=STORE_DB) -> pd.DataFrame:
+    """Lecturas dentro de bbox=(lon_min, lat_min, lon_max, lat_max) usando el índice de celdas."""
+    lon_min, lat_min, lon_max, lat_max = bbox
+    f0, c0 = (int(v) for v in np.floor([(lat_min + 90.0) / GRID_CELL_DEG, (lon_min + 180.0) / GRID_CELL_DEG]))
+    f1, c1 = (int(v) for v in np.floor([(lat_max + 90.0) / GRID_CELL_DEG, (lon_max + 180.0) / GRID_CELL_DEG]))
+    cols = ", ".join(c for c in (columns or COLUMNAS) if c in COLUMNAS)
+    if f1 - f0 < _MAX_RANGOS_CELDA:
+        # Una condición BETWEEN por fila de celdas: cada rango usa el índice
+        rangos = " OR ".join(["celda BETWEEN ? AND ?"] * (f1 - f0 + 1))
+        params = []
+        for f in range(f0, f1 + 1):
+            params += [f * 1_000_000 + c0, f * 1_000_000 + c1]
+    else:
+        # bbox muy alto: un solo rango sobre el índice (no pasa del límite de variables de
+        # SQLite) y la columna de la celda se filtra con el módulo
+        rangos = "celda BETWEEN ? AND ? AND celda % 1000000 BETWEEN ? AND ?"
+        params = [f0 * 1_000_000 + c0, f1 * 1_000_000 + c1, c0, c1]
+    sql = f"""SELECT {cols} FROM lecturas
+              WHERE ({rangos}) AND lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?"""
+    return _query(sql, params + [lat_min, lat_max, lon_min, lon_max], db_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta de lecturas limpias al almacén SQLite.")
+    parser.add_argument("path", help="archivo, carpeta o glob de entrada")
+    parser.add_argument("--db", default=str(STORE_DB), help="archivo SQLite destino")
+    args = parser.parse_args(argv)
+    n = ingest_path(args.path, db_path=args.db)
+    print(f"Filas ingresadas: {n} -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# src/surface.py
+"""
+Superficie interpolada de una métrica (IAC, CO2, ruido...) sobre una rejilla regular.
+
+- Las lecturas se promedian primero por posición de sensor: un sensor que reporta cada
+  5 min es un solo punto de control, no miles.
+- IDW (inverse distance weighting) con los k vecinos más cercanos. El índice espacial es
+  cKDTree de scipy si está instalado; si no, una rejilla de celdas con búsqueda exacta
+  por anillos (memoria acotada por lotes de pares candidatos).
+- Coordenadas proyectadas a km locales (equirectangular), suficiente a escala de ciudad.
+La app cachea `superficie(...)` por versión del snapshot y resolución.
+"""
+import numpy as np
+import pandas as pd
+
+from .config import SUPERFICIE_K, SUPERFICIE_RADIO_KM, SUPERFICIE_RESOLUCION
+from .geometry import RADIO_TIERRA_KM
+from .perf import perfilado
+
+_ELEMENTOS_POR_BLOQUE = 4_000_000  # pares candidatos por lote en la búsqueda sin scipy
+
+
+def _kdtree():
+    try:
+        from scipy.spatial import cKDTree
+        return cKDTree
+    except Exception:
+        return None
+
+
+class Superficie:
+    """Rejilla interpolada: `z[i, j]` es el valor en (lat[i], lon[j]); NaN = sin sensores cerca."""
+
+    def __init__(self, metrica, lat, lon, z, sensores):
+        self.metrica = metrica
+        self.lat = lat
+        self.lon = lon
+        self.z = z
+        self.sensores = sensores
+
+    def to_frame(self) -> pd.DataFrame:
+        """Formato largo (lat, lon, valor) sin las celdas vacías, para capas de mapa."""
+        lat, lon = np.meshgrid(self.lat, self.lon, indexing="ij")
+        validas = ~np.isnan(self.z)
+        return pd.DataFrame({"lat": lat[validas], "lon": lon[validas], self.metrica: self.z[validas]})
+
+
+def _a_km(lat, lon, lat0: float) -> np.ndarray:
+    """Proyección equirectangular centrada en lat0 -> (x, y) en km."""
+    x = RADIO_TIERRA_KM * np.radians(lon) * np.cos(np.radians(lat0))
+    y = RADIO_TIERRA_KM * np.radians(lat)
+    return np.column_stack([x, y])
+
+
+def _top_k(qi: np.ndarray, pj: np.ndarray, d: np.ndarray, k: int, d_max: float):
+    """
+    De pares (consulta, punto, distancia) deja los k más cercanos por consulta, con su rango.
+    Un solo argsort sobre la llave qi·escala + d (d < d_max) ordena por consulta y distancia.
+    """
+    base = qi.min() if len(qi) else 0
+    orden = np.argsort((qi - base) * (2.0 * d_max) + d)
+    qi, pj, d = qi[orden], pj[orden], d[orden]
+    inicio = np.flatnonzero(np.r_[True, qi[1:] != qi[:-1]])
+    rango = np.arange(len(qi)) - np.repeat(inicio, np.diff(np.r_[inicio, len(qi)]))
+    quedan = rango < k
+    return qi[quedan], pj[quedan], d[quedan], rango[quedan]
+
+
+def _knn_rejilla(puntos: np.ndarray, consultas: np.ndarray, k: int, radio_max: float | None = None):
+    """
+    k vecinos exactos sin scipy: los puntos se agrupan en celdas de lado h (~k puntos por
+    celda) y cada consulta revisa el cuadrado de (2r+1)² celdas alrededor de la suya.
+    Si su k-ésimo vecino está a <= r·h (nada fuera del cuadrado puede estar más cerca)
+    queda resuelta; si no, r crece solo para las pendientes. Con `radio_max` la búsqueda
+    se detiene cuando el cuadrado cubre ese radio: los vecinos más lejanos quedan en inf.
+    h tiene pisos que no dependen de la densidad (extensión/512 y radio_max/32), así que
+    sensores colineales o muy agrupados no generan miles de celdas por anillo.
+    """
+    n, m = len(puntos), len(consultas)
+    k = min(k, n)
+    dist = np.full((m, k), np.inf)
+    idx = np.zeros((m, k), dtype=np.int64)
+    origen = puntos.min(axis=0)
+    extension = np.ptp(puntos, axis=0)
+    area = float(np.prod(np.maximum(extension, 1e-9)))
+    h = max(float(np.sqrt(area * k / n)), float(extension.max()) / 512,
+            radio_max / 32 if radio_max else 0.0, 1e-9)
+    celda_p = np.floor((puntos - origen) / h).astype(np.int64)
+    max_f, max_c = int(celda_p[:, 1].max()), int(celda_p[:, 0].max())
+    ancho = max_c + 1
+    clave = celda_p[:, 1] * ancho + celda_p[:, 0]
+    orden = np.argsort(clave, kind="stable")
+    clave = clave[orden]
+    celda_q = np.floor((consultas - origen) / h)
+    # Consultas muy lejos de los sensores: basta acotarlas a un margen fuera de la rejilla
+    fq = np.clip(celda_q[:, 1], -1, max_f + 1).astype(np.int64)
+    cq = np.clip(celda_q[:, 0], -1, max_c + 1).astype(np.int64)
+
+    pendientes = np.arange(m)
+    r = 1
+    while len(pendientes):
+        # Lotes de consultas para que los pares candidatos no pasen de _ELEMENTOS_POR_BLOQUE
+        lote = max(1, _ELEMENTOS_POR_BLOQUE // max(k * (2 * r + 1) ** 2, 1))
+        siguen = []
+        for q0 in range(0, len(pendientes), lote):
+            q = pendientes[q0:q0 + lote]
+            c_ini = np.clip(cq[q] - r, 0, max_c)
+            c_fin = np.clip(cq[q] + r, 0, max_c)
+            partes_q, partes_p = [], []
+            # Solo las filas de celdas que existen (no las 2r+1 si la rejilla es más baja)
+            for fila in range(max(0, int(fq[q].min()) - r), min(max_f, int(fq[q].max()) + r) + 1):
+                ok = np.abs(fq[q] - fila) <= r
+                ini = np.searchsorted(clave, fila * ancho + c_ini, side="left")
+                fin = np.searchsorted(clave, fila * ancho + c_fin, side="right")
+                cuenta = np.where(ok, fin - ini, 0)
+                total = int(cuenta.sum())
+                if total:
+                    desde = np.repeat(ini - (np.cumsum(cuenta) - cuenta), cuenta)
+                    partes_q.append(np.repeat(q, cuenta))
+                    partes_p.append(orden[desde + np.arange(total)])
+            if partes_q:
+                qi, pj = np.concatenate(partes_q), np.concatenate(partes_p)
+                d = np.sqrt(((consultas[qi] - puntos[pj]) ** 2).sum(axis=1))
+                qi, pj, d, rango = _top_k(qi, pj, d, k, float(d.max()) + h)
+                dist[qi, rango] = d
+                idx[qi, rango] = pj
+            # Resuelta: el k-ésimo está a <= r·h, o el cuadrado ya cubre todas las celdas
+            cubre = (fq[q] - r <= 0) & (fq[q] + r >= max_f) & (cq[q] - r <= 0) & (cq[q] + r >= max_c)
+            siguen.append(q[~((dist[q, -1] <= r * h) | cubre)])
+        pendientes = np.concatenate(siguen)
+        if radio_max is not None and r * h >= radio_max:
+            break  # lo que queda fuera del cuadrado está más lejos que radio_max
+        r *= 2
+    return dist, idx
+
+
+def vecinos(puntos: np.ndarray, consultas: np.ndarray, k: int, radio_max: float | None = None):
+    """
+    (distancias, índices) de los k puntos más cercanos a cada consulta (arrays n × k).
+    Con `radio_max` los vecinos más lejanos que eso pueden quedar como distancia inf.
+    """
+    arbol = _kdtree()
+    if arbol is None:
+        return _knn_rejilla(puntos, consultas, k, radio_max)
+    k = min(k, len(puntos))
+    limite = np.inf if radio_max is None else radio_max
+    dist, idx = arbol(puntos).query(consultas, k=k, distance_upper_bound=limite, workers=-1)
+    dist, idx = dist.reshape(len(consultas), k), idx.reshape(len(consultas), k)
+    idx[np.isinf(dist)] = 0  # cKDTree marca los faltantes con índice n
+    return dist, idx
+
+
+def idw(puntos: np.ndarray, valores: np.ndarray, consultas: np.ndarray, k: int = SUPERFICIE_K,
+        potencia: float = 2.0, radio_km: float | None = SUPERFICIE_RADIO_KM) -> np.ndarray:
+    """
+    Interpolación IDW con los k vecinos dentro de `radio_km`; una consulta sobre un sensor
+    toma su valor exacto y una sin sensores en el radio queda NaN.
+    """
+    dist, idx = vecinos(puntos, consultas, k, radio_km)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pesos = 1.0 / dist ** potencia
+        exacto = dist[:, 0] == 0
+        pesos[exacto] = 0.0
+        pesos[exacto, 0] = 1.0
+        z = (pesos * valores[idx]).sum(axis=1) / pesos.sum(axis=1)
+    if radio_km is not None:
+        z[dist.min(axis=1) > radio_km] = np.nan
+    return z
+
+
+def sensores(df: pd.DataFrame, metrica: str) -> pd.DataFrame:
+    """Media de la métrica por posición (lat, lon)."""
+    d = df[["lat", "lon", metrica]].dropna()
+    return d.groupby(["lat", "lon"], sort=False)[metrica].mean().reset_index()
+
+
+@perfilado("surface.superficie")
+def superficie(df: pd.DataFrame, metrica: str = "iac", resolucion: int = SUPERFICIE_RESOLUCION,
+               k: int = SUPERFICIE_K, potencia: float = 2.0, radio_km: float | None = SUPERFICIE_RADIO_KM,
+               margen: float = 0.02) -> Superficie | None:
+    """Rejilla de `resolucion` × `resolucion` sobre el bbox de los sensores (None si no hay datos)."""
+    if not {"lat", "lon", metrica}.issubset(df.columns):
+        return None
+    s = sensores(df, metrica)
+    if s.empty:
+        return None
+    lat_s, lon_s = s["lat"].to_numpy(dtype=np.float64), s["lon"].to_numpy(dtype=np.float64)
+    lat0 = float(lat_s.mean())
+    alto, ancho = np.ptp(lat_s), np.ptp(lon_s)
+    lat = np.linspace(lat_s.min() - alto * margen, lat_s.max() + alto * margen, resolucion)
+    lon = np.linspace(lon_s.min() - ancho * margen, lon_s.max() + ancho * margen, resolucion)
+    lat_q, lon_q = np.meshgrid(lat, lon, indexing="ij")
+    z = idw(_a_km(lat_s, lon_s, lat0), s[metrica].to_numpy(dtype=np.float64),
+            _a_km(lat_q.ravel(), lon_q.ravel(), lat0), k=k, potencia=potencia, radio_km=radio_km)
+    return Superficie(metrica, lat, lon, z.reshape(resolucion, resolucion), len(s))
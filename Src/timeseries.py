@@ -0,0 +1,138 @@
+# src/timeseries.py
+"""
+Series de tiempo por zona. El loader combina fecha+hora en la columna `ts` una sola vez;
+aquí `MotorTemporal` agrega a una base horaria (suma y conteo por zona/hora) y de ella
+deriva día/semana/mes/año sin volver a tocar las lecturas crudas. Cada resultado queda
+en caché dentro del motor, así que cambiar de granularidad en la UI es inmediato.
+"""
+import numpy as np
+import pandas as pd
+
+# Etiqueta de UI -> periodo de pandas
+GRANULARIDADES = {
+    "hora": "h",
+    "día": "D",
+    "semana": "W-SUN",
+    "mes": "M",
+    "año": "Y",
+}
+
+
+def _tomar(codigos: np.ndarray, valores: np.ndarray, vacio) -> np.ndarray:
+    """valores[codigos] con -1 (nulo en factorize) -> `vacio`."""
+    return np.append(valores, np.array([vacio], dtype=valores.dtype))[codigos]
+
+
+def combinar_fecha_hora(fecha: pd.Series, hora: pd.Series | None = None) -> pd.Series:
+    """
+    Timestamp a partir de fecha (+ hora "HH:MM[:SS]" si existe). Se parsean solo los
+    valores únicos: con lecturas cada 5 min hay pocas fechas/horas distintas por millón de filas.
+    """
+    if pd.api.types.is_datetime64_any_dtype(fecha):
+        base = fecha.to_numpy(dtype="datetime64[ns]")
+    else:
+        codigos, unicos = pd.factorize(fecha)
+        dias = pd.to_datetime(pd.Series(unicos, dtype=object), errors="coerce").to_numpy(dtype="datetime64[ns]")
+        base = _tomar(codigos, dias, np.datetime64("NaT", "ns"))
+    if hora is not None:
+        if pd.api.types.is_numeric_dtype(hora):
+            offset = pd.to_timedelta(hora, unit="h").to_numpy(dtype="timedelta64[ns]")
+        else:
+            codigos, unicos = pd.factorize(hora)
+            texto = pd.Series(unicos, dtype=object).astype(str).str.strip()
+            texto = texto.where(texto.str.count(":") >= 2, texto + ":00")
+            horas = pd.to_timedelta(texto, errors="coerce").to_numpy(dtype="timedelta64[ns]")
+            offset = _tomar(codigos, horas, np.timedelta64("NaT", "ns"))
+        # Sin hora válida se queda la medianoche de la fecha
+        base = base + np.where(np.isnat(offset), np.timedelta64(0, "ns"), offset)
+    return pd.Series(base, index=fecha.index, name="ts")
+
+
+def _periodo(ts: pd.Series, granularidad: str) -> pd.Series:
+    freq = GRANULARIDADES[granularidad]
+    if freq in ("h", "D"):
+        return ts.dt.floor(freq)
+    return ts.dt.to_period(freq).dt.start_time
+
+
+class MotorTemporal:
+    """Remuestreo por zona con base horaria precalculada y caché por consulta."""
+
+    def __init__(self, df: pd.DataFrame, metricas=("iac",), zona: str = "nombre"):
+        self.metricas = [m for m in metricas if m in df.columns]
+        self.zona = zona if zona in df.columns else None
+        self._cache = {}
+        self.base = self._base_horaria(df)
+
+    def _base_horaria(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Suma y conteo por (zona, hora): la única pasada sobre las lecturas."""
+        if "ts" not in df.columns or not self.metricas:
+            return pd.DataFrame(columns=["nombre", "ts"])
+        ts = df["ts"]
+        validas = ts.notna().to_numpy()
+        datos = {"ts": ts[validas].dt.floor("h").to_numpy()}
+        datos["nombre"] = df[self.zona].to_numpy()[validas] if self.zona else "todas"
+        for m in self.metricas:
+            v = df[m].to_numpy(dtype=np.float64, na_value=np.nan)[validas]
+            datos[f"{m}_suma"] = np.nan_to_num(v)
+            datos[f"{m}_n"] = (~np.isnan(v)).astype(np.int64)
+        base = pd.DataFrame(datos)
+        return base.groupby(["nombre", "ts"], sort=True, observed=True).sum().reset_index()
+
+    def _agregar(self, granularidad: str, por_zona: bool) -> pd.DataFrame:
+        """Sumas/conteos por periodo (y zona) derivados de la base horaria."""
+        clave = ("sumas", granularidad, por_zona)
+        if clave not in self._cache:
+            b = self.base
+            grupos = ["nombre", "ts"] if por_zona else ["ts"]
+            if b.empty:
+                self._cache[clave] = pd.DataFrame(columns=grupos)
+            else:
+                b = b.assign(ts=_periodo(b["ts"], granularidad)) if granularidad != "hora" else b
+                self._cache[clave] = (b.drop(columns=[] if por_zona else ["nombre"])
+                                       .groupby(grupos, sort=True, observed=True).sum().reset_index())
+        return self._cache[clave]
+
+    def resample(self, granularidad: str = "día", por_zona: bool = True) -> pd.DataFrame:
+        """Promedio por periodo: columnas [nombre], ts y una por métrica."""
+        if granularidad not in GRANULARIDADES:
+            raise ValueError(f"Granularidad no soportada: {granularidad!r} (usa {list(GRANULARIDADES)})")
+        clave = ("media", granularidad, por_zona)
+        if clave not in self._cache:
+            s = self._agregar(granularidad, por_zona)
+            out = s[["nombre", "ts"] if por_zona else ["ts"]].copy()
+            for m in self.metricas:
+                if f"{m}_suma" in s:
+                    out[m] = s[f"{m}_suma"] / s[f"{m}_n"].where(s[f"{m}_n"] > 0)
+            self._cache[clave] = out
+        return self._cache[clave]
+
+    def rolling(self, granularidad: str = "día", ventana: int = 7, por_zona: bool = True) -> pd.DataFrame:
+        """
+        Media móvil de los últimos `ventana` periodos de calendario (ponderada por número de
+        lecturas: es la media exacta de las lecturas en la ventana, no el promedio de promedios).
+        Los periodos sin lecturas cuentan dentro de la ventana aunque no tengan fila.
+        """
+        clave = ("rolling", granularidad, ventana, por_zona)
+        if clave not in self._cache:
+            s = self._agregar(granularidad, por_zona)
+            out = self.resample(granularidad, por_zona).copy()
+            if ventana > 1 and len(s):
+                # Número de periodo de calendario; con la zona delante (separadas por más de
+                # `ventana`) la llave queda ordenada y una ventana nunca cruza a otra zona
+                periodo = s["ts"].dt.to_period(GRANULARIDADES[granularidad]).array.asi8
+                llave = periodo - periodo.min()
+                if por_zona:
+                    llave = pd.factorize(s["nombre"])[0] * (int(llave.max()) + ventana + 1) + llave
+                inicio = np.searchsorted(llave, llave - (ventana - 1), side="left")
+
+                def _ventana(col):
+                    acum = np.concatenate(([0], np.cumsum(s[col].to_numpy())))
+                    return acum[1:] - acum[inicio]
+
+                for m in self.metricas:
+                    if f"{m}_suma" in s:
+                        n = _ventana(f"{m}_n")
+                        out[m] = np.divide(_ventana(f"{m}_suma"), n, out=np.full(len(n), np.nan), where=n > 0)
+            self._cache[clave] = out
+        return self._cache[clave]
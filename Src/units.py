@@ -0,0 +1,52 @@
+# src/units.py
+"""
+Unidades de las métricas. Cada métrica se guarda UNA vez en su unidad canónica
+(la decide data_loader al ingerir) y el df lleva la descripción en df.attrs["unidades"].
+Gráficas y KPIs leen esa metadata en lugar de volver a escanear la columna.
+"""
+import pandas as pd
+
+# Unidad canónica tras load_dataset
+CANONICAL_UNITS = {
+    "iac": "fraccion",        # 0–1
+    "seguridad": "fraccion",  # 0–1
+    "impacto": "porcentaje",  # 0–100
+    "co2": "ppm",
+    "ruido": "dB",
+    "temperatura": "°C",
+    "lat": "grados",
+    "lon": "grados",
+}
+
+_FACTOR_A_PORCENTAJE = {"fraccion": 100.0, "porcentaje": 1.0}
+
+
+def set_units(df: pd.DataFrame, unidades: dict | None = None) -> pd.DataFrame:
+    """
+    Marca las unidades indicadas (se suman a las ya declaradas). Nada se asume: una columna
+    sin unidad declarada queda sin unidad. Modifica attrs in-place.
+    """
+    todas = {**df.attrs.get("unidades", {}), **(unidades or {})}
+    df.attrs["unidades"] = {c: u for c, u in todas.items() if c in df.columns}
+    return df
+
+
+def units_of(df: pd.DataFrame) -> dict:
+    """Mapa columna -> unidad, solo de las columnas con unidad declarada."""
+    unidades = df.attrs.get("unidades", {})
+    return {c: unidades[c] for c in df.columns if c in unidades}
+
+
+def unit_of(df: pd.DataFrame, col: str) -> str | None:
+    return df.attrs.get("unidades", {}).get(col)
+
+
+def as_percent(df: pd.DataFrame, col: str = "iac") -> pd.Series:
+    """La columna en escala 0–100 según su unidad declarada (sin escanear valores)."""
+    unidad = unit_of(df, col)
+    if unidad is None:
+        raise ValueError(f"La columna {col!r} no tiene unidad declarada (set_units): no se adivina la escala")
+    if unidad not in _FACTOR_A_PORCENTAJE:
+        raise ValueError(f"La columna {col!r} está en {unidad!r}, no es convertible a porcentaje")
+    factor = _FACTOR_A_PORCENTAJE[unidad]
+    return df[col] * factor if factor != 1.0 else df[col]
@@ -3,6 +3,7 @@
 # Ejecuta: streamlit run urbesense_main.py
 
 import os
+import sys
 from pathlib import Path
 from typing import Dict, Tuple
 
@@ -11,6 +12,15 @@ import numpy as np
 import streamlit as st
 import plotly.express as px
 
+# Raíz del proyecto en sys.path para usar el paquete src (este script vive dentro de src/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.sketches import ResumenKPI, EstadisticasDescribe
+from src.utils import file_signature
+from src.export import FORMATOS, clave_version, exportar, ruta_export, mime_de
+
 # ==========================
 # Configuración / Parámetros
 # ==========================
@@ -134,100 +144,153 @@ with st.sidebar:
     default_path = st.text_input("o indica ruta local", value="dataset.csv")
     st.caption("Sugerencia: coloca dataset.csv en el mismo directorio del script.")
 
-    st.header("Parámetros (semana)")
-    iac_inactiva = st.slider("Umbral IAC inactiva", 0.0, 1.0, float(DEFAULTS["iac_inactiva"]), 0.01)
-    ruido_alto = st.number_input("Ruido alto (dB)", value=float(DEFAULTS["ruido_alto"]), step=1.0)
-    co2_alto = st.number_input("CO₂ alto (ppm)", value=float(DEFAULTS["co2_alto"]), step=50.0)
-    temp_alta = st.number_input("Temperatura alta (°C)", value=float(DEFAULTS["temp_alta"]), step=0.5)
+# Todo lo cacheado va por (ruta, firma): cambia solo si cambia el archivo.
+# cache_resource: un solo DataFrame compartido entre reruns/sesiones; es de solo lectura
+# (las columnas derivadas se agregan con df.assign, nunca in-place).
+@st.cache_resource(max_entries=4)
+def cargar_dataset(ruta: str, firma) -> pd.DataFrame:
+    return load_dataset(ruta)
+
+# Resumen mergeable para los KPIs: se calcula una vez por archivo y no en cada rerun
+@st.cache_resource(max_entries=4)
+def resumen_kpis(ruta: str, firma) -> ResumenKPI:
+    return ResumenKPI().update(cargar_dataset(ruta, firma))
+
+@st.cache_resource(max_entries=4)
+def resumen_estadistico(ruta: str, firma) -> pd.DataFrame:
+    return EstadisticasDescribe().update(cargar_dataset(ruta, firma)).describe()
+
+@st.cache_resource(max_entries=4)
+def figuras(ruta: str, firma) -> dict:
+    """Figuras de las pestañas; no dependen de los umbrales, así que se arman una vez por archivo."""
+    df = cargar_dataset(ruta, firma)
+    figs = {}
+    if {"nombre", "impacto"}.issubset(df.columns):
+        figs["impacto"] = px.bar(df, x="nombre", y="impacto", title="Impacto por zona")
+    if {"iac", "seguridad"}.issubset(df.columns):
+        figs["iac_seguridad"] = px.scatter(df, x="seguridad", y="iac",
+                                           hover_data=["nombre"] if "nombre" in df.columns else None,
+                                           title="Relación IAC vs Seguridad")
+    if "nivel_impacto" in df.columns:
+        # Asegurar orden consistente
+        cat_type = pd.CategoricalDtype(categories=CATEGORIAS_IMPACTO_ORDEN, ordered=True)
+        serie = df["nivel_impacto"].astype(cat_type)
+        counts = serie.value_counts().reindex(CATEGORIAS_IMPACTO_ORDEN, fill_value=0).reset_index()
+        counts.columns = ["nivel_impacto", "cantidad"]
+        figs["niveles"] = px.pie(counts, names="nivel_impacto", values="cantidad", title="Distribución por nivel de impacto")
+    return figs
 
 # Carga de datos (uploader > ruta)
 df = None
 origin = None
+ruta_origen = None
 
 if uploaded is not None:
-    tmp_path = f".cache/{uploaded.name}"
+    # file_id en el nombre: el archivo se escribe una vez y su firma no cambia entre reruns
+    ruta_origen = f".cache/{uploaded.file_id}_{uploaded.name}"
     Path(".cache").mkdir(exist_ok=True, parents=True)
-    with open(tmp_path, "wb") as f:
-        f.write(uploaded.getbuffer())
-    df = load_dataset(tmp_path)
+    if not Path(ruta_origen).exists():
+        with open(ruta_origen, "wb") as f:
+            f.write(uploaded.getbuffer())
     origin = "uploader"
 elif Path(default_path).exists():
-    df = load_dataset(default_path)
+    ruta_origen = default_path
     origin = default_path
 
+if ruta_origen is not None:
+    firma = file_signature(ruta_origen)
+    df = cargar_dataset(str(ruta_origen), firma)
+
 if df is None or df.empty:
     st.info("Sube un CSV o indica una ruta válida para comenzar. Formato esperado: zona, CO2, ruido, IAC, temperatura, seguridad, impacto, nivel de impacto.")
     st.stop()
 
 st.success(f"Dataset cargado desde: {origin if origin else 'desconocido'}")
 
-# Flags y métricas derivadas
-df["inactiva"] = df["iac"] < iac_inactiva
-df["ruido_alto_flag"] = df["ruido"] > ruido_alto if "ruido" in df.columns else False
-df["co2_alto_flag"] = df["co2"] > co2_alto if "co2" in df.columns else False
-df["temp_alta_flag"] = df["temperatura"] > temp_alta if "temperatura" in df.columns else False
-
-# KPIs
-c1, c2, c3, c4 = st.columns(4)
-with c1:
-    st.metric("Zonas", df["nombre"].nunique() if "nombre" in df.columns else len(df))
-with c2:
-    st.metric("Inactivas (<IAC)", int(df["inactiva"].sum()))
-with c3:
-    if "impacto" in df.columns:
-        st.metric("Impacto medio", f"{df['impacto'].mean():.1f}")
-    else:
-        st.metric("Impacto medio", "—")
-with c4:
-    if "nivel_impacto" in df.columns:
-        counts = df["nivel_impacto"].value_counts()
-        top_cat = counts.idxmax()
-        st.metric("Nivel de impacto más común", f"{top_cat} ({counts.max()})")
-    else:
-        st.metric("Nivel de impacto más común", "—")
-
-st.subheader("Vista de datos")
-st.dataframe(df, use_container_width=True)
+# Sección de parámetros: es un fragmento, así que mover un umbral re-ejecuta solo
+# KPIs, vista y export; validación, resumen y gráficas no se tocan.
+@st.fragment
+def seccion_parametros(ruta: str, firma):
+    df = cargar_dataset(ruta, firma)
+    st.subheader("Parámetros (semana)")
+    p1, p2, p3, p4 = st.columns(4)
+    iac_inactiva = p1.slider("Umbral IAC inactiva", 0.0, 1.0, float(DEFAULTS["iac_inactiva"]), 0.01)
+    ruido_alto = p2.number_input("Ruido alto (dB)", value=float(DEFAULTS["ruido_alto"]), step=1.0)
+    co2_alto = p3.number_input("CO₂ alto (ppm)", value=float(DEFAULTS["co2_alto"]), step=50.0)
+    temp_alta = p4.number_input("Temperatura alta (°C)", value=float(DEFAULTS["temp_alta"]), step=0.5)
+
+    # Flags y métricas derivadas (copia ligera; el DataFrame cacheado no se modifica)
+    vista = df.assign(
+        inactiva=df["iac"] < iac_inactiva,
+        ruido_alto_flag=df["ruido"] > ruido_alto if "ruido" in df.columns else False,
+        co2_alto_flag=df["co2"] > co2_alto if "co2" in df.columns else False,
+        temp_alta_flag=df["temperatura"] > temp_alta if "temperatura" in df.columns else False,
+    )
+
+    # KPIs (desde el resumen; el umbral de IAC se resuelve con el histograma, sin escanear df)
+    kpis = resumen_kpis(ruta, firma).kpis(umbral_iac=iac_inactiva * 100.0)
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        st.metric("Zonas", kpis["zonas"] if "nombre" in df.columns else len(df))
+    with c2:
+        st.metric("Inactivas (<IAC)", kpis["bajo_umbral"])
+    with c3:
+        if "impacto" in df.columns:
+            st.metric("Impacto medio", f"{kpis['impacto_medio']:.1f}")
+        else:
+            st.metric("Impacto medio", "—")
+    with c4:
+        if kpis["nivel_mas_comun"] is not None:
+            st.metric("Nivel de impacto más común", f"{kpis['nivel_mas_comun']} ({kpis['nivel_mas_comun_n']})")
+        else:
+            st.metric("Nivel de impacto más común", "—")
+
+    st.subheader("Vista de datos")
+    st.dataframe(vista, use_container_width=True)
+
+    # Export opcional del dataset procesado: se escribe solo al pedirlo y queda en disco por versión
+    st.subheader("Exportar")
+    version_export = clave_version(ruta, firma, iac_inactiva, ruido_alto, co2_alto, temp_alta)
+    formato = st.selectbox("Formato", list(FORMATOS), index=list(FORMATOS).index("csv.gz"))
+    archivo_export = ruta_export(version_export, formato)
+    if not archivo_export.exists() and st.button("Preparar archivo"):
+        with st.spinner("Exportando..."):
+            archivo_export = exportar(vista, formato, version_export)
+    if archivo_export.exists():
+        with open(archivo_export, "rb") as f:
+            st.download_button(f"Descargar {formato}", data=f, file_name=f"dataset_procesado{FORMATOS[formato][0]}",
+                               mime=mime_de(formato))
+
+seccion_parametros(str(ruta_origen), firma)
 
 # Validación (similar a validardataset.py)
 st.subheader("Validación de rangos")
 val = validar_rangos(df.rename(columns={"co2": "CO2"}))  # la validación original usa 'CO2' mayúscula
 st.dataframe(val, use_container_width=True)
 
+st.subheader("Resumen estadístico")
+st.dataframe(resumen_estadistico(str(ruta_origen), firma), use_container_width=True)
+
 # Gráficas
 charts = st.tabs(["Impacto vs Zona", "IAC vs Seguridad", "Distribución por Nivel de Impacto"])
+figs = figuras(str(ruta_origen), firma)
 
 with charts[0]:
-    if {"nombre", "impacto"}.issubset(df.columns):
-        fig = px.bar(df, x="nombre", y="impacto", title="Impacto por zona")
-        st.plotly_chart(fig, use_container_width=True)
+    if "impacto" in figs:
+        st.plotly_chart(figs["impacto"], use_container_width=True)
     else:
         st.info("Faltan columnas para esta gráfica.")
 
 with charts[1]:
-    if {"iac", "seguridad"}.issubset(df.columns):
-        fig = px.scatter(df, x="seguridad", y="iac",
-                         hover_data=["nombre"] if "nombre" in df.columns else None,
-                         title="Relación IAC vs Seguridad")
-        st.plotly_chart(fig, use_container_width=True)
+    if "iac_seguridad" in figs:
+        st.plotly_chart(figs["iac_seguridad"], use_container_width=True)
     else:
         st.info("Faltan columnas para esta gráfica.")
 
 with charts[2]:
-    if "nivel_impacto" in df.columns:
-        # Asegurar orden consistente
-        cat_type = pd.CategoricalDtype(categories=CATEGORIAS_IMPACTO_ORDEN, ordered=True)
-        serie = df["nivel_impacto"].astype(cat_type)
-        counts = serie.value_counts().reindex(CATEGORIAS_IMPACTO_ORDEN, fill_value=0).reset_index()
-        counts.columns = ["nivel_impacto", "cantidad"]
-        fig = px.pie(counts, names="nivel_impacto", values="cantidad", title="Distribución por nivel de impacto")
-        st.plotly_chart(fig, use_container_width=True)
+    if "niveles" in figs:
+        st.plotly_chart(figs["niveles"], use_container_width=True)
     else:
         st.info("Falta columna 'nivel de impacto'.")
 
-# Export opcional del dataset procesado
-st.subheader("Exportar")
-csv_bytes = df.to_csv(index=False).encode("utf-8")
-st.download_button("Descargar CSV procesado", data=csv_bytes, file_name="dataset_procesado.csv", mime="text/csv")
-
 st.caption("Tip: guarda tus umbrales preferidos en un JSON y cárgalos al inicio si quieres persistencia entre sesiones.")
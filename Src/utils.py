@@ -4,6 +4,8 @@ import pandas as pd
 import os
 from pathlib import Path
 
+from .perf import perfilado
+
 def file_signature(path: str | os.PathLike):
     p = Path(path)
     if not p.exists():
@@ -12,21 +14,28 @@ def file_signature(path: str | os.PathLike):
     return (int(stat.st_mtime), int(stat.st_size))
 
 def coerce_numeric(df: pd.DataFrame, cols):
-    d = df.copy()
-    for c in cols:
-        d[c] = pd.to_numeric(d[c], errors="coerce")
-    return d
+    # Solo se reemplazan las columnas que aún no son numéricas; el resto se comparte (CoW)
+    nuevas = {c: pd.to_numeric(df[c], errors="coerce") for c in cols
+              if not pd.api.types.is_numeric_dtype(df[c])}
+    return df.assign(**nuevas) if nuevas else df
 
+@perfilado("utils.filter_df")
 def filter_df(df: pd.DataFrame, *, q=None, iac_min=0, iac_max=100, fecha_min=None, fecha_max=None):
-    d = df.copy()
+    # Una sola máscara y una sola selección al final (en vez de copiar y filtrar por pasos)
+    mask = (df["iac"] >= iac_min) & (df["iac"] <= iac_max)
     if q:
         qlow = q.strip().lower()
-        d = d[d["nombre"].astype(str).str.lower().str.contains(qlow)]
-    d = d[(d["iac"] >= iac_min) & (d["iac"] <= iac_max)]
-    if "fecha" in d.columns:
-        d["fecha"] = pd.to_datetime(d["fecha"], errors="coerce")
-        if fecha_min is not None: d = d[d["fecha"] >= pd.to_datetime(fecha_min)]
-        if fecha_max is not None: d = d[d["fecha"] <= pd.to_datetime(fecha_max)]
+        mask &= df["nombre"].astype(str).str.lower().str.contains(qlow)
+    fechas = fechas_nuevas = None
+    if "fecha" in df.columns:
+        fechas = df["fecha"]
+        if not pd.api.types.is_datetime64_any_dtype(fechas):
+            fechas = fechas_nuevas = pd.to_datetime(fechas, errors="coerce")
+        if fecha_min is not None: mask &= fechas >= pd.to_datetime(fecha_min)
+        if fecha_max is not None: mask &= fechas <= pd.to_datetime(fecha_max)
+    d = df[mask]
+    if fechas_nuevas is not None:
+        d = d.assign(fecha=fechas_nuevas[mask])
     return d
 
 def missing_columns(cols: Iterable[str], expected: Iterable[str]) -> List[str]:
@@ -38,4 +47,10 @@ def color_from_iac(iac: float, hi: int = 70, mid: int = 40) -> str:
     # Colores para Plotly (hex)
     if iac >= hi:  return "#2ECC71"  # verde
     if iac >= mid: return "#F1C40F"  # amarillo
-    return "#E74C3C"                 # rojo
\ No newline at end of file
+    return "#E74C3C"                 # rojo
+
+def colors_from_iac(values, hi: int = 70, mid: int = 40):
+    # Versión vectorizada de color_from_iac (mismos colores; NaN cae en rojo)
+    import numpy as np
+    v = np.asarray(values, dtype=float)
+    return np.select([v >= hi, v >= mid], ["#2ECC71", "#F1C40F"], default="#E74C3C")
\ No newline at end of file
@@ -1,28 +1,79 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
-df= pd.read_csv("dataset.csv")
+# Raíz del proyecto en sys.path para usar el paquete src (este script vive dentro de src/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.sketches import EstadisticasDescribe
+
+RUTA = "dataset.csv"
+CHUNKSIZE = 200_000
+PARTICIONES_HASH = 64  # archivos temporales para contar duplicados exactos con memoria acotada
+
+RANGOS = {
+    "CO2": (20, 60),
+    "ruido": (30, 70),
+    "IAC": (0.2, 1),
+    "temperatura": (15, 35),
+    "seguridad": (0.2, 1),
+    "impacto": (0, 100),
+}
 
 print("Validando datos")
 
-duplicados= df.duplicated().sum()
+# Se lee por chunks: rangos y describe() se acumulan sin tener el archivo completo en memoria.
+# Duplicados: el hash de cada fila (8 bytes) va a disco, repartido en PARTICIONES_HASH archivos
+# según su valor; las filas iguales caen en la misma partición y cada una se cuenta por separado,
+# así que la memoria es ~1/PARTICIONES_HASH de los hashes y el conteo sigue siendo exacto
+temporal = tempfile.TemporaryDirectory(prefix="validar_")
+particiones = [open(Path(temporal.name) / f"{i:03d}.u64", "wb") for i in range(PARTICIONES_HASH)]
+fuera = {col: 0 for col in RANGOS}
+presentes = set()
+estadisticas = EstadisticasDescribe()
+
+for df in pd.read_csv(RUTA, chunksize=CHUNKSIZE):
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    destino = hashes % PARTICIONES_HASH
+    orden = np.argsort(destino, kind="stable")
+    cortes = np.searchsorted(destino[orden], np.arange(PARTICIONES_HASH + 1))
+    for i, f in enumerate(particiones):
+        hashes[orden[cortes[i]:cortes[i + 1]]].tofile(f)
+
+    for columna, (minimo, maximo) in RANGOS.items():
+        if columna in df.columns:
+            presentes.add(columna)
+            fuera[columna] += int(((df[columna] < minimo) | (df[columna] > maximo)).sum())
+
+    estadisticas.update(df)
+
+duplicados = 0
+for f in particiones:
+    f.close()
+    h = np.fromfile(f.name, dtype=np.uint64)
+    duplicados += len(h) - len(np.unique(h))
+temporal.cleanup()
+
 if duplicados == 0:
     print("No hay filas duplicadas")
 else:
     print(f"Se encontraron {duplicados} filas duplicadas")
 
 def revisar_rangos(columna, minimo, maximo):
-    fueraderango= df[(df[columna]< minimo)| (df[columna]> maximo)]
-    if fueraderango.empty:
+    if columna not in presentes:
+        return
+    if fuera[columna] == 0:
         print(f"{columna}: todos los valores están dentro de rango ({minimo}-{maximo}).")
     else:
-        print(f"{columna}:{len(fueraderango)}valores fuera de rango  ({minimo}-{maximo}).")
+        print(f"{columna}:{fuera[columna]}valores fuera de rango  ({minimo}-{maximo}).")
 
-revisar_rangos("CO2",20, 60 )
-revisar_rangos("ruido", 30, 70 )
-revisar_rangos("IAC",0.2, 1 )
-revisar_rangos("temperatura",15, 35)
-revisar_rangos("seguridad", 0.2,1)
-revisar_rangos("impacto",0,100)
+for columna, (minimo, maximo) in RANGOS.items():
+    revisar_rangos(columna, minimo, maximo)
 
 print("Resumen del dataset")
-print(df.describe())
+print(estadisticas.describe())
@@ -0,0 +1,131 @@
+# src/zones.py
+"""
+Asignación de lecturas a zonas oficiales (polígonos municipales en GeoJSON local).
+
+- `cargar_zonas(path)`: lee Polygon/MultiPolygon y precalcula aristas y bbox (en caché
+  por firma del archivo).
+- `puntos_en_zonas(lat, lon, zonas)`: prefiltro por bbox (puntos ordenados por lon +
+  searchsorted) y ray casting vectorizado por bloques de puntos × aristas.
+- `asignar_zonas_oficiales(df)`: etapa del pipeline; agrega `zona_oficial` (categoría).
+Coordenadas GeoJSON en orden [lon, lat]. El primer polígono que contiene al punto gana.
+"""
+import functools
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import ZONAS_GEOJSON, ZONAS_PROPIEDAD
+from .perf import perfilado
+from .utils import file_signature
+
+_ELEMENTOS_POR_BLOQUE = 4_000_000  # puntos × aristas por bloque del ray casting
+
+
+class Zona:
+    """Un polígono (exterior + huecos) con su id; un MultiPolygon son varias Zona con el mismo id."""
+
+    def __init__(self, zona_id, anillos):
+        self.id = zona_id
+        # Aristas por anillo: (x_i, y_i, x_j, y_j)
+        self.anillos = []
+        for anillo in anillos:
+            a = np.asarray(anillo, dtype=np.float64)[:, :2]
+            if len(a) and not np.array_equal(a[0], a[-1]):
+                a = np.vstack([a, a[:1]])
+            self.anillos.append((a[:-1, 0], a[:-1, 1], a[1:, 0], a[1:, 1]))
+        exterior = np.asarray(anillos[0], dtype=np.float64)
+        self.bbox = (exterior[:, 0].min(), exterior[:, 1].min(), exterior[:, 0].max(), exterior[:, 1].max())
+
+    def contiene(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """Dentro del exterior y fuera de todos los huecos."""
+        dentro = _dentro_anillo(lon, lat, *self.anillos[0])
+        for hueco in self.anillos[1:]:
+            if dentro.any():
+                dentro &= ~_dentro_anillo(lon, lat, *hueco)
+        return dentro
+
+
+def _dentro_anillo(x, y, xi, yi, xj, yj) -> np.ndarray:
+    """Ray casting (regla par-impar) de muchos puntos contra un anillo, por bloques."""
+    salida = np.zeros(len(x), dtype=bool)
+    bloque = max(1, _ELEMENTOS_POR_BLOQUE // max(len(xi), 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i0 in range(0, len(x), bloque):
+            px = x[i0:i0 + bloque, None]
+            py = y[i0:i0 + bloque, None]
+            cruza = (yi > py) != (yj > py)
+            # Si yi == yj la arista no cruza (cruza=False) y el NaN de la división se ignora
+            cruza &= px < (xj - xi) * (py - yi) / (yj - yi) + xi
+            salida[i0:i0 + bloque] = np.count_nonzero(cruza, axis=1) % 2 == 1
+    return salida
+
+
+def _id_de(feature: dict, i: int, propiedad: str):
+    props = feature.get("properties") or {}
+    for clave in (propiedad, "nombre", "name", "id"):
+        if props.get(clave) is not None:
+            return str(props[clave])
+    return str(feature.get("id", i))
+
+
+@functools.lru_cache(maxsize=4)
+def _cargar(path: str, firma, propiedad: str) -> tuple:
+    with open(path, encoding="utf-8") as f:
+        geo = json.load(f)
+    features = geo.get("features", [geo] if geo.get("type") == "Feature" else [])
+    zonas = []
+    for i, feat in enumerate(features):
+        geom = feat.get("geometry") or {}
+        zona_id = _id_de(feat, i, propiedad)
+        if geom.get("type") == "Polygon":
+            zonas.append(Zona(zona_id, geom["coordinates"]))
+        elif geom.get("type") == "MultiPolygon":
+            zonas.extend(Zona(zona_id, partes) for partes in geom["coordinates"])
+    return tuple(zonas)
+
+
+def cargar_zonas(path=ZONAS_GEOJSON, propiedad: str = ZONAS_PROPIEDAD) -> tuple:
+    """Zonas del GeoJSON (tupla vacía si no existe). Se vuelve a leer solo si cambia el archivo."""
+    firma = file_signature(path)
+    if firma is None:
+        return ()
+    return _cargar(str(Path(path).resolve()), firma, propiedad)
+
+
+def puntos_en_zonas(lat, lon, zonas) -> np.ndarray:
+    """Índice de la zona (posición en `zonas`) que contiene cada punto, o -1."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    codigos = np.full(len(lat), -1, dtype=np.int64)
+    if not len(zonas) or not len(lat):
+        return codigos
+    # Prefiltro por bbox: con los puntos ordenados por lon, cada zona toma un rango contiguo
+    orden = np.argsort(lon, kind="stable")
+    lon_ord = lon[orden]
+    for k, zona in enumerate(zonas):
+        lon_min, lat_min, lon_max, lat_max = zona.bbox
+        i0 = int(np.searchsorted(lon_ord, lon_min, side="left"))
+        i1 = int(np.searchsorted(lon_ord, lon_max, side="right"))
+        cand = orden[i0:i1]
+        cand = cand[(codigos[cand] < 0) & (lat[cand] >= lat_min) & (lat[cand] <= lat_max)]
+        if len(cand):
+            dentro = zona.contiene(lon[cand], lat[cand])
+            codigos[cand[dentro]] = k
+    return codigos
+
+
+@perfilado("zones.asignar_zonas_oficiales")
+def asignar_zonas_oficiales(df: pd.DataFrame, path=ZONAS_GEOJSON, propiedad: str = ZONAS_PROPIEDAD) -> pd.DataFrame:
+    """Agrega `zona_oficial` (categoría; NaN fuera de todo polígono). Sin GeoJSON no hace nada."""
+    zonas = cargar_zonas(path, propiedad)
+    if not zonas or not {"lat", "lon"}.issubset(df.columns):
+        return df
+    codigos = puntos_en_zonas(df["lat"].to_numpy(dtype=np.float64, na_value=np.nan),
+                              df["lon"].to_numpy(dtype=np.float64, na_value=np.nan), zonas)
+    # Varias partes de un MultiPolygon comparten id: se mapean a una sola categoría
+    ids = pd.Index([z.id for z in zonas])
+    categorias = ids.unique()
+    por_zona = np.append(categorias.get_indexer(ids), -1)
+    return df.assign(zona_oficial=pd.Categorical.from_codes(por_zona[codigos], categories=categorias))
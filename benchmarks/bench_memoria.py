@@ -0,0 +1,142 @@
+# benchmarks/bench_memoria.py
+"""
+Pico de memoria por rerun del dashboard (main3): antes vs después de quitar copias.
+
+Cada modo corre en un subproceso limpio y reporta:
+- pico de RSS del proceso (resource.getrusage; no disponible en Windows)
+- pico de asignaciones de Python/NumPy durante el rerun (tracemalloc)
+
+El modo "antes" reproduce las copias que hacía el código original (coerce_numeric,
+filter_df, _coerce_numeric de main3, df_bubble y los df.copy() de los mapas)
+sobre las funciones actuales; "despues" usa el camino actual sin copias.
+
+Uso: python benchmarks/bench_memoria.py --filas 200000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pandas as pd
+
+NUM_COLS = ["lat", "lon", "iac", "ruido", "co2", "temperatura"]
+
+
+def _pico_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+
+# --- camino original (copias explícitas) ---
+def _coerce_antes(df, cols):
+    d = df.copy()
+    for c in cols:
+        d[c] = pd.to_numeric(d[c], errors="coerce")
+    return d
+
+
+def _filter_antes(df, iac_min, iac_max):
+    d = df.copy()
+    d = d[(d["iac"] >= iac_min) & (d["iac"] <= iac_max)]
+    if "fecha" in d.columns:
+        d["fecha"] = pd.to_datetime(d["fecha"], errors="coerce")
+    return d
+
+
+def rerun_antes(df):
+    from src.plot_layer import build_map_plotly, bubble_map_iac_mapbox
+
+    d = _coerce_antes(df, NUM_COLS)            # utils.coerce_numeric en load
+    d = _coerce_antes(d, NUM_COLS)             # main3._coerce_numeric
+    f = _filter_antes(d, 0.0, 100.0)           # utils.filter_df
+    df_bubble = f.copy()                       # main3: df_bubble
+    df_bubble["iac"] = df_bubble["iac"] * 100.0
+    bubble_map_iac_mapbox(df_bubble.copy())    # df.copy() interno original
+    build_map_plotly(f.copy())                 # df.copy() interno original
+
+
+def rerun_despues(df):
+    from src.plot_layer import build_map_plotly, bubble_map_iac_mapbox
+    from src.utils import coerce_numeric, filter_df
+
+    d = coerce_numeric(df, NUM_COLS)
+    f = filter_df(d, iac_min=0.0, iac_max=100.0)
+    df_bubble = f.assign(iac=f["iac"] * 100.0)
+    bubble_map_iac_mapbox(df_bubble)
+    build_map_plotly(f)
+
+
+def _dataset(filas: int, destino: Path) -> None:
+    from src.simulate_geo import simulate_campeche_capital
+
+    puntos = max(1, filas // 50)
+    df = simulate_campeche_capital(n_colonias=50, puntos_por_colonia=puntos, seed=7)
+    df.to_parquet(destino, index=False)
+
+
+def _medir(modo: str, datos: str) -> dict:
+    import src.config  # noqa: F401  (activa copy-on-write igual que en la app)
+
+    df = pd.read_parquet(datos)
+    base_rss = _pico_rss_mb()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    (rerun_antes if modo == "antes" else rerun_despues)(df)
+    segundos = time.perf_counter() - t0
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "modo": modo,
+        "filas": int(len(df)),
+        "segundos": round(segundos, 3),
+        "pico_tracemalloc_mb": round(pico / 2**20, 1),
+        "rss_base_mb": base_rss,
+        "pico_rss_mb": _pico_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pico de memoria por rerun: antes vs después.")
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--salida", default=None, help="JSON opcional con los resultados")
+    parser.add_argument("--_modo", help=argparse.SUPPRESS)
+    parser.add_argument("--_datos", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._modo:  # subproceso hijo
+        print(json.dumps(_medir(args._modo, args._datos)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        datos = Path(tmp) / "lecturas.parquet"
+        _dataset(args.filas, datos)
+        resultados = []
+        for modo in ("antes", "despues"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--_modo", modo, "--_datos", str(datos)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            resultados.append(json.loads(out.strip().splitlines()[-1]))
+
+    for r in resultados:
+        print(f"{r['modo']:>8}: {r['filas']} filas | {r['segundos']} s | "
+              f"tracemalloc {r['pico_tracemalloc_mb']} MB | RSS {r['rss_base_mb']} -> {r['pico_rss_mb']} MB")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
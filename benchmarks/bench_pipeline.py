@@ -0,0 +1,170 @@
+# benchmarks/bench_pipeline.py
+"""
+Benchmark reproducible del pipeline: load_dataset, filter_df, validación y mapas
+sobre datasets simulados (simulate_geo.simulate_lecturas) de distintos tamaños.
+
+Mide tiempo, filas/segundo y pico de memoria (tracemalloc vía src.perf) por etapa y
+guarda un JSON por corrida para comparar versiones y detectar regresiones de escala.
+
+Uso:
+    python benchmarks/bench_pipeline.py --tamanos 10000,1000000,10000000
+    python benchmarks/bench_pipeline.py --tamanos 10000 --comparar benchmarks/resultados/<previo>.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# La memoria se mide con tracemalloc: se activa antes de importar src
+os.environ.setdefault("URBESENSE_PERF_MEM", "1")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+import pyarrow
+
+from src import perf
+from src.data_loader import load_dataset, read_raw, resumen_validacion
+from src.plot_layer import build_map_plotly, bubble_map_iac_mapbox
+from src.simulate_geo import simulate_lecturas
+from src.utils import filter_df
+
+RESULTADOS_DIR = ROOT / "benchmarks" / "resultados"
+SEMILLA = 2025
+UMBRAL_REGRESION = 1.20  # 20% más lento o más memoria que la referencia
+
+
+def _entorno() -> dict:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        sha = None
+    return {
+        "git": sha,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pyarrow.__version__,
+        "cpus": os.cpu_count(),
+        "plataforma": platform.platform(),
+    }
+
+
+def _medir(etapa: str, filas: int, fn, repeticiones: int) -> dict:
+    """Corre fn `repeticiones` veces; se queda con el mejor tiempo y el mayor pico."""
+    tiempos, picos, salida = [], [], None
+    for _ in range(repeticiones):
+        with perf.medir(f"bench.{etapa}", filas_entrada=filas) as reg:
+            out = fn()
+            reg["filas_salida"] = int(len(out)) if isinstance(out, pd.DataFrame) else None
+        tiempos.append(reg["segundos"])
+        picos.append(reg["pico_mb"])
+        salida = reg["filas_salida"]
+    mejor = min(tiempos)
+    return {
+        "etapa": etapa,
+        "filas": filas,
+        "filas_salida": salida,
+        "segundos": mejor,
+        "filas_por_segundo": round(filas / mejor, 1) if mejor > 0 else None,
+        "pico_mb": max(p for p in picos if p is not None) if any(p is not None for p in picos) else None,
+    }
+
+
+def bench_tamano(filas: int, repeticiones: int, max_filas_mapa: int, tmp: Path) -> list:
+    df_sim = simulate_lecturas(filas, n_colonias=48, dias=30, seed=SEMILLA)
+    csv = tmp / f"lecturas_{filas}.csv"
+    df_sim.to_csv(csv, index=False)
+    del df_sim
+
+    res = [_medir("load_dataset", filas, lambda: load_dataset(str(csv)), repeticiones)]
+    for engine in ("pyarrow", "pipeline"):
+        res.append(_medir(f"load_dataset[{engine}]", filas,
+                          lambda engine=engine: load_dataset(str(csv), engine=engine), repeticiones))
+    df = load_dataset(str(csv))
+    crudo = read_raw(str(csv))
+    res.append(_medir("resumen_validacion", filas, lambda: resumen_validacion(crudo), repeticiones))
+    del crudo
+    res.append(_medir(
+        "filter_df", len(df),
+        lambda: filter_df(df, q="colonia 1", iac_min=0.3, iac_max=0.9, fecha_min=df["fecha"].min()),
+        repeticiones,
+    ))
+    for nombre, fn in (("build_map_plotly", build_map_plotly), ("bubble_map_iac_mapbox", bubble_map_iac_mapbox)):
+        if len(df) > max_filas_mapa:
+            res.append({"etapa": nombre, "filas": len(df), "omitido": f"filas > --max-filas-mapa ({max_filas_mapa})"})
+            continue
+        res.append(_medir(nombre, len(df), lambda fn=fn: fn(df), repeticiones))
+    return res
+
+
+def comparar(actual: dict, referencia: dict) -> list:
+    """Lista de (tamaño, etapa, métrica, ratio) que superan UMBRAL_REGRESION."""
+    previo = {(r["filas_dataset"], r["etapa"]): r for r in referencia["resultados"] if "omitido" not in r}
+    regresiones = []
+    for r in actual["resultados"]:
+        ref = previo.get((r["filas_dataset"], r["etapa"]))
+        if ref is None or "omitido" in r:
+            continue
+        for metrica in ("segundos", "pico_mb"):
+            if r.get(metrica) and ref.get(metrica):
+                ratio = r[metrica] / ref[metrica]
+                if ratio > UMBRAL_REGRESION:
+                    regresiones.append((r["filas_dataset"], r["etapa"], metrica, round(ratio, 2)))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de loader, filtros, validación y mapas.")
+    parser.add_argument("--tamanos", default="10000,1000000,10000000",
+                        help="filas por dataset, separadas por coma")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--max-filas-mapa", type=int, default=1_000_000,
+                        help="omite los mapas Plotly por encima de este tamaño (la figura no cabe en memoria)")
+    parser.add_argument("--salida", default=None, help="ruta del JSON (por defecto benchmarks/resultados/)")
+    parser.add_argument("--comparar", default=None, help="JSON previo para detectar regresiones")
+    args = parser.parse_args(argv)
+
+    tamanos = [int(t) for t in args.tamanos.split(",") if t.strip()]
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for filas in tamanos:
+            print(f"== {filas:,} filas")
+            for r in bench_tamano(filas, args.repeticiones, args.max_filas_mapa, Path(tmp)):
+                r["filas_dataset"] = filas
+                resultados.append(r)
+                if "omitido" in r:
+                    print(f"   {r['etapa']:<24} omitido: {r['omitido']}")
+                else:
+                    print(f"   {r['etapa']:<24} {r['segundos']:>9.3f} s  {r['filas_por_segundo'] or 0:>14,.0f} filas/s"
+                          f"  pico {r['pico_mb']} MB")
+
+    corrida = {"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "semilla": SEMILLA,
+               "entorno": _entorno(), "resultados": resultados}
+    salida = Path(args.salida) if args.salida else (
+        RESULTADOS_DIR / f"bench_{time.strftime('%Y%m%d_%H%M%S')}_{corrida['entorno']['git'] or 'local'}.json")
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(corrida, f, ensure_ascii=False, indent=2)
+    print("Resultados en", salida)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = comparar(corrida, json.load(f))
+        for filas, etapa, metrica, ratio in regresiones:
+            print(f"REGRESIÓN {etapa} @ {filas:,} filas: {metrica} x{ratio}")
+        if regresiones:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
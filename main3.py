@@ -1,4 +1,5 @@
 # para que 'src' se importe siempre
+import html
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -15,69 +16,130 @@ import numpy as np
 import altair as alt
 
 # Backend imports
-from src.config import DEFAULT_CSV
-from src.data_loader import load_dataset
-from src.utils import file_signature
-from src.plot_layer import build_map_plotly, bubble_map_iac_mapbox  # ⬅️ agregado bubble_map_iac_mapbox
+from src.ingest_worker import start_worker
+from src.snapshot import load_snapshot
+from src.data_loader import REGLAS_VALIDACION, filas_validas, rechazos, resumen_validacion
+from src.units import as_percent
+from src.perf import render_panel
+from src.sketches import ResumenKPI
+from src.timeseries import MotorTemporal, GRANULARIDADES
+from src.chart_data import (CacheSpecs, causas_principales, conteo_bajo_umbral, iac_anual, reducir_serie,
+                            riesgo_por_zona)
+from src.scenarios import BaseZonas, CacheEscenarios, barrido, escenarios_por_zona, mejor_intervencion
+from src.config import IAC_THRESHOLDS, INGEST_ESPERA_INICIAL, USAR_STORE
+from src.plot_layer import build_map_plotly, bubble_map_iac_mapbox, superficie_mapbox  # ⬅️ agregado bubble_map_iac_mapbox
+from src.surface import superficie
+from src.config import SUPERFICIE_RESOLUCION
 
 #la primera llamada es set_page_config
 st.set_page_config(page_title="Urbesense", layout="wide")
 
-def _coerce_numeric(df, cols):
-    """Convierte columnas a numéricas sin romper el dataframe."""
-    d = df.copy()
-    for c in cols:
-        if c in d.columns:
-            d[c] = pd.to_numeric(d[c], errors="coerce")
-    return d
+# Ingesta en segundo plano: un worker por proceso vigila DATA_DIR y publica snapshots
+@st.cache_resource
+def get_worker():
+    return start_worker()
 
-# Botón manual de refresco 
+worker = get_worker()
+
+# Botón manual de refresco: pide una revisión al worker, no limpia cachés ni bloquea
 if st.sidebar.button("🔄 Actualizar datos"):
-    st.cache_data.clear()
+    worker.request_rescan()
+
+# FUNCIÓN CACHED que DEPENDE de la versión publicada (el parseo ya lo hizo el worker).
+# cache_resource: todas las sesiones reciben el MISMO objeto (sin pickle ni copia por sesión);
+# el snapshot Arrow está mapeado en memoria, así que no se debe mutar.
+@st.cache_resource(max_entries=2)
+def get_snapshot(version: int, snapshot_path: str) -> pd.DataFrame:
+    # 'version' solo sirve para invalidar cache.
+    # load_dataset ya tipó y renombró las columnas al ingerir: aquí no se vuelve a copiar
+    return load_snapshot(snapshot_path)
+
+# El snapshot trae también las filas rechazadas (máscara `violaciones`, válidas primero):
+# la app trabaja con el prefijo válido, un slice sin copia
+@st.cache_resource(max_entries=2)
+def get_data(version: int, snapshot_path: str) -> pd.DataFrame:
+    return filas_validas(get_snapshot(version, snapshot_path))
+
+# Resumen de KPIs precalculado por el worker (sketches mergeables): O(1) por render
+@st.cache_resource(max_entries=2)
+def get_kpis(version: int, snapshot_path: str, kpis_path: str | None) -> ResumenKPI:
+    if kpis_path and Path(kpis_path).exists():
+        return ResumenKPI.load(kpis_path)
+    return ResumenKPI().update(get_data(version, snapshot_path))
+
+# Base horaria de la serie de tiempo por versión: cambiar de granularidad no relee lecturas
+@st.cache_resource(max_entries=2)
+def get_motor_temporal(version: int, snapshot_path: str) -> MotorTemporal:
+    return MotorTemporal(get_data(version, snapshot_path), metricas=("iac",))
+
+# Simulador de intervenciones: estado por zona por versión; los escenarios ya evaluados
+# se reutilizan por hash (la caché vive en el proceso y la comparten todas las sesiones)
+@st.cache_resource(max_entries=2)
+def get_base_zonas(version: int, snapshot_path: str) -> BaseZonas:
+    return BaseZonas.desde_df(get_data(version, snapshot_path))
+
+@st.cache_resource
+def get_cache_escenarios() -> CacheEscenarios:
+    return CacheEscenarios()
+
+def ranking_intervenciones(version: int, snapshot_path: str, deltas_iac=(0.05, 0.10, 0.20),
+                           deltas_seguridad=(0.0,)) -> pd.DataFrame:
+    base = get_base_zonas(version, snapshot_path)
+    # workers=1: en la app el barrido corre en el hilo de la petición, nunca abre un pool de
+    # procesos (los barridos masivos van por scripts/benchmarks, no por un rerun)
+    return barrido(base, escenarios_por_zona(base, deltas_iac, deltas_seguridad),
+                   cache=get_cache_escenarios(), workers=1)
+
+# KPI: mejor intervención sobre una sola zona (mejora por esfuerzo), una vez por versión
+@st.cache_resource(max_entries=2)
+def get_mejor_intervencion(version: int, snapshot_path: str) -> dict | None:
+    return mejor_intervencion(get_base_zonas(version, snapshot_path), cache=get_cache_escenarios())
+
+# Solo el arranque en frío espera al primer snapshot
+if worker.current() is None:
+    with st.spinner("Procesando datos por primera vez..."):
+        listo = worker.wait_ready(timeout=INGEST_ESPERA_INICIAL)
+    if not listo:
+        st.error("No se pudo publicar el primer snapshot de datos."
+                 + (f" Error de ingesta: {worker.ultimo_error}" if worker.ultimo_error else "")
+                 + " Revisa los archivos de entrada y pulsa «Actualizar datos».")
+        st.stop()
+snapshot = worker.current()
+if worker.ultimo_error:
+    st.sidebar.warning(f"Última ingesta falló: {worker.ultimo_error}")
 
-# FUNCIÓN CACHED que DEPENDE de la firma del archivo
-@st.cache_data
-def get_data(csv_path: str, sig):
-    # 'sig' solo sirve para invalidar cache, no lo uses adentro.
-    return load_dataset(csv_path)
+# CARGA EL DATAFRAME (AHORA SÍ EXISTE df)
+df = get_data(snapshot["version"], snapshot["path"])
 
-# DEFINE LA RUTA Y LA FIRMA ANTES DE LLAMAR get_data
-csv_path = str(DEFAULT_CSV)
-sig = file_signature(csv_path)
+# Diagnóstico de datos + panel de rendimiento (apagado por defecto)
+mostrar_diagnostico = st.sidebar.checkbox("🩺 Diagnóstico y rendimiento", value=False)
+if mostrar_diagnostico:
+    st.write("Shape tras loader:", df.shape)
 
-# CARGA EL DATAFRAME (AHORA SÍ EXISTE df)
-df = get_data(csv_path, sig)
-st.write("Shape tras loader:", df.shape)
-
-# ¿Cuántas filas tienen coordenadas válidas?
-if {"lat","lon"}.issubset(df.columns):
-    has_coords = df[["lat","lon"]].notna().all(axis=1)
-    st.write("Con lat/lon válidos:", int(has_coords.sum()))
-else:
-    st.write("El dataset no trae lat/lon.")
-
-# Revisa límites que podrían estar filtrando
-LIMITES_DEBUG = {
-    "co2": (20, 5000),     # mismo criterio adaptativo
-    "ruido": (30, 70),
-    "iac": (0.2, 1.0),
-    "temperatura": (15, 35),
-    "seguridad": (0.2, 1.0),
-    "impacto": (0, 100),
-}
-fuera = []
-for col, (mn, mx) in LIMITES_DEBUG.items():
-    if col in df.columns:
-        mask = ~(df[col].between(mn, mx))
-        if mask.any():
-            fuera.append((col, int(mask.sum()), df.loc[mask, ["nombre", col]].head(10)))
-st.write("Valores fuera de rango (muestra):", [(c, n) for c, n, _ in fuera])
-for c, n, ej in fuera:
-    st.write(f"Ejemplos fuera de {c}:", ej)
-
-# ¿Qué filas van al mapa?
-cols_preview = [c for c in ["nombre","lat","lon","iac","co2","ruido","temperatura","seguridad","impacto","nivel_impacto"] if c in df.columns]
-st.write("Primeras filas que van al mapa:", df[cols_preview].head())
+    # ¿Cuántas filas tienen coordenadas válidas?
+    if {"lat","lon"}.issubset(df.columns):
+        has_coords = df[["lat","lon"]].notna().all(axis=1)
+        st.write("Con lat/lon válidos:", int(has_coords.sum()))
+    else:
+        st.write("El dataset no trae lat/lon.")
+
+    # Filas rechazadas en la ingesta y por qué: operaciones de bits sobre el snapshot en caché
+    completo = get_snapshot(snapshot["version"], snapshot["path"])
+    if "violaciones" in completo.columns:
+        st.write("Filas rechazadas por regla:", resumen_validacion(completo))
+        reglas = st.multiselect("Reglas activas", list(REGLAS_VALIDACION), default=list(REGLAS_VALIDACION))
+        st.write("Filas válidas con esas reglas:", len(filas_validas(completo, reglas)))
+        st.write("Ejemplos rechazados:", rechazos(completo, reglas).head(10))
+
+    # Anomalías marcadas en la ingesta (EWMA por sensor, ver src/anomalies.py)
+    if "anomalia" in df.columns:
+        cols_z = [c for c in df.columns if c.startswith("z_")]
+        st.write("Lecturas anómalas:", int(df["anomalia"].sum()))
+        st.write("Ejemplos anómalos:", df.loc[df["anomalia"], ["nombre", *cols_z]].head(10))
+
+    # ¿Qué filas van al mapa?
+    cols_preview = [c for c in ["nombre","lat","lon","iac","co2","ruido","temperatura","seguridad","impacto","nivel_impacto"] if c in df.columns]
+    st.write("Primeras filas que van al mapa:", df[cols_preview].head())
 # =====================================================================
 
 # =================== ESTILOS UI (CSS tal cual) ===================
@@ -144,23 +206,14 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# =================== BACKEND: datos + caché ===================
-@st.cache_data
-def get_data(path: str) -> pd.DataFrame:
-    df = load_dataset(path)
-    df = _coerce_numeric(df, ["lat","lon","iac","ruido","co2","temperatura"])
-    # Normaliza columnas comunes por si vienen mal tipadas
-    if "nombre" not in df.columns and "zona" in df.columns:
-        df = df.rename(columns={"zona":"nombre"})
-    return df
-
-df = get_data(str(DEFAULT_CSV))
-
-# KPIs reales (si no hay datos, muestra —)
-n_zonas = len(df) if len(df) else 0
-iac_prom = f"{df['iac'].mean():.0f}%" if "iac" in df and len(df) else "—"
-areas_olvidadas = int((df["iac"]<40).sum()) if "iac" in df and len(df) else 0  # regla: IAC<40
-simulaciones = 42  # placeholder hasta que agregues módulo simulador
+# KPIs reales desde el resumen del snapshot (si no hay datos, muestra —)
+kpis = get_kpis(snapshot["version"], snapshot["path"], snapshot.get("kpis")).kpis(umbral_iac=IAC_THRESHOLDS["mid"])
+n_zonas = kpis["zonas"] if kpis["filas"] else 0
+iac_prom = f"{kpis['iac_medio']:.0f}%" if kpis["filas"] and "iac" in df else "—"
+areas_olvidadas = kpis["bajo_umbral"] if kpis["filas"] else 0  # regla: IAC<40
+mejor = get_mejor_intervencion(snapshot["version"], snapshot["path"])  # barrido por zona (src/scenarios.py)
+simulacion = f"−{mejor['mejora']:.1f}" if mejor else "—"
+detalle_simulacion = html.escape(mejor["escenario"]) if mejor else ""  # p. ej. "IAC +0.05 en Centro"
 
 # =================== MÉTRICAS (tu UI) ===================
 c1, c2, c3, c4 = st.columns(4)
@@ -171,7 +224,154 @@ with c2:
 with c3:
     st.markdown(f'<div class="metric-card"><div class="metric-label">Áreas Olvidadas</div><div class="metric-value">{areas_olvidadas}</div></div>', unsafe_allow_html=True)
 with c4:
-    st.markdown(f'<div class="metric-card"><div class="metric-label">Simulaciones</div><div class="metric-value">{simulaciones}</div></div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="metric-card"><div class="metric-label">Mejor Intervención (impacto)</div><div class="metric-value">{simulacion}</div><div class="metric-label">{detalle_simulacion}</div></div>', unsafe_allow_html=True)
+
+# =================== SECCIONES (entradas en caché por versión) ===================
+# Cada gráfica con controles propios es un st.fragment: mover su control solo re-ejecuta
+# esa sección (sin CSS, sin mapa, sin las demás gráficas).
+
+# Figura del mapa por versión: compartida entre sesiones y reruns, nunca se reconstruye en línea
+@st.cache_resource(max_entries=2)
+def get_mapa(version: int, snapshot_path: str):
+    d = get_data(version, snapshot_path)
+    # Centro sugerido (promedio de lat/lon); el componente calcula fallback si None
+    center = None
+    if {"lat","lon"}.issubset(d.columns) and d[["lat","lon"]].notna().any().all():
+        center = {"lat": float(d["lat"].mean()), "lon": float(d["lon"].mean())}
+    # El mapa lee la unidad de IAC de df.attrs: no hace falta re-escalar aquí
+    return bubble_map_iac_mapbox(d, zoom=12.0, center=center, range_size=(10, 36))
+
+# Superficie interpolada (IDW) por versión, métrica y resolución: se calcula una vez y se reusa
+@st.cache_resource(max_entries=8)
+def get_mapa_superficie(version: int, snapshot_path: str, metrica: str, resolucion: int):
+    d = get_data(version, snapshot_path)
+    cols = d[["lat", "lon", metrica]]
+    if metrica == "iac":
+        cols = cols.assign(iac=as_percent(d, "iac"))  # la superficie se muestra en 0–100
+    return superficie_mapbox(superficie(cols, metrica, resolucion=resolucion))
+
+CAPAS_MAPA = {"Burbujas (IAC)": None, "Superficie IAC": "iac", "Superficie CO₂": "co2", "Superficie ruido": "ruido"}
+
+@st.fragment
+def seccion_mapa(version: int, snapshot_path: str):
+    d = get_data(version, snapshot_path)
+    opciones = [k for k, m in CAPAS_MAPA.items() if m is None or {"lat", "lon", m}.issubset(d.columns)]
+    m1, m2 = st.columns([2, 1])
+    metrica = CAPAS_MAPA[m1.radio("Capa", opciones, horizontal=True)]
+    if metrica is None:
+        st.plotly_chart(get_mapa(version, snapshot_path), use_container_width=True)
+    else:
+        resolucion = m2.select_slider("Resolución", options=[60, SUPERFICIE_RESOLUCION, 200], value=SUPERFICIE_RESOLUCION)
+        with st.spinner("Interpolando superficie..."):
+            fig = get_mapa_superficie(version, snapshot_path, metrica, resolucion)
+        st.plotly_chart(fig, use_container_width=True)
+
+# Specs Vega-Lite ya reducidos (tablas agregadas en el servidor) por versión del snapshot.
+# Con USAR_STORE los agregados de causas, riesgo por nombre e IAC anual salen del almacén
+# SQLite; el worker lo actualiza antes de publicar, así que la versión sigue siendo la clave
+@st.cache_resource
+def get_specs() -> CacheSpecs:
+    return CacheSpecs()
+
+def spec_causas(version: int, snapshot_path: str) -> dict:
+    def construir():
+        top = causas_principales(get_data(version, snapshot_path), n=5)
+        return alt.Chart(top).mark_bar(cornerRadiusTopLeft=8, cornerRadiusTopRight=8).encode(
+            x=alt.X('causa:N', sort='-y', title="Causa"),
+            y=alt.Y('impacto:Q', title="Impacto promedio"),
+            color=alt.Color('causa:N', legend=None)
+        ).properties(height=300)
+    return get_specs().obtener(version, ("causas",), construir)
+
+def spec_serie(version: int, snapshot_path: str, granularidad: str, ventana: int) -> dict:
+    def construir():
+        serie = get_motor_temporal(version, snapshot_path).rolling(granularidad, ventana, por_zona=False)
+        return alt.Chart(reducir_serie(serie, "ts", "iac")).mark_line(point=True).encode(
+            x=alt.X('ts:T', title=granularidad.capitalize()),
+            y=alt.Y('iac:Q', title="IAC promedio")
+        ).properties(height=300)
+    return get_specs().obtener(version, ("serie", granularidad, ventana), construir)
+
+def spec_serie_anual(version: int, snapshot_path: str) -> dict:
+    def construir():
+        return alt.Chart(iac_anual(get_data(version, snapshot_path))).mark_line(point=True).encode(
+            x=alt.X('fecha:O', title="Año"),
+            y=alt.Y('iac:Q', title="IAC promedio")
+        ).properties(height=300)
+    return get_specs().obtener(version, ("serie_anual",), construir)
+
+def spec_riesgo(version: int, snapshot_path: str, col_zona: str, umbral: float) -> dict | None:
+    def construir():
+        d = get_data(version, snapshot_path)
+        # -1 en zona_cluster = lectura aislada
+        validos = d["zona_cluster"].to_numpy() >= 0 if col_zona == "zona_cluster" else None
+        if col_zona == "nombre":
+            risky = riesgo_por_zona(d, umbral, n=5)
+        else:
+            risky = conteo_bajo_umbral(d[col_zona], as_percent(d, "iac"), umbral, n=5, validos=validos)
+        if risky.empty:
+            return {}
+        if col_zona == "zona_cluster":
+            risky["Zona"] = "Zona " + risky["Zona"].astype(str)
+        return alt.Chart(risky).mark_arc(innerRadius=50).encode(
+            theta='Porcentaje:Q',
+            color='Zona:N',
+            tooltip=['Zona','Casos','Porcentaje']
+        ).properties(height=300)
+    return get_specs().obtener(version, ("riesgo", col_zona, umbral), construir) or None
+
+@st.fragment
+def seccion_serie(version: int, snapshot_path: str):
+    d = get_data(version, snapshot_path)
+    if USAR_STORE and "fecha" in d.columns:
+        # El almacén agrega por año (src/store.iac_anual): sin granularidad ni media móvil
+        st.vega_lite_chart(spec_serie_anual(version, snapshot_path), use_container_width=True)
+        return
+    motor = get_motor_temporal(version, snapshot_path)
+    if "ts" in d.columns and len(motor.base):
+        g1, g2 = st.columns(2)
+        granularidad = g1.selectbox("Granularidad", list(GRANULARIDADES), index=list(GRANULARIDADES).index("año"))
+        ventana = g2.select_slider("Media móvil (periodos)", options=[1, 3, 7, 12, 24], value=1)
+        st.vega_lite_chart(spec_serie(version, snapshot_path, granularidad, ventana), use_container_width=True)
+    else:
+        df_line = pd.DataFrame({'Año': range(2018, 2026), 'Nivel': np.random.randint(40, 100, 8)})
+        line = alt.Chart(df_line).mark_line(point=True).encode(x='Año', y='Nivel').properties(height=300)
+        st.altair_chart(line, use_container_width=True)
+
+@st.fragment
+def seccion_riesgo(version: int, snapshot_path: str):
+    d = get_data(version, snapshot_path)
+    # zona_oficial (polígonos, src/zones.py) y zona_cluster (densidad, src/clustering.py) las pone el worker
+    agrupaciones = {"Nombre": "nombre", "Zona oficial": "zona_oficial", "Zona detectada": "zona_cluster"}
+    opciones = [k for k, c in agrupaciones.items() if c == "nombre" or c in d.columns]
+    col_zona = agrupaciones[st.radio("Agrupar por", opciones, horizontal=True)] if len(opciones) > 1 else "nombre"
+    umbral = st.slider("Umbral de riesgo (IAC %)", 0, 100, int(IAC_THRESHOLDS["mid"]), 5)
+    if {col_zona,"iac"}.issubset(d.columns) and len(d):
+        spec = spec_riesgo(version, snapshot_path, col_zona, float(umbral))
+        if spec is None:
+            st.info("No se detectaron zonas densas: hay pocas lecturas por área.")
+        else:
+            st.vega_lite_chart(spec, use_container_width=True)
+    else:
+        df_pie = pd.DataFrame({'Zona': ['Centro', 'Norte', 'Sur', 'Este', 'Oeste'],
+                               'Porcentaje': [25, 20, 15, 30, 10]})
+        pie = alt.Chart(df_pie).mark_arc(innerRadius=50).encode(theta='Porcentaje', color='Zona')
+        st.altair_chart(pie, use_container_width=True)
+
+@st.fragment
+def seccion_intervenciones(version: int, snapshot_path: str):
+    if not len(get_base_zonas(version, snapshot_path)):
+        st.info("Se necesitan columnas nombre, iac y seguridad para simular intervenciones.")
+        return
+    s1, s2 = st.columns(2)
+    delta_iac = s1.select_slider("Aumento de IAC", options=[0.05, 0.10, 0.15, 0.20, 0.30], value=0.10)
+    delta_seg = s2.select_slider("Aumento de seguridad", options=[0.0, 0.05, 0.10, 0.20], value=0.0)
+    ranking = ranking_intervenciones(version, snapshot_path, (delta_iac,), (delta_seg,))
+    st.dataframe(
+        ranking.head(10)[["escenario", "mejora", "impacto_medio", "zonas_bajo_umbral"]]
+               .rename(columns={"escenario": "Intervención", "mejora": "Reducción de impacto",
+                                "impacto_medio": "Impacto resultante", "zonas_bajo_umbral": "Zonas IAC<40"}),
+        use_container_width=True, hide_index=True)
 
 st.write("")
 col1, col2 = st.columns(2)
@@ -180,28 +380,7 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("### Actividad por Zona (Bubble Map IAC)")
     if len(df):
-        # Escalar IAC a 0–100 si viene en 0–1
-        df_bubble = df.copy()
-        if "iac" in df_bubble.columns:
-            try:
-                iac_max = float(pd.to_numeric(df_bubble["iac"], errors="coerce").max())
-                if iac_max <= 1.5:  # típico caso de IAC en [0,1]
-                    df_bubble["iac"] = pd.to_numeric(df_bubble["iac"], errors="coerce") * 100.0
-            except Exception:
-                pass
-
-        # Centro sugerido (promedio de lat/lon); el componente calcula fallback si None
-        center = None
-        if {"lat","lon"}.issubset(df_bubble.columns) and df_bubble[["lat","lon"]].notna().any().all():
-            center = {"lat": float(df_bubble["lat"].mean()), "lon": float(df_bubble["lon"].mean())}
-
-        fig = bubble_map_iac_mapbox(
-            df_bubble,
-            zoom=12.0,
-            center=center,
-            range_size=(10, 36),
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        seccion_mapa(snapshot["version"], snapshot["path"])
     else:
         st.info("No hay datos para mostrar en el mapa.")
 
@@ -209,14 +388,7 @@ with col1:
 with col2:
     st.markdown("### Causas Principales")
     if {"causa","impacto"}.issubset(df.columns):
-        top = (df.groupby("causa", as_index=False)["impacto"].mean()
-                 .sort_values("impacto", ascending=False).head(5))
-        chart = alt.Chart(top).mark_bar(cornerRadiusTopLeft=8, cornerRadiusTopRight=8).encode(
-            x=alt.X('causa:N', sort='-y', title="Causa"),
-            y=alt.Y('impacto:Q', title="Impacto promedio"),
-            color=alt.Color('causa:N', legend=None)
-        ).properties(height=300)
-        st.altair_chart(chart, use_container_width=True)
+        st.vega_lite_chart(spec_causas(snapshot["version"], snapshot["path"]), use_container_width=True)
     else:
         df_bar = pd.DataFrame({
             'Causa': ['Falta de iluminación', 'Basura', 'Abandono', 'Inseguridad', 'Contaminación'],
@@ -235,43 +407,18 @@ col3, col4 = st.columns(2)
 # =================== LÍNEA TEMPORAL (si hay fecha) ===================
 with col3:
     st.markdown("### Nivel de Intervención por Sector / Tiempo")
-    if "fecha" in df.columns and len(df):
-        dft = df.copy()
-        dft["fecha"] = pd.to_datetime(dft["fecha"], errors="coerce")
-        serie = (dft.dropna(subset=["fecha"])
-                    .groupby(dft["fecha"].dt.to_period("Y"))["iac"].mean()
-                    .reset_index())
-        serie["fecha"] = serie["fecha"].astype(str)
-        line = alt.Chart(serie).mark_line(point=True).encode(
-            x=alt.X('fecha:N', title="Año"),
-            y=alt.Y('iac:Q', title="IAC promedio")
-        ).properties(height=300)
-        st.altair_chart(line, use_container_width=True)
-    else:
-        df_line = pd.DataFrame({'Año': range(2018, 2026), 'Nivel': np.random.randint(40, 100, 8)})
-        line = alt.Chart(df_line).mark_line(point=True).encode(x='Año', y='Nivel').properties(height=300)
-        st.altair_chart(line, use_container_width=True)
+    seccion_serie(snapshot["version"], snapshot["path"])
 
 # =================== PIE DE RIESGO (basado en IAC) ===================
 with col4:
     st.markdown("### Zonas con Mayor Riesgo")
-    if {"nombre","iac"}.issubset(df.columns) and len(df):
-        risky = (df.assign(riesgo=(df["iac"]<40).astype(int))
-                   .groupby("nombre", as_index=False)["riesgo"].sum()
-                   .sort_values("riesgo", ascending=False).head(5)
-                   .rename(columns={"nombre":"Zona","riesgo":"Casos"}))
-        total = risky["Casos"].sum()
-        risky["Porcentaje"] = (risky["Casos"] / total * 100.0).round(1) if total else 0
-        pie = alt.Chart(risky).mark_arc(innerRadius=50).encode(
-            theta='Porcentaje:Q',
-            color='Zona:N',
-            tooltip=['Zona','Casos','Porcentaje']
-        ).properties(height=300)
-        st.altair_chart(pie, use_container_width=True)
-    else:
-        df_pie = pd.DataFrame({'Zona': ['Centro', 'Norte', 'Sur', 'Este', 'Oeste'],
-                               'Porcentaje': [25, 20, 15, 30, 10]})
-        pie = alt.Chart(df_pie).mark_arc(innerRadius=50).encode(theta='Porcentaje', color='Zona')
-        st.altair_chart(pie, use_container_width=True)
+    seccion_riesgo(snapshot["version"], snapshot["path"])
+
+# =================== SIMULADOR (ranking de intervenciones) ===================
+st.markdown("### Intervenciones sugeridas")
+seccion_intervenciones(snapshot["version"], snapshot["path"])
 
 st.markdown('</div>', unsafe_allow_html=True)
+
+if mostrar_diagnostico:
+    render_panel(st)
@@ -0,0 +1,19 @@
+# tests/conftest.py
+"""
+Hace importable `src` como lo hacen los scripts (ROOT en sys.path). La carpeta se llama
+`Src`: en Windows se resuelve sola; en sistemas sensibles a mayúsculas se registra el alias.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+if importlib.util.find_spec("src") is None:
+    _spec = importlib.util.spec_from_file_location(
+        "src", ROOT / "Src" / "_init_.py", submodule_search_locations=[str(ROOT / "Src")])
+    _mod = importlib.util.module_from_spec(_spec)
+    sys.modules["src"] = _mod
+    _spec.loader.exec_module(_mod)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.anomalies import DetectorAnomalias
+
+
+def _referencia(valores, alpha):
+    """
+    Recurrencia EWMA fila por fila: z con m y s previos a cada lectura. Como ewm(adjust=False),
+    cada serie arranca con su primer valor: m = primera lectura, s = (1-α)·primer δ².
+    """
+    m = s = None
+    z = []
+    for x in valores:
+        if m is None:
+            m = x
+            z.append(np.nan)
+            continue
+        d = x - m
+        z.append(d / np.sqrt(s) if s else np.nan)
+        m += alpha * d
+        s = (1 - alpha) * d * d if s is None else (1 - alpha) * (s + alpha * d * d)
+    return np.array(z)
+
+
+def _lecturas(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    ts = pd.date_range("2025-10-01", periods=n, freq="5min")
+    return pd.DataFrame({"nombre": np.where(np.arange(n) % 2, "A", "B"), "ts": ts,
+                         "co2": rng.normal(500, 10, n)})
+
+
+def test_coincide_con_la_recurrencia_por_sensor():
+    df = _lecturas(400)
+    det = DetectorAnomalias(metricas=("co2",), alpha=0.1, calentamiento=5)
+    out = det.procesar(df, chunk_filas=37)
+    for clave in ("A", "B"):
+        filas = df["nombre"] == clave
+        assert np.allclose(out.loc[filas, "z_co2"], _referencia(df.loc[filas, "co2"].to_numpy(), 0.1),
+                           equal_nan=True, atol=1e-4)
+
+
+def test_por_archivos_igual_que_de_una_vez_y_pico_marcado(tmp_path):
+    df = _lecturas(600, 1)
+    df.loc[550, "co2"] = 900.0
+    completo = DetectorAnomalias(metricas=("co2",)).procesar(df)
+    det = DetectorAnomalias(metricas=("co2",))
+    det.procesar(df.iloc[:300])
+    det.save(tmp_path / "estado.json")
+    det = DetectorAnomalias.load(tmp_path / "estado.json", metricas=("co2",))
+    segunda = det.procesar(df.iloc[300:])
+    assert np.allclose(segunda["z_co2"], completo["z_co2"].iloc[300:], atol=1e-4)
+    assert completo["anomalia"].tolist().count(True) >= 1 and completo.loc[550, "anomalia"]
+
+
+def test_reingesta_no_mueve_el_estado_y_rechazadas_se_ignoran():
+    df = _lecturas(200, 2)
+    det = DetectorAnomalias(metricas=("co2",))
+    det.procesar(df)
+    antes = {k: dict(v) for k, v in det.estado.items()}
+    det.procesar(df)  # mismo archivo otra vez: ts <= marca de agua
+    assert det.estado == antes
+    validas = np.ones(len(df), dtype=bool)
+    validas[::2] = False
+    out = DetectorAnomalias(metricas=("co2",)).procesar(df, validas=validas)
+    assert out.loc[~validas, "z_co2"].isna().all() and not out.loc[~validas, "anomalia"].any()
+
+
+def test_estado_de_otra_version_se_descarta(tmp_path):
+    det = DetectorAnomalias(metricas=("co2",), version=1)
+    det.procesar(_lecturas(50))
+    det.save(tmp_path / "e.json")
+    assert DetectorAnomalias.load(tmp_path / "e.json", version=2, metricas=("co2",)).estado == {}
+    assert DetectorAnomalias.load(tmp_path / "e.json", version=1, metricas=("co2",)).estado
@@ -0,0 +1,95 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+import pyarrow as pa
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+
+from src import ingest_worker
+from src.api import FuenteDatos, Servicio, _Consulta, crear_app
+from src.config import API_MAX_RESOLUCION
+from src.ingest_worker import IngestWorker
+
+DATOS = Path(__file__).resolve().parents[1] / "data" / "data_zonas.csv"
+
+
+class TestApi(AsyncHTTPTestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        (self.tmp / "data").mkdir()
+        shutil.copy(DATOS, self.tmp / "data" / "lecturas_a.csv")
+        self.worker = IngestWorker(data_dir=self.tmp / "data", cache_dir=self.tmp / "cache")
+        self.worker.scan()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def get_app(self):
+        return crear_app(Servicio(FuenteDatos(self.tmp / "cache"), concurrencia=2, cola=4))
+
+    def _json(self, url, codigo=200):
+        r = self.fetch(url)
+        self.assertEqual(r.code, codigo, r.body)
+        return json.loads(r.body)
+
+    def test_no_arranca_otro_worker(self):
+        self.assertEqual(self._json("/salud")["version"], 1)
+        self.assertIsNone(ingest_worker._worker)
+
+    def test_lecturas_filtradas(self):
+        filas = self._json("/lecturas?zonas=Centro&columnas=nombre,iac")
+        self.assertTrue(filas)
+        self.assertTrue(all(f["nombre"] == "Centro" for f in filas))
+        self.assertEqual(set(filas[0]), {"nombre", "iac"})
+        self.assertEqual(len(self._json("/lecturas?limite=2")), 2)
+
+    def test_zonas_y_mapa_en_arrow(self):
+        r = self.fetch("/zonas", headers={"Accept": "application/vnd.apache.arrow.stream"})
+        self.assertEqual(r.code, 200)
+        self.assertGreater(pa.ipc.open_stream(r.body).read_all().num_rows, 0)
+        self.assertTrue(self._json("/mapa"))
+
+    def test_errores_como_json(self):
+        self.assertIn("nope", self._json("/lecturas?columnas=nope", 400)["error"])
+        self.assertIn("error", self._json("/mapa?formato=xml", 400))
+        self._json(f"/mapa?tipo=superficie&resolucion={API_MAX_RESOLUCION + 1}", 400)
+        self.assertTrue(self._json("/mapa?tipo=superficie&resolucion=10"))
+
+    def test_nueva_version_se_vuelve_a_leer(self):
+        self.assertEqual(self.fetch("/zonas").headers["X-Urbesense-Version"], "1")
+        shutil.copy(DATOS, self.tmp / "data" / "lecturas_b.csv")
+        self.worker.scan()
+        self.assertEqual(self.fetch("/zonas").headers["X-Urbesense-Version"], "2")
+
+
+    def test_agregados_del_tablero(self):
+        riesgo = self._json("/agregados?tipo=riesgo&umbral=50&top=3")
+        self.assertTrue(riesgo and len(riesgo) <= 3)
+        self.assertEqual(set(riesgo[0]), {"Zona", "Casos", "Porcentaje"})
+        self.assertTrue(self._json("/agregados?tipo=anual"))
+        self.assertIn("tipo", self._json("/agregados?tipo=otro", 400)["error"])
+
+class TestApiSinSnapshot(AsyncHTTPTestCase):
+    def get_app(self):
+        self.tmp = tempfile.mkdtemp()
+        return crear_app(Servicio(FuenteDatos(self.tmp)))
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_503_sin_snapshot(self):
+        self.assertEqual(self.fetch("/lecturas").code, 503)
+
+
+
+def test_consulta_sin_calcular_no_se_puede_instanciar():
+    class SinCalcular(_Consulta):
+        pass
+
+    with pytest.raises(TypeError, match="calcular"):
+        SinCalcular(None, None)  # falla antes de llegar a RequestHandler.__init__
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+import pytest
+
+from src.chart_data import (CacheSpecs, causas_principales, conteo_bajo_umbral, iac_anual, reducir_serie,
+                            riesgo_por_zona)
+from src.store import ingest
+from src.units import set_units
+
+
+def test_cache_specs_no_se_vacia_al_alternar_versiones():
+    cache, llamadas = CacheSpecs(max_entradas=3), []
+
+    def construir(nombre):
+        return lambda: llamadas.append(nombre) or {"mark": nombre}
+
+    cache.obtener(1, ("a",), construir("a1"))
+    cache.obtener(2, ("a",), construir("a2"))
+    assert cache.obtener(1, ("a",), construir("otra")) == {"mark": "a1"}  # sigue en caché
+    cache.obtener(2, ("b",), construir("b2"))
+    cache.obtener(2, ("c",), construir("c2"))  # desaloja la menos usada: (2, a)
+    assert len(cache) == 3
+    cache.obtener(2, ("a",), construir("a2'"))
+    assert llamadas == ["a1", "a2", "b2", "c2", "a2'"]
+
+
+def test_conteo_bajo_umbral():
+    out = conteo_bajo_umbral(pd.Series(["A", "A", "B", None]), [10, 50, 20, 5], umbral=40)
+    assert out.to_dict("list") == {"Zona": ["A", "B"], "Casos": [1, 1], "Porcentaje": [50.0, 50.0]}
+
+
+def test_reducir_serie_respeta_el_tope():
+    df = pd.DataFrame({"x": np.arange(20_000), "y": np.ones(20_000)})
+    out = reducir_serie(df, "x", "y", max_puntos=100)
+    assert len(out) <= 100 and (out["y"] == 1).all()
+
+
+@pytest.fixture
+def lecturas_en_store(tmp_path):
+    rng = np.random.default_rng(3)
+    n = 600
+    df = pd.DataFrame({"nombre": rng.choice(["A", "B", "C", "D", "E", "F", "G"], n),
+                       "fecha": pd.to_datetime("2021-01-01") + pd.to_timedelta(rng.integers(0, 1500, n), unit="D"),
+                       "iac": rng.integers(0, 21, n) / 20.0,  # valores justo en el umbral
+                       "causa": rng.choice(["basura", "luz", "ruido", "abandono", "tráfico", "obra"], n),
+                       "impacto": rng.uniform(0, 100, n)})
+    df.loc[::17, "iac"] = np.nan
+    df.loc[(df["nombre"] == "G"), "iac"] = np.nan   # zona sin IAC: 0 casos en ambos caminos
+    df.loc[::23, "causa"] = None
+    set_units(df, {"iac": "fraccion"})
+    ruta = tmp_path / "urbesense.db"
+    ingest(df, db_path=ruta)
+    return df, ruta
+
+
+@pytest.mark.parametrize("agregado, kwargs", [
+    (riesgo_por_zona, {}),
+    (riesgo_por_zona, {"umbral": 55, "n": 7}),
+    (iac_anual, {}),
+    (iac_anual, {"zonas": ["B", "E"]}),
+    (causas_principales, {"n": 3}),
+])
+def test_agregados_iguales_en_pandas_y_en_store(lecturas_en_store, agregado, kwargs):
+    df, ruta = lecturas_en_store
+    en_pandas = agregado(df, usar_store=False, **kwargs)
+    en_store = agregado(df, usar_store=True, db_path=ruta, **kwargs)
+    assert len(en_pandas)
+    pd.testing.assert_frame_equal(en_pandas, en_store, check_dtype=False)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from src.clustering import asignar_zonas, resumen_por_zona, zonas_por_densidad
+
+
+def _nube(lat, lon, n, semilla):
+    rng = np.random.default_rng(semilla)
+    return lat + rng.normal(0, 0.0005, n), lon + rng.normal(0, 0.0005, n)
+
+
+def test_dos_nubes_densas_y_ruido():
+    lat_a, lon_a = _nube(19.80, -90.50, 40, 0)
+    lat_b, lon_b = _nube(19.90, -90.40, 40, 1)
+    lat = np.r_[lat_a, lat_b, 20.5, np.nan]
+    lon = np.r_[lon_a, lon_b, -89.0, -90.5]
+    zonas = zonas_por_densidad(lat, lon, eps_km=0.3, min_puntos=3)
+    assert len(set(zonas[:40])) == 1 and len(set(zonas[40:80])) == 1
+    assert zonas[0] != zonas[40] and min(zonas[0], zonas[40]) >= 0
+    assert zonas[80] == -1 and zonas[81] == -1  # aislado y sin coordenadas
+
+
+def test_sensor_fijo_repetido_no_hace_densa_la_celda():
+    lat, lon = np.full(100, 19.8), np.full(100, -90.5)
+    assert (zonas_por_densidad(lat, lon, eps_km=0.3, min_puntos=3) == -1).all()
+
+
+def test_resumen_sin_ruido():
+    lat, lon = _nube(19.80, -90.50, 30, 2)
+    df = pd.DataFrame({"lat": np.r_[lat, 21.0], "lon": np.r_[lon, -88.0], "iac": np.r_[np.full(30, 0.5), 0.9]})
+    resumen = resumen_por_zona(asignar_zonas(df, eps_km=0.3, min_puntos=3))
+    assert resumen["lecturas"].tolist() == [30]
+    assert resumen["iac"].tolist() == [0.5]
+
+
+def test_sin_coordenadas_no_agrega_columna():
+    df = pd.DataFrame({"nombre": ["A"]})
+    assert "zona_cluster" not in asignar_zonas(df).columns
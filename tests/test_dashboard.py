@@ -0,0 +1,63 @@
+import ast
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src import ingest_worker, perf
+from src.ingest_worker import IngestWorker
+
+ROOT = Path(__file__).resolve().parents[1]
+DATOS = ROOT / "data" / "data_zonas.csv"
+_WIDGETS = {"slider", "select_slider", "selectbox", "radio", "number_input", "multiselect", "checkbox", "text_input"}
+
+
+def _es_fragmento(fn) -> bool:
+    return any(isinstance(d, ast.Attribute) and d.attr == "fragment" for d in fn.decorator_list)
+
+
+def _etiquetas(nodo) -> set:
+    return {n.args[0].value for n in ast.walk(nodo)
+            if isinstance(n, ast.Call) and isinstance(n.func, ast.Attribute) and n.func.attr in _WIDGETS
+            and n.args and isinstance(n.args[0], ast.Constant)}
+
+
+@pytest.mark.parametrize("script, en_fragmentos, globales", [
+    ("main3.py",
+     {"Capa", "Resolución", "Granularidad", "Media móvil (periodos)", "Agrupar por", "Umbral de riesgo (IAC %)",
+      "Aumento de IAC", "Aumento de seguridad"},
+     {"🩺 Diagnóstico y rendimiento", "Reglas activas"}),
+    ("Src/urbesense_main.py",
+     {"Umbral IAC inactiva", "Ruido alto (dB)", "CO₂ alto (ppm)", "Temperatura alta (°C)", "Formato"},
+     {"o indica ruta local"}),
+])
+def test_controles_de_graficas_viven_en_fragmentos(script, en_fragmentos, globales):
+    # Un control fuera de un st.fragment re-ejecuta todo el script (CSS, carga, mapa...)
+    arbol = ast.parse((ROOT / script).read_text(encoding="utf-8"))
+    fragmentos = [n for n in arbol.body if isinstance(n, ast.FunctionDef) and _es_fragmento(n)]
+    dentro = set().union(*(_etiquetas(f) for f in fragmentos))
+    assert en_fragmentos <= dentro
+    assert _etiquetas(arbol) - dentro <= globales
+
+
+def _spec_pie(at) -> str:
+    return next(c.proto.spec for c in at.get("arrow_vega_lite_chart") if '"arc"' in c.proto.spec)
+
+
+def test_cambiar_un_control_no_reconstruye_el_mapa(tmp_path, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    (tmp_path / "data").mkdir()
+    shutil.copy(DATOS, tmp_path / "data" / "lecturas.csv")
+    worker = IngestWorker(data_dir=tmp_path / "data", cache_dir=tmp_path / "cache")
+    worker.scan()
+    monkeypatch.setattr(ingest_worker, "_worker", worker)  # el script usa este worker, no DATA_DIR
+    perf.limpiar()
+
+    at = AppTest.from_file(str(ROOT / "main3.py"), default_timeout=120).run()
+    assert not at.exception
+    pie = _spec_pie(at)
+    next(s for s in at.slider if s.label == "Umbral de riesgo (IAC %)").set_value(80).run()
+    assert not at.exception
+    assert _spec_pie(at) != pie   # el pie sí cambia con el umbral
+    assert len(perf.registros("plot.bubble_map_iac_mapbox")) == 1   # la figura del mapa no
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import data_loader, perf
+from src.data_loader import (CSV_ENGINES, calcular_violaciones, clean_dataset, filas_validas, iter_dataset, load_dataset,
+                             motivos, read_raw, rechazos, resumen_validacion, revalidar)
+
+
+def _csv(tmp_path, n=3000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "zona_id": [f"Z{i % 40:03d}" for i in range(n)],
+        "nombre": [f"Zona {i % 40}" for i in range(n)],
+        "lat": rng.uniform(19.80, 19.85, n).round(5),
+        "lon": rng.uniform(-90.55, -90.50, n).round(5),
+        "iac": rng.uniform(0, 100, n).round(1),
+        "ruido": rng.uniform(40, 90, n).round(1),
+        "co2": rng.uniform(380, 900, n).round(0),
+        "temperatura": rng.uniform(20, 36, n).round(1),
+        "fecha": "2025-10-15",
+        "hora": [f"{i % 24:02d}:00" for i in range(n)],
+    })
+    df.loc[5, "nombre"] = None
+    df["co2"] = df["co2"].astype(object)
+    df.loc[n - 3, "co2"] = "sin dato"  # texto en columna numérica, lejos del primer bloque
+    ruta = tmp_path / "lecturas.csv"
+    df.to_csv(ruta, index=False)
+    return ruta
+
+
+@pytest.mark.parametrize("engine", ["pyarrow", "pipeline"])
+def test_lectores_de_pyarrow_igualan_a_pandas(tmp_path, monkeypatch, engine):
+    # Bloques chicos: la inferencia de tipos del primer bloque falla más adelante y se reintenta
+    monkeypatch.setattr(data_loader, "_CSV_BLOQUE", 16 << 10)
+    ruta = _csv(tmp_path)
+    esperado = load_dataset(str(ruta), conservar_rechazos=True, engine="pandas")
+    obtenido = load_dataset(str(ruta), conservar_rechazos=True, engine=engine)
+    # pandas deja NaN y pyarrow None en los textos nulos: se comparan como nulos
+    nulos = lambda df: df.astype(object).where(df.notna(), None)
+    pd.testing.assert_frame_equal(nulos(obtenido), nulos(esperado))
+
+
+def test_engine_invalido(tmp_path):
+    with pytest.raises(ValueError):
+        read_raw(str(_csv(tmp_path, 10)), engine="polars")
+    assert "pipeline" in CSV_ENGINES
+
+
+def test_read_raw_queda_perfilado(tmp_path):
+    ruta = _csv(tmp_path, 10)
+    perf.limpiar()
+    df = read_raw(str(ruta))
+    assert [r["filas_salida"] for r in perf.registros("loader.read_raw")] == [len(df)]
+
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_limite_de_co2_se_decide_con_el_archivo_completo(tmp_path, formato):
+    # Zona A sola parece "porcentaje" (máx 80); el archivo completo está en ppm (máx 500)
+    df = pd.DataFrame({"nombre": ["A", "A", "B"], "lat": [19.8, 19.81, 19.82], "lon": [-90.5] * 3,
+                       "iac": [0.5, 0.6, 0.7], "ruido": [50, 55, 60], "co2": [50, 80, 500],
+                       "temperatura": [25, 26, 27]})
+    ruta = tmp_path / f"lecturas.{formato}"
+    df.to_csv(ruta, index=False) if formato == "csv" else df.to_parquet(ruta, index=False)
+    completo = load_dataset(str(ruta))
+    filtrado = load_dataset(str(ruta), zonas=["A"])
+    assert filtrado["co2"].tolist() == completo.loc[completo["nombre"] == "A", "co2"].tolist() == [50, 80]
+    assert "co2_max" not in filtrado.attrs
+
+
+def _crudo():
+    return pd.DataFrame({"nombre": ["A", "A", None, "B", "C"],
+                         "lat": [19.8, 19.8, 19.8, 95.0, 19.9], "lon": [-90.5, -90.5, -90.5, -90.5, -90.4],
+                         "iac": [0.5, 0.5, 0.6, 0.7, 0.1], "co2": [40.0, 40.0, 41.0, 42.0, 43.0]})
+
+
+def test_bits_por_regla():
+    bits = calcular_violaciones(_crudo())
+    assert [motivos(b) for b in bits] == [[], ["duplicado"], ["sin_nombre"], ["coordenadas"], ["rango_iac"]]
+
+
+def test_clean_dataset_conserva_rechazos_con_validas_primero():
+    df = clean_dataset(_crudo(), conservar_rechazos=True)
+    assert df["violaciones"].tolist()[:1] == [0] and (df["violaciones"].iloc[1:] != 0).all()
+    validas = filas_validas(df)
+    assert len(validas) == 1 and np.shares_memory(validas["iac"].to_numpy(), df["iac"].to_numpy())
+    assert len(filas_validas(df, ["duplicado", "sin_nombre"])) == 3  # coordenadas y rango desactivadas
+    assert rechazos(df, ["coordenadas"])["motivos"].tolist() == ["coordenadas"]
+    resumen = resumen_validacion(df)
+    assert (resumen["filas"], resumen["duplicados"], resumen["sin_nombre"]) == (5, 1, 1)
+    assert resumen["coordenadas_invalidas"] == 1 and resumen["fuera_de_rango"]["iac"] == 1
+    # Sin conservar rechazos el resultado es el mismo conjunto de filas válidas
+    limpio = clean_dataset(_crudo())
+    assert "violaciones" not in limpio and limpio["nombre"].tolist() == validas["nombre"].tolist()
+
+
+def test_revalidar_solo_toca_bits_de_rango():
+    df = clean_dataset(_crudo(), conservar_rechazos=True)
+    relajado = revalidar(df, {"iac": (0.0, 1.0)})
+    assert len(filas_validas(relajado)) == 2  # la fila de IAC 0.1 vuelve; el duplicado no
+    assert resumen_validacion(relajado)["duplicados"] == 1
+
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+@pytest.mark.parametrize("columns", [["nombre", "iac"], ["nombre", "iac", "fecha"]])
+def test_proyeccion_no_cambia_las_filas(tmp_path, formato, columns):
+    # Lecturas que solo difieren en la hora: no son duplicadas
+    df = pd.DataFrame({"nombre": "A", "lat": 19.8, "lon": -90.5, "iac": 0.5, "ruido": 50, "co2": 40,
+                       "temperatura": 25, "fecha": "2025-10-01", "hora": ["10:00", "11:00", "12:00"]})
+    ruta = tmp_path / f"lecturas.{formato}"
+    df.to_csv(ruta, index=False) if formato == "csv" else df.to_parquet(ruta, index=False)
+    proyectado = load_dataset(str(ruta), columns=columns)
+    assert list(proyectado.columns) == columns and len(proyectado) == len(load_dataset(str(ruta))) == 3
+    assert sum(len(c) for c in iter_dataset(str(ruta), columns=columns, chunksize=2)) == 3
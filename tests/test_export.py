@@ -0,0 +1,24 @@
+import gzip
+
+import pandas as pd
+import pytest
+
+from src.export import exportar
+
+
+@pytest.mark.parametrize("formato", ["csv", "csv.gz"])
+def test_csv_por_chunks_conserva_formato_de_pandas(tmp_path, formato):
+    df = pd.DataFrame({"n": [1, 2, 3], "texto": ["x, y", 'q"z', None], "ok": [True, False, True],
+                       "ts": pd.to_datetime(["2025-10-15 12:00", "2025-10-15 13:00", None])})
+    ruta = exportar(df, formato, "v1", destino=tmp_path, chunk_filas=2)
+    contenido = ruta.read_bytes()
+    if formato == "csv.gz":
+        contenido = gzip.decompress(contenido)
+    assert contenido.decode("utf-8") == df.to_csv(index=False)
+
+
+def test_export_existente_no_se_reescribe(tmp_path):
+    df = pd.DataFrame({"n": [1]})
+    ruta = exportar(df, "csv", "v1", destino=tmp_path)
+    ruta.write_text("marca")
+    assert exportar(df, "csv", "v1", destino=tmp_path).read_text() == "marca"
@@ -0,0 +1,51 @@
+import numpy as np
+
+from src.geometry import dentro_de_radio, haversine_km, pares_en_radio, vecino_mas_cercano
+
+
+def _bruto(lat, lon, lat_ref, lon_ref, radio_km):
+    d = haversine_km(np.asarray(lat)[:, None], np.asarray(lon)[:, None],
+                     np.asarray(lat_ref)[None, :], np.asarray(lon_ref)[None, :])
+    i, j = np.nonzero(d <= radio_km)
+    return set(zip(i.tolist(), j.tolist()))
+
+
+def test_un_solo_punto():
+    pares = pares_en_radio([19.8], [-90.5], [19.8], [-90.5], 1.0)
+    assert list(zip(pares["i"], pares["j"])) == [(0, 0)]
+    assert pares["km"].iloc[0] == 0.0
+
+
+def test_dos_puntos_dentro_de_radio():
+    mask = dentro_de_radio([19.8, 19.9], [-90.5, -90.5], [19.8, 19.9], [-90.5, -90.5], 1.0)
+    assert mask.tolist() == [True, True]
+
+
+def test_filas_dispersas_coinciden_con_fuerza_bruta():
+    # Puntos lejanos entre sí: la mayoría de las franjas de celdas no tienen candidatos
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(19.0, 21.0, 50)
+    lon = rng.uniform(-91.0, -89.0, 50)
+    lat_ref = np.r_[lat[:5] + 0.001, 40.0]
+    lon_ref = np.r_[lon[:5], 10.0]
+    pares = pares_en_radio(lat, lon, lat_ref, lon_ref, 0.5)
+    assert set(zip(pares["i"], pares["j"])) == _bruto(lat, lon, lat_ref, lon_ref, 0.5)
+
+
+def test_pares_en_radio_en_lotes_chicos():
+    rng = np.random.default_rng(1)
+    lat = rng.uniform(19.80, 19.85, 300)
+    lon = rng.uniform(-90.55, -90.50, 300)
+    pares = pares_en_radio(lat, lon, lat, lon, 0.8, bloque=8)
+    assert set(zip(pares["i"], pares["j"])) == _bruto(lat, lon, lat, lon, 0.8)
+
+
+def test_sin_referencias():
+    assert len(pares_en_radio([19.8], [-90.5], [], [], 1.0)) == 0
+
+
+def test_vecino_mas_cercano_excluye_mismo():
+    idx, dist = vecino_mas_cercano([0.0, 0.0, 1.0], [0.0, 0.1, 0.0], [0.0, 0.0, 1.0], [0.0, 0.1, 0.0],
+                                   excluir_mismo=True)
+    assert idx.tolist() == [1, 0, 0]
+    assert np.all(dist > 0)
@@ -0,0 +1,91 @@
+import shutil
+from pathlib import Path
+
+from src.data_loader import filas_validas, load_dataset
+from src.ingest_worker import IngestWorker, read_current
+from src.limpiardataset import procesar_lote
+from src.snapshot import load_snapshot
+from src.store import lecturas_bbox
+from src.units import unit_of
+
+DATOS = Path(__file__).resolve().parents[1] / "data" / "data_zonas.csv"
+
+
+def test_archivo_corrupto_no_bloquea_la_publicacion(tmp_path):
+    entrada = tmp_path / "data"
+    entrada.mkdir()
+    shutil.copy(DATOS, entrada / "lecturas_ok.csv")
+    (entrada / "lecturas_malo.parquet").write_bytes(b"esto no es parquet")
+
+    worker = IngestWorker(data_dir=entrada, cache_dir=tmp_path / "cache")
+    assert worker.scan()
+    assert worker.wait_ready(timeout=0)
+    assert read_current(tmp_path / "cache")["version"] == 1
+    assert list(worker.errores) == [str((entrada / "lecturas_malo.parquet").resolve())]
+    assert "lecturas_malo.parquet" in worker.ultimo_error
+
+    # Sin cambios en el archivo no se reintenta ni se republica
+    assert not worker.scan()
+
+    # Al borrarlo se limpia el error
+    (entrada / "lecturas_malo.parquet").unlink()
+    worker.scan()
+    assert worker.errores == {} and worker.ultimo_error is None
+
+
+def test_solo_archivos_corruptos_publica_snapshot_vacio(tmp_path):
+    entrada = tmp_path / "data"
+    entrada.mkdir()
+    (entrada / "lecturas_malo.parquet").write_bytes(b"x")
+    worker = IngestWorker(data_dir=entrada, cache_dir=tmp_path / "cache")
+    worker.scan()
+    assert worker.wait_ready(timeout=0)
+    assert worker.ultimo_error
+
+
+def test_no_ingiere_la_salida_del_cli_de_limpieza(tmp_path):
+    entrada = tmp_path / "data"
+    entrada.mkdir()
+    crudo = entrada / "lecturas_2025-10-01.csv"
+    shutil.copy(DATOS, crudo)
+    # Salida por defecto (data/limpio) y otra carpeta elegida a mano: ambas se ignoran
+    procesar_lote(str(crudo), str(entrada / "limpio"), workers=1)
+    procesar_lote(str(crudo), str(entrada / "otra_salida"), workers=1)
+    assert list((entrada / "otra_salida").rglob("lecturas*.parquet"))
+
+    worker = IngestWorker(data_dir=entrada, cache_dir=tmp_path / "cache")
+    assert [f.name for f in worker._archivos()] == [crudo.name]
+    worker.scan()
+    snapshot = filas_validas(load_snapshot(read_current(tmp_path / "cache")["path"]))
+    assert len(snapshot) == len(load_dataset(str(crudo)))
+
+
+def test_con_store_el_almacen_sigue_a_los_archivos(tmp_path):
+    entrada = tmp_path / "data"
+    entrada.mkdir()
+    shutil.copy(DATOS, entrada / "lecturas_a.csv")
+    shutil.copy(DATOS, entrada / "lecturas_b.csv")
+    db = tmp_path / "urbesense.db"
+    validas = len(filas_validas(load_dataset(str(DATOS))))
+
+    # Un worker previo sin almacén: al activarlo las partes en caché se ingresan igual
+    IngestWorker(data_dir=entrada, cache_dir=tmp_path / "cache").scan()
+    worker = IngestWorker(data_dir=entrada, cache_dir=tmp_path / "cache", usar_store=True, store_db=db)
+    assert worker.scan()
+    assert len(lecturas_bbox((-180, -90, 180, 90), db_path=db)) == 2 * validas
+
+    (entrada / "lecturas_b.csv").unlink()
+    worker.scan()
+    assert len(lecturas_bbox((-180, -90, 180, 90), db_path=db)) == validas
+
+
+def test_snapshot_conserva_unidades_con_archivos_de_columnas_distintas(tmp_path):
+    entrada = tmp_path / "data"
+    entrada.mkdir()
+    shutil.copy(DATOS, entrada / "lecturas_a.csv")
+    # Otro archivo sin ruido/co2: sus unidades difieren y concat descartaría los attrs
+    load_dataset(str(DATOS)).drop(columns=["ruido", "co2"]).to_csv(entrada / "lecturas_b.csv", index=False)
+    worker = IngestWorker(data_dir=entrada, cache_dir=tmp_path / "cache")
+    worker.scan()
+    snapshot = load_snapshot(worker.current()["path"])
+    assert unit_of(snapshot, "iac") == "fraccion" and unit_of(snapshot, "co2") == "ppm"
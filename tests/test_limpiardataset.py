@@ -0,0 +1,32 @@
+import json
+
+import pandas as pd
+
+from src.limpiardataset import procesar_lote, ruta_resumen
+
+
+def _lecturas(nombre, fechas):
+    return pd.DataFrame({"nombre": nombre, "lat": 19.8, "lon": -90.5, "iac": 0.5, "ruido": 50,
+                         "co2": 40, "temperatura": 25, "fecha": fechas,
+                         "hora": [f"{i:02d}:00" for i in range(len(fechas))]})
+
+
+def test_lote_particiona_por_fecha_y_no_pisa_nombres_repetidos(tmp_path):
+    for carpeta, zona in (("a", "A"), ("b", "B")):
+        (tmp_path / carpeta).mkdir()
+        df = _lecturas(zona, ["2025-10-01", "2025-10-01", "2025-10-02"])
+        df.loc[2, "temperatura"] = 60  # fuera de rango: se rechaza
+        df.to_csv(tmp_path / carpeta / "lect.csv", index=False)
+    salida = tmp_path / "limpio"
+
+    resumen = procesar_lote(str(tmp_path / "*" / "lect.csv"), str(salida), workers=1)
+
+    assert (resumen["archivos"], resumen["filas_entrada"], resumen["filas_salida"]) == (2, 6, 4)
+    assert sorted(p.name for p in salida.iterdir()) == ["fecha=2025-10-01"]
+    assert len(list((salida / "fecha=2025-10-01").glob("lect-*.parquet"))) == 2
+    # El resumen queda fuera del dataset: la carpeta se lee completa como Parquet
+    limpio = pd.read_parquet(salida)
+    assert sorted(limpio["nombre"].astype(str)) == ["A", "A", "B", "B"]
+    guardado = json.loads(ruta_resumen(salida).read_text(encoding="utf-8"))
+    assert guardado["filas_salida"] == 4
+    assert [d["validacion"]["fuera_de_rango"]["temperatura"] for d in guardado["detalle"]] == [1, 1]
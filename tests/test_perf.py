@@ -0,0 +1,52 @@
+import threading
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src import perf
+
+
+def test_medir_registra_filas_y_tiempo():
+    perf.limpiar()
+
+    @perf.perfilado("prueba.etapa")
+    def etapa(df):
+        return df.head(2)
+
+    etapa(pd.DataFrame({"a": range(5)}))
+    (reg,) = perf.registros("prueba.etapa")
+    assert (reg["filas_entrada"], reg["filas_salida"]) == (5, 2)
+    assert reg["segundos"] >= 0
+
+
+def test_memoria_la_mide_un_solo_hilo_a_la_vez(monkeypatch):
+    monkeypatch.setattr(perf, "PERF_MEMORY", True)
+    perf.limpiar()
+    dentro, seguir = threading.Event(), threading.Event()
+
+    def otro_hilo():
+        with perf.medir("prueba.otro"):
+            dentro.set()
+            seguir.wait(5)
+
+    try:
+        with perf.medir("prueba.externa"):
+            with perf.medir("prueba.interna"):
+                bloque = np.ones(2_000_000)  # ~15 MB
+                del bloque
+            hilo = threading.Thread(target=otro_hilo)
+            hilo.start()
+            dentro.wait(5)
+            seguir.set()
+            hilo.join()
+        picos = {r["etapa"]: r["pico_mb"] for r in perf.registros()}
+        assert picos["prueba.interna"] >= 14
+        assert picos["prueba.externa"] >= picos["prueba.interna"]
+        assert picos["prueba.otro"] is None  # el pico global es del hilo dueño
+        # Liberado al cerrar la etapa externa: el siguiente hilo ya puede medir
+        with perf.medir("prueba.despues"):
+            pass
+        assert perf.registros("prueba.despues")[0]["pico_mb"] is not None
+    finally:
+        tracemalloc.stop()
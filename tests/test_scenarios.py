@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.scenarios import (BaseZonas, CacheEscenarios, Escenario, barrido, escenarios_por_zona, evaluar, impacto_de,
+                           mejor_intervencion)
+
+
+@pytest.fixture
+def base():
+    return BaseZonas(["A", "B", "C"], iac=[0.3, 0.5, 0.9], seguridad=[0.4, 0.6, 0.8], lecturas=[1, 2, 1])
+
+
+def _impacto_medio(iac, seg, lecturas):
+    return float(np.average(impacto_de(np.asarray(iac), np.asarray(seg)), weights=lecturas))
+
+
+def test_evaluar_coincide_con_recalcular_la_base(base):
+    escenarios = [Escenario(["A"], 0.2), Escenario(None, 0.1, 0.05), Escenario(["C"], 0.5), Escenario(["X"], 0.3)]
+    tabla = evaluar(base, escenarios, umbral=40)
+    antes = _impacto_medio(base.iac, base.seguridad, base.lecturas)
+    esperado = [
+        _impacto_medio([0.5, 0.5, 0.9], base.seguridad, base.lecturas),
+        _impacto_medio(np.clip(base.iac + 0.1, 0, 1), base.seguridad + 0.05, base.lecturas),
+        _impacto_medio([0.3, 0.5, 1.0], base.seguridad, base.lecturas),  # recortado a 1
+        antes,  # zona desconocida: sin efecto
+    ]
+    assert np.allclose(tabla["impacto_medio"], esperado)
+    assert np.allclose(tabla["mejora"], antes - np.array(esperado))
+    assert tabla["zonas_bajo_umbral"].tolist() == [0, 0, 1, 1]
+    assert tabla["esfuerzo"].iloc[2] == pytest.approx(0.1)
+
+
+def test_barrido_reutiliza_cache_y_ordena(base):
+    cache = CacheEscenarios()
+    escenarios = escenarios_por_zona(base)
+    primero = barrido(base, escenarios, cache=cache, workers=1)
+    assert len(cache) == len(escenarios) == len(primero)
+    assert primero["mejora_por_esfuerzo"].is_monotonic_decreasing
+    segundo = barrido(base, escenarios, cache=cache, workers=1)
+    assert primero.equals(segundo)
+    assert len(cache) == len(escenarios)
+
+
+def test_bloques_chicos_dan_lo_mismo(base):
+    escenarios = escenarios_por_zona(base, deltas=(0.05, 0.1), deltas_seguridad=(0.0, 0.1))
+    assert barrido(base, escenarios, bloque=2, workers=1).equals(barrido(base, escenarios, workers=1))
+
+
+def test_base_vacia():
+    assert len(barrido(BaseZonas([], [], [], []), [], workers=1)) == 0
+
+
+def test_mejor_intervencion_depende_de_los_datos():
+    # Con el mismo delta, mejora/esfuerzo es proporcional al peso (lecturas) de la zona
+    base = BaseZonas(["A", "B", "C"], iac=[0.3, 0.5, 0.9], seguridad=[0.4, 0.6, 0.8], lecturas=[1, 5, 2])
+    mejor = mejor_intervencion(base, cache=CacheEscenarios())
+    assert mejor["zona"] == "B" and mejor["escenario"].endswith("en B")
+    assert mejor["mejora_por_esfuerzo"] == pytest.approx(50 * 5 / 8)
+    # B ya en el tope: no cuenta como intervención; gana la siguiente por peso
+    saturada = BaseZonas(["A", "B", "C"], iac=[0.3, 1.0, 0.9], seguridad=[0.4, 0.6, 0.8], lecturas=[1, 5, 2])
+    assert mejor_intervencion(saturada)["zona"] == "C"
+    assert mejor_intervencion(BaseZonas([], [], [], [])) is None
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.sketches import EstadisticasDescribe, HyperLogLog, ResumenKPI
+from src.units import set_units
+
+
+def _df(n, semilla):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({"nombre": [f"Z{i}" for i in rng.integers(0, 300, n)],
+                       "iac": rng.uniform(0, 1, n), "impacto": rng.uniform(0, 100, n),
+                       "nivel_impacto": rng.choice(["Bajo", "Alto"], n)})
+    return set_units(df, {"iac": "fraccion", "impacto": "porcentaje"})
+
+
+def test_resumen_por_partes_igual_a_completo_y_sobrevive_json(tmp_path):
+    a, b = _df(5000, 0), _df(3000, 1)
+    completo = ResumenKPI().update(pd.concat([a, b])).kpis()
+    ResumenKPI().update(a).save(tmp_path / "a.json")
+    combinado = ResumenKPI.load(tmp_path / "a.json").merge(ResumenKPI().update(b)).kpis()
+    assert combinado == completo
+    assert completo["filas"] == 8000
+    assert completo["zonas"] == pytest.approx(300, rel=0.05)
+    iac = pd.concat([a, b])["iac"] * 100
+    assert completo["iac_medio"] == pytest.approx(iac.mean(), abs=0.1)
+    assert completo["bajo_umbral"] == pytest.approx((iac < 40).sum(), abs=20)
+
+
+def test_hyperloglog_error_acotado():
+    assert HyperLogLog().update(np.arange(100_000)).estimate() == pytest.approx(100_000, rel=0.03)
+
+
+def test_describe_por_chunks_coincide_con_pandas():
+    df = pd.DataFrame({"iac": np.random.default_rng(2).uniform(0, 1, 10_000),
+                       "co2": np.random.default_rng(3).normal(500, 50, 10_000)})
+    desc = EstadisticasDescribe.from_chunks(df.iloc[i:i + 1500] for i in range(0, len(df), 1500)).describe()
+    esperado = df.describe()
+    for fila in ("count", "mean", "std", "min", "max"):
+        assert np.allclose(desc.loc[fila, ["iac", "co2"]].astype(float), esperado.loc[fila, ["iac", "co2"]])
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from src.snapshot import load_snapshot, open_snapshot, snapshot_frame, write_snapshot
+from src.units import set_units, units_of
+
+
+def _df():
+    df = pd.DataFrame({"nombre": ["Centro", "Norte", "Sur"], "lat": [19.8, 19.9, 20.0],
+                       "iac": [35.0, 80.0, 50.0], "co2": [400.0, np.nan, 410.0]})
+    return set_units(df, {"iac": "porcentaje"})  # no canónica: tiene que sobrevivir al archivo
+
+
+def test_ida_y_vuelta_conserva_valores_y_unidades(tmp_path):
+    df = _df()
+    write_snapshot(df, tmp_path / "snap.arrow")
+    leido = load_snapshot(tmp_path / "snap.arrow")
+    assert units_of(leido) == units_of(df) and units_of(leido)["iac"] == "porcentaje"
+    pd.testing.assert_frame_equal(leido, df, check_dtype=False)
+    assert isinstance(leido["nombre"].dtype, pd.StringDtype)
+
+
+def test_columnas_numericas_sin_copia(tmp_path):
+    write_snapshot(_df(), tmp_path / "snap.arrow")
+    tabla = open_snapshot(tmp_path / "snap.arrow")
+    df = snapshot_frame(tabla)
+    for col in ("lat", "iac"):
+        arr = df[col].to_numpy()
+        # Mismo buffer que la tabla mapeada (no hay copia) y de solo lectura: es compartido
+        assert arr.__array_interface__["data"][0] == tabla.column(col).chunk(0).buffers()[1].address
+        assert not arr.flags.writeable
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src import data_loader
+from src.data_loader import iter_dataset, load_dataset
+from src.sources import partition_values, prune_sources, resolve_sources
+
+
+def _lecturas(n, iac=0.5):
+    return pd.DataFrame({"lat": 19.8 + 0.001 * pd.RangeIndex(n), "lon": -90.5, "iac": iac, "ruido": 50,
+                         "co2": 400, "temperatura": 25, "hora": [f"{h:02d}:00" for h in range(n)]})
+
+
+@pytest.fixture
+def particionado(tmp_path):
+    """fecha=.../zona=.../parte.parquet: ni la fecha ni la zona vienen dentro del archivo."""
+    raiz = tmp_path / "lecturas"
+    for fecha in ("2025-10-01", "2025-10-02", "2025-10-03"):
+        for zona in ("Centro", "Norte"):
+            carpeta = raiz / f"fecha={fecha}" / f"zona={zona}"
+            carpeta.mkdir(parents=True)
+            _lecturas(3).to_parquet(carpeta / "parte.parquet", index=False)
+    (raiz / "fecha=2025-10-01" / ".~lock.parte.parquet").write_bytes(b"x")  # temporal oculto
+    return raiz
+
+
+def test_resolve_sources_carpeta_glob_y_archivo(particionado):
+    archivos = resolve_sources(particionado)
+    assert len(archivos) == 6 and archivos == sorted(archivos)
+    assert resolve_sources(str(particionado / "fecha=2025-10-02" / "*" / "*.parquet")) == archivos[2:4]
+    assert resolve_sources(archivos[0]) == [archivos[0]]
+    with pytest.raises(FileNotFoundError):
+        resolve_sources(str(particionado / "*.csv"))
+
+
+def test_partition_values_y_poda():
+    ruta = Path("x/fecha=2025-10-02/Zona=Centro/parte.parquet")
+    assert partition_values(ruta) == {"fecha": "2025-10-02", "nombre": "Centro"}
+    archivos = [ruta, Path("x/lecturas_2025-10-05.csv"), Path("x/sin_fecha.csv"),
+                Path("x/fecha=2025-10-02/zona=Norte/parte.parquet")]
+    # Fecha por partición o por nombre de archivo; sin información, el archivo se conserva
+    assert prune_sources(archivos, fecha_range=("2025-10-03", None)) == archivos[1:3]
+    assert prune_sources(archivos, fecha_range=(None, "2025-10-02 23:00")) == [ruta, archivos[2], archivos[3]]
+    assert prune_sources(archivos, zonas=["Centro"]) == archivos[:3]
+
+
+def test_load_dataset_particionado_solo_lee_las_particiones_pedidas(particionado, monkeypatch):
+    leidos = []
+    read_raw = data_loader.read_raw
+    monkeypatch.setattr(data_loader, "read_raw", lambda f, **kw: leidos.append(Path(f)) or read_raw(f, **kw))
+
+    df = load_dataset(str(particionado), fecha_range=("2025-10-02", "2025-10-03"), zonas=["Norte"])
+    assert [p.parent.parent.name for p in leidos] == ["fecha=2025-10-02", "fecha=2025-10-03"]
+    assert all(p.parent.name == "zona=Norte" for p in leidos)
+    # Las columnas de partición llegan como columnas normales
+    assert len(df) == 6 and set(df["nombre"]) == {"Norte"}
+    assert sorted(pd.to_datetime(df["fecha"]).dt.strftime("%Y-%m-%d").unique()) == ["2025-10-02", "2025-10-03"]
+
+
+def test_iter_dataset_por_chunks_igual_que_load_dataset(particionado):
+    completo = load_dataset(str(particionado), fecha_range=("2025-10-01", "2025-10-02"))
+    por_chunks = pd.concat(iter_dataset(str(particionado), fecha_range=("2025-10-01", "2025-10-02"), chunksize=2),
+                           ignore_index=True)
+    assert len(completo) == len(por_chunks) == 12
+    claves = ["fecha", "nombre", "hora"]
+    pd.testing.assert_frame_equal(
+        completo.sort_values(claves).reset_index(drop=True)[list(completo.columns)],
+        por_chunks.sort_values(claves).reset_index(drop=True)[list(completo.columns)],
+        check_dtype=False, check_categorical=False)
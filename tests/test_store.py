@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.store import ingest, lecturas_bbox
+
+
+@pytest.fixture
+def db(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame({"nombre": [f"Z{i % 7}" for i in range(n)],
+                       "lat": rng.uniform(15.0, 25.0, n), "lon": rng.uniform(-95.0, -85.0, n),
+                       "iac": rng.uniform(0, 1, n)})
+    ruta = tmp_path / "urbesense.db"
+    ingest(df, db_path=ruta)
+    return ruta, df
+
+
+@pytest.mark.parametrize("bbox", [
+    (-91.0, 19.0, -89.0, 20.5),     # pocas filas de celdas: un BETWEEN por fila
+    (-95.0, 15.0, -85.0, 25.0),     # ~1000 filas de celdas: un solo rango + módulo
+])
+def test_lecturas_bbox_coincide_con_filtro_directo(db, bbox):
+    ruta, df = db
+    lon_min, lat_min, lon_max, lat_max = bbox
+    esperado = df[df["lat"].between(lat_min, lat_max) & df["lon"].between(lon_min, lon_max)]
+    obtenido = lecturas_bbox(bbox, columns=["lat", "lon"], db_path=ruta)
+    assert len(esperado) and sorted(obtenido["lat"].tolist()) == sorted(esperado["lat"].tolist())
@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.surface import _knn_rejilla, idw, superficie
+
+
+def _knn_bruto(puntos, consultas, k):
+    d = np.sqrt(((consultas[:, None, :] - puntos[None, :, :]) ** 2).sum(axis=2))
+    return np.sort(d, axis=1)[:, :k]
+
+
+@pytest.mark.parametrize("puntos", [
+    np.random.default_rng(0).uniform(0, 10, (400, 2)),
+    np.c_[np.linspace(0, 10, 50), np.zeros(50)],        # una sola fila (misma latitud)
+    np.c_[np.zeros(50), np.linspace(0, 10, 50)],        # una sola columna (misma longitud)
+    np.zeros((6, 2)),                                   # todos en el mismo punto
+    np.array([[3.0, 4.0]]),                             # un solo sensor
+])
+def test_knn_rejilla_exacto(puntos):
+    consultas = np.random.default_rng(1).uniform(-5, 15, (500, 2))
+    dist, idx = _knn_rejilla(puntos, consultas, 4)
+    assert np.allclose(dist, _knn_bruto(puntos, consultas, 4))
+    assert np.allclose(np.sqrt(((consultas[:, None] - puntos[idx]) ** 2).sum(axis=2)), dist)
+
+
+def test_knn_con_radio_solo_devuelve_vecinos_dentro():
+    rng = np.random.default_rng(2)
+    puntos, consultas = rng.uniform(0, 10, (300, 2)), rng.uniform(-2, 12, (400, 2))
+    dist, _ = _knn_rejilla(puntos, consultas, 8, radio_max=1.0)
+    ref = _knn_bruto(puntos, consultas, 8)
+    dentro = ref <= 1.0
+    assert np.allclose(dist[dentro], ref[dentro])
+
+
+def test_idw_valor_exacto_sobre_sensor_y_nan_fuera_de_radio():
+    puntos = np.array([[0.0, 0.0], [1.0, 0.0]])
+    z = idw(puntos, np.array([1.0, 3.0]), np.array([[0.0, 0.0], [0.5, 0.0], [50.0, 50.0]]), radio_km=2.0)
+    assert z[0] == 1.0
+    assert z[1] == pytest.approx(2.0)
+    assert np.isnan(z[2])
+
+
+@pytest.mark.parametrize("df", [
+    pd.DataFrame({"lat": [19.8, 19.8], "lon": [-90.55, -90.50], "iac": [0.3, 0.7]}),
+    pd.DataFrame({"lat": [19.80, 19.85], "lon": [-90.5, -90.5], "iac": [0.3, 0.7]}),
+    pd.DataFrame({"lat": np.full(100, 19.8), "lon": np.linspace(-90.6, -90.4, 100), "iac": np.linspace(0, 1, 100)}),
+    pd.DataFrame({"lat": [19.8], "lon": [-90.5], "iac": [0.4]}),
+])
+def test_superficie_sensores_degenerados_termina_rapido(df):
+    t0 = time.perf_counter()
+    sup = superficie(df, "iac", resolucion=60)
+    assert time.perf_counter() - t0 < 5
+    assert sup.z.shape == (60, 60)
+    validos = sup.z[~np.isnan(sup.z)]
+    assert len(validos) and validos.min() >= df["iac"].min() - 1e-9 and validos.max() <= df["iac"].max() + 1e-9
+
+
+def test_superficie_sin_metrica():
+    assert superficie(pd.DataFrame({"lat": [1.0], "lon": [1.0]}), "iac") is None
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.timeseries import MotorTemporal, combinar_fecha_hora
+
+
+def _lecturas(filas):
+    df = pd.DataFrame(filas, columns=["nombre", "fecha", "hora", "iac"])
+    return df.assign(ts=combinar_fecha_hora(df["fecha"], df["hora"]))
+
+
+def test_combinar_fecha_hora():
+    ts = combinar_fecha_hora(pd.Series(["2025-10-15", "2025-10-16", None]), pd.Series(["12:30", "x", "01:00"]))
+    assert ts.iloc[0] == pd.Timestamp("2025-10-15 12:30")
+    assert ts.iloc[1] == pd.Timestamp("2025-10-16")  # hora inválida: medianoche
+    assert pd.isna(ts.iloc[2])
+
+
+def test_rolling_cuenta_periodos_de_calendario_no_filas():
+    df = _lecturas([("A", "2025-10-01", "10:00", 0.2), ("A", "2025-10-02", "10:00", 0.4),
+                    ("A", "2025-10-10", "10:00", 0.9), ("B", "2025-10-03", "10:00", 0.5)])
+    r = MotorTemporal(df).rolling("día", ventana=3)
+    a = r[r["nombre"] == "A"]["iac"].tolist()
+    # El 10/oct está a 8 días: su ventana de 3 días solo lo incluye a él
+    assert a == pytest.approx([0.2, 0.3, 0.9])
+    assert r[r["nombre"] == "B"]["iac"].tolist() == pytest.approx([0.5])  # no mezcla zonas
+
+
+def test_rolling_ponderado_por_lecturas_y_sin_zona():
+    df = _lecturas([("A", "2025-10-01", "10:00", 0.2), ("A", "2025-10-01", "11:00", 0.2),
+                    ("B", "2025-10-02", "10:00", 0.8)])
+    r = MotorTemporal(df).rolling("día", ventana=2, por_zona=False)
+    assert r["iac"].tolist() == pytest.approx([0.2, 0.4])  # (0.2+0.2+0.8)/3
+
+
+@pytest.mark.parametrize("granularidad", ["día", "semana", "mes", "año"])
+def test_rolling_continuo_coincide_con_pandas(granularidad):
+    # Sin huecos, la ventana de calendario es la misma que la de filas
+    fechas = pd.date_range("2024-01-01", periods=400, freq="D")
+    df = pd.DataFrame({"nombre": "A", "iac": np.linspace(0, 1, 400), "ts": fechas + pd.Timedelta(hours=9)})
+    motor = MotorTemporal(df)
+    sumas = motor._agregar(granularidad, True)
+    esperado = sumas["iac_suma"].rolling(3, min_periods=1).sum() / sumas["iac_n"].rolling(3, min_periods=1).sum()
+    assert np.allclose(motor.rolling(granularidad, 3)["iac"], esperado)
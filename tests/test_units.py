@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from src.units import as_percent, set_units, unit_of, units_of
+
+
+def test_set_units_solo_marca_lo_indicado():
+    df = pd.DataFrame({"iac": [0.2, 0.5], "impacto": [10.0, 90.0], "otra": [1, 2]})
+    assert units_of(df) == {} and unit_of(df, "iac") is None
+    set_units(df, {"impacto": "porcentaje", "seguridad": "fraccion"})  # seguridad no está: se ignora
+    assert units_of(df) == {"impacto": "porcentaje"}
+    set_units(df, {"iac": "fraccion"})  # se suma a las ya declaradas
+    assert units_of(df) == {"iac": "fraccion", "impacto": "porcentaje"}
+
+
+@pytest.mark.parametrize("unidad, esperado", [("fraccion", [20.0, 50.0]), ("porcentaje", [0.2, 0.5])])
+def test_as_percent_segun_la_unidad_declarada(unidad, esperado):
+    df = set_units(pd.DataFrame({"iac": [0.2, 0.5]}), {"iac": unidad})
+    assert as_percent(df).tolist() == pytest.approx(esperado)
+
+
+def test_as_percent_sin_unidad_o_no_convertible_falla():
+    with pytest.raises(ValueError, match="no tiene unidad declarada"):
+        as_percent(pd.DataFrame({"iac": [0.2, 0.5]}))
+    with pytest.raises(ValueError, match="no es convertible"):
+        as_percent(set_units(pd.DataFrame({"co2": [400.0]}), {"co2": "ppm"}), "co2")
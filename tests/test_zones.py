@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import zones
+from src.zones import Zona, asignar_zonas_oficiales, cargar_zonas, puntos_en_zonas
+
+
+def _cuadro(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+
+
+def _feature(nombre, tipo, coordenadas):
+    return {"type": "Feature", "properties": {"nombre": nombre}, "geometry": {"type": tipo, "coordinates": coordenadas}}
+
+
+def test_hueco_queda_fuera_y_otra_zona_lo_puede_ocupar():
+    con_hueco = Zona("anillo", [_cuadro(0, 0, 10, 10), _cuadro(4, 4, 6, 6)])
+    isla = Zona("isla", [_cuadro(4.5, 4.5, 5.5, 5.5)])
+    lon = np.array([1.0, 5.0, 4.2, 9.9, 11.0])
+    lat = np.array([1.0, 5.0, 4.2, 9.9, 5.0])
+    assert puntos_en_zonas(lat, lon, [con_hueco]).tolist() == [0, -1, -1, 0, -1]
+    # El punto del hueco cae en la isla; el resto del hueco sigue sin zona
+    assert puntos_en_zonas(lat, lon, [con_hueco, isla]).tolist() == [0, 1, -1, 0, -1]
+
+
+def test_multipolygon_es_una_sola_zona(tmp_path):
+    ruta = tmp_path / "zonas.geojson"
+    ruta.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        _feature("Norte", "MultiPolygon", [[_cuadro(0, 10, 2, 12)], [_cuadro(5, 10, 7, 12), _cuadro(5.5, 10.5, 6.5, 11.5)]]),
+        _feature("Sur", "Polygon", [_cuadro(0, 0, 7, 2)]),
+    ]}), encoding="utf-8")
+    assert [z.id for z in cargar_zonas(ruta)] == ["Norte", "Norte", "Sur"]
+    df = pd.DataFrame({"lon": [1.0, 5.2, 6.0, 3.0, 3.0], "lat": [11.0, 11.0, 11.0, 11.0, 1.0]})
+    out = asignar_zonas_oficiales(df, path=ruta)
+    # Ambas partes del MultiPolygon dan la misma categoría; su hueco y el espacio entre partes, NaN
+    assert list(out["zona_oficial"].cat.categories) == ["Norte", "Sur"]
+    assert out["zona_oficial"].tolist()[:2] == ["Norte", "Norte"]
+    assert out["zona_oficial"].isna().tolist() == [False, False, True, True, False]
+
+
+def test_prefiltro_bbox_descarta_antes_del_ray_casting(monkeypatch):
+    # Forma de L: su bbox incluye la esquina vacía (5..10, 5..10)
+    ele = Zona("L", [[[0, 0], [10, 0], [10, 5], [5, 5], [5, 10], [0, 10], [0, 0]]])
+    rng = np.random.default_rng(0)
+    lon, lat = rng.uniform(-10, 20, 5000), rng.uniform(-10, 20, 5000)
+    en_bbox = (lon >= 0) & (lon <= 10) & (lat >= 0) & (lat <= 10)
+
+    evaluados = []
+    original = Zona.contiene
+    monkeypatch.setattr(Zona, "contiene", lambda self, x, y: evaluados.append(len(x)) or original(self, x, y))
+    codigos = puntos_en_zonas(lat, lon, [ele])
+    assert evaluados == [int(en_bbox.sum())]  # solo los puntos del bbox llegan al ray casting
+    esperado = en_bbox & ~((lon > 5) & (lat > 5))
+    lejos_del_borde = (np.abs(lon - 5) > 1e-9) & (np.abs(lat - 5) > 1e-9)
+    assert np.array_equal((codigos == 0)[lejos_del_borde], esperado[lejos_del_borde])
+
+
+@pytest.mark.parametrize("bloque", [zones._ELEMENTOS_POR_BLOQUE, 3])
+def test_bordes_y_vertices_compartidos_caen_en_una_sola_zona(monkeypatch, bloque):
+    monkeypatch.setattr(zones, "_ELEMENTOS_POR_BLOQUE", bloque)
+    # Rejilla 2×2 de cuadros unitarios: cada punto de un borde o vértice interior pertenece
+    # exactamente a un cuadro (sin huecos ni dobles entre zonas vecinas)
+    teselas = [Zona(f"{i}{j}", [_cuadro(i, j, i + 1, j + 1)]) for i in range(2) for j in range(2)]
+    marcas = np.array([0.25, 0.5, 1.0, 1.5, 1.75])
+    lon, lat = (m.ravel() for m in np.meshgrid(marcas, marcas))
+    cuenta = sum(t.contiene(lon, lat).astype(int) for t in teselas)
+    assert cuenta.tolist() == [1] * len(lon)
+    assert (puntos_en_zonas(lat, lon, teselas) >= 0).all()
+    # Los vértices del borde exterior quedan dentro o fuera, nunca en dos zonas
+    esquinas = np.array([0.0, 2.0, 0.0, 2.0]), np.array([0.0, 0.0, 2.0, 2.0])
+    assert sum(t.contiene(*esquinas).astype(int) for t in teselas).max() <= 1